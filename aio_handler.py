@@ -0,0 +1,71 @@
+import aio_service
+from errors import *
+from exam.ttypes import *
+from util import func_log
+
+
+@func_log
+async def get_exam_report(request: GetExamReportRequest) -> GetExamReportResponse:
+    resp = GetExamReportResponse()
+    exam_id = request.examId
+    if exam_id == "" or exam_id is None:
+        fill_status_of_resp(resp, InvalidParam())
+        return resp
+
+    try:
+        report, score = await aio_service.get_exam_report(exam_id)
+        resp.report = report
+        resp.score = score
+        fill_status_of_resp(resp)
+    except ErrorWithCode as e:
+        fill_status_of_resp(resp, e)
+
+    return resp
+
+
+@func_log
+async def get_question_info(request: GetQuestionInfoRequest) -> GetQuestionInfoResponse:
+    resp = GetQuestionInfoResponse()
+    exam_id = request.examId
+    question_num = request.questionNum
+
+    if not exam_id or question_num <= 0:
+        fill_status_of_resp(resp, InvalidParam())
+        return resp
+
+    try:
+        question_info = await aio_service.get_question_info(exam_id, question_num)
+        resp.question = question_info
+        fill_status_of_resp(resp)
+    except ErrorWithCode as e:
+        fill_status_of_resp(resp, e)
+
+    return resp
+
+
+@func_log
+async def get_file_upload_path(request: GetFileUploadPathRequest) -> GetFileUploadPathResponse:
+    resp = GetFileUploadPathResponse()
+    exam_id = request.examId
+    user_id = request.userId
+    exam_type = request.type
+
+    if not user_id or (exam_type == ExamType.RealExam and not exam_id):
+        fill_status_of_resp(resp, InvalidParam())
+        return resp
+
+    try:
+        if exam_type == ExamType.AudioTest:
+            upload_path = await aio_service.get_file_upload_path(user_id=user_id)
+        elif exam_type == ExamType.RealExam:
+            upload_path = await aio_service.get_file_upload_path(exam_id, user_id, request.questionNum)
+        else:
+            fill_status_of_resp(resp, InvalidParam())
+            return resp
+
+        resp.path = upload_path
+        fill_status_of_resp(resp)
+    except ErrorWithCode as e:
+        fill_status_of_resp(resp, e)
+
+    return resp
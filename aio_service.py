@@ -0,0 +1,110 @@
+# asyncio 模式下使用异步 Mongo 驱动的接口，逻辑与 service.py 中的同名函数一致
+#
+# 只包含考试过程中频繁调用的读取/少量字段更新的接口，其余接口仍在线程池中调用 service.py
+
+import datetime
+import logging
+
+from bson.errors import InvalidId
+
+from config import ExamConfig
+from errors import *
+from exam.ttypes import *
+from manager import exam_manager, report_manager
+from manager.report_cache import report_cache, score_version
+
+
+async def get_exam_report(exam_id) -> (ExamReport, ExamScore):
+    try:
+        test, is_history = await exam_manager.get_exam_by_id_async(exam_id, 'report')
+    except InvalidId:
+        raise InvalidParam
+    if test is None:
+        raise ExamNotExist
+
+    # 只使用进程内缓存，避免在事件循环中执行同步数据库操作；只缓存已结束的考试（同 service.report_cacheable）
+    cacheable = bool(test.get('score_info')) and exam_manager.exam_finished(test, is_history)
+    version = score_version(test['score_info']) if cacheable else None
+    cached = report_cache.get(exam_id, version, persist=False) if version else None
+    if cached:
+        return cached
+
+    handling, score, feature = exam_manager.get_score_and_feature(test['questions'])
+    if handling:
+        raise InProcessing
+    report = report_manager.generate_report(feature, score, test['paper_type'])
+    score = exam_manager.score_info_to_exam_score(test['score_info'])
+    if version:
+        report_cache.put(exam_id, version, report, score, persist=False)
+    return report, score
+
+
+async def get_question_info(exam_id: str, question_num: int) -> QuestionInfo:
+    # get test (只取出需要的题目)
+    try:
+        test = await exam_manager.get_current_question_async(exam_id, question_num)
+    except InvalidId:
+        raise InvalidParam
+    if test is None:
+        raise ExamNotExist
+
+    # 如果超出最大题号
+    questions = test.get('questions', {})
+    if str(question_num) not in questions:
+        raise ExamFinished
+
+    question = questions[str(question_num)]
+    q_type = question['q_type']
+
+    result = QuestionInfo(
+        id=question.get('q_id'),
+        content=question.get('q_text'),
+        type=q_type,
+        readLimitTime=ExamConfig.question_prepare_time[q_type],
+        answerLimitTime=ExamConfig.question_limit_time[q_type],
+        questionTip=ExamConfig.question_type_tip[q_type],
+        questionNum=question_num,
+        isLastQuestion=(str(question_num + 1) not in questions),
+        examTime=(test['test_expire_time'] - test['test_start_time']).seconds,
+        examLeftTime=(test['test_expire_time'] - datetime.datetime.utcnow()).total_seconds()
+    )
+
+    # update and save
+    await exam_manager.update_current_exam_async(test['_id'], {
+        'questions.%d.status' % question_num: 'question_fetched',
+        'current_q_num': question_num,
+    })
+
+    return result
+
+
+async def get_file_upload_path(exam_id: str = "audio_test", user_id: str = None, question_num: int = None) -> str:
+    if question_num:  # real_exam
+        try:
+            exam = await exam_manager.get_current_question_async(exam_id, question_num)
+        except InvalidId:
+            raise InvalidParam
+        if not exam:
+            logging.error("[get_file_upload_path] no such test! test id: %s" % exam_id)
+            raise ExamNotExist
+        try:
+            question = exam['questions'][str(question_num)]
+        except Exception as e:
+            logging.error("[get_file_upload_path] GetEmbeddedQuestionException. question_num: "
+                          "%s, exam_id: %s. exception:\n%s" % (question_num, exam_id, repr(e)))
+            raise GetQuestionFailed
+
+        upload_path = question.get('wav_upload_url') or \
+            exam_manager.generate_upload_path(ExamType.RealExam, user_id)
+        prefix = 'questions.%d.' % question_num
+        await exam_manager.update_current_exam_async(exam['_id'], {
+            prefix + 'wav_upload_url': upload_path,
+            prefix + 'file_location': 'BOS',
+            prefix + 'status': 'url_fetched',
+        })
+    else:  # audio_test
+        upload_path = exam_manager.generate_upload_path(ExamType.AudioTest, user_id)
+
+    logging.info("[get_file_upload_path] exam_id: %s, upload_path: %s, user_id: %s" % (exam_id, upload_path, user_id))
+
+    return upload_path
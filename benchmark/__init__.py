@@ -0,0 +1,6 @@
+import os
+import sys
+
+project_folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_folder)
+sys.path.append(os.path.join(project_folder, 'gen-py'))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# func_log 访问日志在调用线程中的开销：包装一个直接返回 getExamReport/getPaperTemplate 响应的函数，
+# 对比原有的 5 行 INFO 日志（每次都 repr 完整的请求和响应）与结构化访问日志在各配置下每次调用的耗时
+# 日志输出到 /dev/null，异步模式下只计调用线程的耗时（格式化和输出在 QueueListener 线程中）
+#
+# usage: python -m benchmark.bench_access_log [--calls 20000] [--response getExamReport]
+
+import argparse
+import logging
+import time
+from functools import wraps
+
+import util
+from benchmark.bench_codec import make_responses
+from config import LogConfig
+from exam.ttypes import GetExamReportRequest
+
+
+def legacy_func_log(func):
+    """原有的 func_log"""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = 1000 * time.time()
+        logging.info(f"=============  Begin: {func.__name__}  =============")
+        logging.info(f"Args: {args}")
+        try:
+            rsp = func(*args, **kwargs)
+            logging.info(f"Response: {rsp}")
+            end = 1000 * time.time()
+            logging.info(f"Time consuming: {end - start}ms")
+            logging.info(f"=============   End: {func.__name__}   =============\n")
+            return rsp
+        except Exception as e:
+            logging.error(repr(e))
+            raise e
+
+    return wrapper
+
+
+def configure(async_handler, level='INFO', payload_limit=1024, sample_rate=1.0):
+    LogConfig.async_handler = async_handler
+    LogConfig.level = level
+    LogConfig.access_payload_limit = payload_limit
+    LogConfig.access_sample_rate = sample_rate
+    util.init_logging()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler):
+            handler.setStream(open('/dev/null', 'w'))
+    if util._listener:
+        util._listener[2].setStream(open('/dev/null', 'w'))
+
+
+CASES = [
+    # (名称, 使用原有 func_log, async_handler, level, payload_limit, sample_rate)
+    ('legacy (DEBUG, sync)', True, False, 'DEBUG', 0, 1.0),
+    ('access, sync', False, False, 'INFO', 1024, 1.0),
+    ('access, async', False, True, 'INFO', 1024, 1.0),
+    ('access, async, no payload', False, True, 'INFO', 0, 1.0),
+    ('access, async, sample 0.1', False, True, 'INFO', 1024, 0.1),
+    ('access, level WARNING', False, True, 'WARNING', 1024, 1.0),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--response', default='getExamReport',
+                        choices=['getExamReport', 'getPaperTemplate', 'getExamRecord', 'getQuestionInfo'])
+    args = parser.parse_args()
+
+    args.records, args.templates = 100, 20
+    response = make_responses(args)[args.response]
+    request = GetExamReportRequest(examId='%024x' % 1)
+
+    def handle(request):
+        return response
+
+    print("response repr: %d chars" % len(repr(response)))
+    print("%-28s %12s" % ('case', 'us/call'))
+    for name, legacy, async_handler, level, payload_limit, sample_rate in CASES:
+        configure(async_handler, level, payload_limit, sample_rate)
+        wrapped = legacy_func_log(handle) if legacy else util.func_log(handle)
+        start = time.perf_counter()
+        for _ in range(args.calls):
+            wrapped(request)
+        elapsed = time.perf_counter() - start
+        print("%-28s %12.2f" % (name, elapsed / args.calls * 1e6))
+    util._stop_listener()
+    print("dropped records: %d" % util.dropped_log_records)
+
+
+if __name__ == '__main__':
+    main()
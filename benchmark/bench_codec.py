@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 各响应 struct 在不同 transport/protocol/实现下的序列化大小和编解码耗时
+#
+# usage: python -m benchmark.bench_codec [--records 100] [--templates 20]
+
+import argparse
+import json
+import timeit
+
+from thrift.transport import TTransport
+
+from config import ExamConfig, ReportConfig
+from exam.ttypes import *
+from manager import report_manager
+from servers import fastbinary, fastbinary_usable, make_protocol_factory
+
+PAPER_TYPE = [1, 2, 2, 2, 2, 3]
+
+
+def make_responses(args) -> dict:
+    score = ExamScore(total=72.5, quality=80.0, key=75.0, detail=70.0, structure=60.0, logic=65.0)
+    features = {1: {'clr_ratio': 0.78, 'ftl_ratio': 0.12, 'interval_num': 6, 'speed': 3.2}}
+    scores = {1: {'quality': 80.0}}
+    for i in range(2, 6):
+        features[i] = {}
+        scores[i] = {'key': 75.0, 'detail': 70.0}
+    features[6] = {'structure_hit': ReportConfig.structure_list[:2], 'structure_not_hit': ReportConfig.structure_list[2:],
+                   'logic_hit': ReportConfig.logic_list[:1], 'logic_not_hit': ReportConfig.logic_list[1:]}
+    scores[6] = {'structure': 60.0, 'logic': 65.0}
+    report = report_manager.generate_report(features, scores, PAPER_TYPE)
+
+    questions = [{'q_type': q_type, 'dbid': 0} for q_type in PAPER_TYPE]
+    templates = [ExamTemplate(id='%024x' % i, name='表达能力模拟测试%d' % i, description=json.dumps(questions),
+                              questionCount=len(questions), isDeprecated=False, duration=1800)
+                 for i in range(args.templates)]
+    records = [ExamRecord(examStartTime='2020-05-10 12:00:00', templateId='%024x' % 1, examId='%024x' % i,
+                          scoreInfo=score) for i in range(args.records)]
+    question = QuestionInfo(
+        id='%024x' % 1, content='请阅读下面这段文字，然后用自己的话复述主要内容。' * 16, type=2,
+        readLimitTime=ExamConfig.question_prepare_time[2], answerLimitTime=ExamConfig.question_limit_time[2],
+        questionTip=ExamConfig.question_type_tip[2], questionNum=2, isLastQuestion=False,
+        examTime=1800, examLeftTime=1500.5
+    )
+
+    return {
+        'getPaperTemplate': GetPaperTemplateResponse(templateList=templates, statusCode=0, statusMsg=''),
+        'getExamReport': GetExamReportResponse(report=report, score=score, statusCode=0, statusMsg=''),
+        'getExamRecord': GetExamRecordResponse(examList=records, statusCode=0, statusMsg='', nextCursor=''),
+        'getQuestionInfo': GetQuestionInfoResponse(question=question, statusCode=0, statusMsg=''),
+        'computeExamScore': ComputeExamScoreResponse(score=score, statusCode=0, statusMsg=''),
+    }
+
+
+TRANSPORTS = {
+    'buffered': TTransport.TBufferedTransport,
+    'framed': TTransport.TFramedTransport,
+}
+
+
+def encode(obj, transport_cls, pfactory) -> bytes:
+    buf = TTransport.TMemoryBuffer()
+    trans = transport_cls(buf)
+    obj.write(pfactory.getProtocol(trans))
+    trans.flush()
+    return buf.getvalue()
+
+
+def decode(data, cls, transport_cls, pfactory):
+    obj = cls()
+    obj.read(pfactory.getProtocol(transport_cls(TTransport.TMemoryBuffer(data))))
+    return obj
+
+
+def bench(fn) -> float:
+    """单次调用耗时(us)"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    return min(timer.repeat(3, number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100, help='exam records in getExamRecord response')
+    parser.add_argument('--templates', type=int, default=20, help='templates in getPaperTemplate response')
+    args = parser.parse_args()
+
+    implementations = [False, True] if fastbinary_usable() else [False]
+    print("fastbinary: %s" % ('usable' if fastbinary_usable() else
+                              'not usable' if fastbinary is not None else 'not installed'))
+    print("%-17s %-9s %-8s %-12s %8s %11s %11s" % (
+        'response', 'transport', 'protocol', 'impl', 'bytes', 'encode(us)', 'decode(us)'))
+    for name, resp in make_responses(args).items():
+        for transport, transport_cls in TRANSPORTS.items():
+            for protocol in ('binary', 'compact'):
+                for accelerated in implementations:
+                    pfactory = make_protocol_factory(protocol, accelerated)
+                    data = encode(resp, transport_cls, pfactory)
+                    assert decode(data, resp.__class__, transport_cls, pfactory) == resp
+                    encode_us = bench(lambda: encode(resp, transport_cls, pfactory))
+                    decode_us = bench(lambda: decode(data, resp.__class__, transport_cls, pfactory))
+                    print("%-17s %-9s %-8s %-12s %8d %11.1f %11.1f" % (
+                        name, transport, protocol, 'fastbinary' if accelerated else 'pure python',
+                        len(data), encode_us, decode_us))
+
+
+if __name__ == '__main__':
+    main()
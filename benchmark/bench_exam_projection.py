@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 估算各 RPC 使用字段投影前后每次读取考试文档传输的字节数（BSON 编码大小）
+#
+# usage: python -m benchmark.bench_exam_projection
+
+import copy
+import datetime
+import random
+
+import bson
+
+from manager.exam_manager import exam_projection
+
+PAPER_TYPE = [1, 2, 2, 2, 2, 3]
+
+
+def make_exam():
+    questions = {}
+    for i, q_type in enumerate(PAPER_TYPE):
+        questions[str(i + 1)] = {
+            'q_id': '%024x' % random.getrandbits(96), 'q_type': q_type, 'q_text': '题' * random.randint(300, 500),
+            'file_location': 'BOS', 'wav_upload_url': 'audio/2020-05-10/%024x/1589100000r512.wav' % i,
+            'wav_temp_url': '', 'status': 'finished',
+            'analysis_start_time': datetime.datetime.utcnow(), 'analysis_end_time': datetime.datetime.utcnow(),
+            'feature': {'feature_%d' % k: random.random() for k in range(80)},
+            'score': {'quality': 80.0, 'key': 75.0, 'detail': 70.0, 'structure': 60.0, 'logic': 65.0},
+            'stack': 'Traceback (most recent call last): ...' * 20, 'analysed': True,
+        }
+    return {
+        '_id': bson.ObjectId(), 'user_id': '%024x' % random.getrandbits(96), 'openid': None,
+        'test_start_time': datetime.datetime.utcnow(), 'test_expire_time': datetime.datetime.utcnow(),
+        'paper_type': PAPER_TYPE, 'paper_tpl_id': '%024x' % random.getrandbits(96), 'current_q_num': 6,
+        'score_info': {'音质': 80.0, '结构': 60.0, '逻辑': 65.0, '细节': 70.0, '主旨': 75.0, 'total': 73.5},
+        'questions': questions, 'all_analysed': True,
+    }
+
+
+def _get_path(doc, keys):
+    for key in keys:
+        if not isinstance(doc, dict) or key not in doc:
+            return None
+        doc = doc[key]
+    return doc
+
+
+def _set_path(doc, keys, value):
+    for key in keys[:-1]:
+        doc = doc.setdefault(key, {})
+    doc[keys[-1]] = value
+
+
+def project(doc, mode, fields):
+    """在本地按 Mongo 的投影规则处理文档（只支持 only/exclude 两种方式）"""
+    if mode == 'exclude':
+        result = copy.deepcopy(doc)
+        for field in fields:
+            keys = field.split('.')
+            parent = _get_path(result, keys[:-1])
+            if isinstance(parent, dict):
+                parent.pop(keys[-1], None)
+        return result
+    result = {'_id': doc['_id']}
+    for field in fields:
+        keys = field.split('.')
+        value = _get_path(doc, keys)
+        if value is not None:
+            _set_path(result, keys, copy.deepcopy(value))
+    return result
+
+
+def main():
+    exam = make_exam()
+    full_size = len(bson.encode(exam))
+    rpcs = [
+        ('computeExamScore', 'score', None),
+        ('getExamReport / getExamResult', 'report', None),
+        ('getQuestionInfo / getFileUploadPath', 'question', 3),
+    ]
+    print("full document: %d bytes" % full_size)
+    for rpc, profile, question_num in rpcs:
+        mode, fields = exam_projection(profile, question_num)
+        size = len(bson.encode(project(exam, mode, fields)))
+        print("%-38s profile=%-9s %7d bytes (%5.1f%% of full)" % (rpc, profile, size, 100.0 * size / full_size))
+
+
+if __name__ == '__main__':
+    main()
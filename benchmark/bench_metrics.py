@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 指标统计的开销：对比直接调用 handler 方法与 metrics.instrument 包装后每次调用的耗时，
+# 以及 dependency_timer 和 --threads 个线程并发记录时的耗时，最后输出 render() 的耗时和行数
+#
+# usage: python -m benchmark.bench_metrics [--calls 200000] [--threads 8]
+
+import argparse
+import threading
+import time
+
+from exam import ExamService
+from exam.ttypes import GetExamReportResponse
+from metrics import Metrics, dependency_timer, metrics
+
+
+class Handler(object):
+    def getExamReport(self, request):
+        return GetExamReportResponse(statusCode=0)
+
+
+def per_call(fn, calls: int, threads: int = 1) -> float:
+    """threads 个线程各调用 calls 次，返回每次调用的平均耗时(微秒)"""
+    def worker():
+        for _ in range(calls):
+            fn()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter() - start) / (calls * threads) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    plain = Handler()
+    instrumented = Metrics().instrument(Handler(), ExamService.Iface)
+
+    def timed():
+        with dependency_timer('user_service', 'getUserInfo'):
+            pass
+
+    print("%-32s %10s" % ('case', 'us/call'))
+    print("%-32s %10.3f" % ('plain', per_call(lambda: plain.getExamReport(None), args.calls)))
+    print("%-32s %10.3f" % ('instrumented', per_call(lambda: instrumented.getExamReport(None), args.calls)))
+    print("%-32s %10.3f" % ('instrumented, %d threads' % args.threads,
+                            per_call(lambda: instrumented.getExamReport(None), args.calls // args.threads,
+                                     args.threads)))
+    print("%-32s %10.3f" % ('dependency_timer', per_call(timed, args.calls)))
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print("render: %.3f ms, %d lines" % ((time.perf_counter() - start) * 1000, len(text.splitlines())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 多进程扩展性测试：依次以 1/2/4/8 个 worker 进程启动服务，在同一负载下比较吞吐量和延迟
+# 压测端同样使用多个进程，避免压测进程自身的 GIL 成为瓶颈（需要能连接数据库）
+#
+# usage:
+#   python -m benchmark.bench_prefork_scaling --workers 1,2,4,8 --clients 4 --concurrency 32
+
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from benchmark.load_test import PROJECT_FOLDER, run_level, wait_port
+
+
+def _client_proc(args):
+    return run_level(args, args.concurrency)
+
+
+def run_workers(args, workers):
+    cmd = [sys.executable, os.path.join(PROJECT_FOLDER, 'server.py'), '--mode', args.mode,
+           '--port', str(args.port), '--workers', str(workers), '--share-mode', args.share_mode,
+           '--transport', 'framed' if args.framed else 'buffered', '--protocol', args.protocol]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_port(args.host, args.port):
+            print("server with %d workers failed to start" % workers)
+            return None
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(_client_proc, [args] * args.clients)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    # 各压测进程同时开始，总吞吐量取各进程之和，延迟取各进程中最差的
+    return {
+        'ok': sum(r['ok'] for r in results),
+        'errors': sum(r['errors'] for r in results),
+        'qps': sum(r['qps'] for r in results),
+        'p50': max(r['p50'] for r in results),
+        'p99': max(r['p99'] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9091)
+    parser.add_argument('--workers', type=lambda s: [int(x) for x in s.split(',')], default=[1, 2, 4, 8])
+    parser.add_argument('--mode', choices=['threaded', 'pool', 'asyncio'], default='threaded')
+    parser.add_argument('--framed', action='store_true', help='use TFramedTransport (required by asyncio mode)')
+    parser.add_argument('--protocol', choices=['binary', 'compact'], default='binary')
+    parser.add_argument('--share-mode', choices=['reuseport', 'shared'], default='reuseport')
+    parser.add_argument('--clients', type=int, default=4, help='number of load generator processes')
+    parser.add_argument('--concurrency', type=int, default=32, help='connections per load generator process')
+    parser.add_argument('--requests', type=int, default=200, help='requests per connection')
+    parser.add_argument('--exam-id', default=None, help='call getExamReport with this exam, default getPaperTemplate')
+    args = parser.parse_args()
+
+    print("cpu count: %d, total connections: %d" % (os.cpu_count(), args.clients * args.concurrency))
+    print("%7s %8s %7s %9s %8s %9s %9s" % ('workers', 'ok', 'errors', 'qps', 'speedup', 'p50(ms)', 'p99(ms)'))
+    base_qps = None
+    for workers in args.workers:
+        r = run_workers(args, workers)
+        if r is None:
+            continue
+        base_qps = base_qps or r['qps']
+        print("%7d %8d %7d %9.1f %7.2fx %9.2f %9.2f" % (
+            workers, r['ok'], r['errors'], r['qps'], r['qps'] / base_qps if base_qps else 0, r['p50'], r['p99']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 并发开始考试时选题的分散程度：--exams 个线程同时开始考试，统计各题目被选中的次数
+# legacy: 选题后经过 --latency 毫秒（取题目正文、保存考试）才累加使用次数，即原有的 init_paper 流程
+# reserve: select(reserve=True) 选题时即在进程内索引上占用题目
+# atomic: claim_least_used 在数据库中原子占用题目，需指定 --mongo-db（使用 MongoConfig 的连接，
+#         会清空并写入该库的 questions 集合，请使用单独的测试库），--workers 模拟多个进程各自的题库索引
+#
+# usage: python -m benchmark.bench_question_allocation [--exams 300] [--questions 200] [--latency 5]
+#                                                      [--modes legacy,reserve] [--mongo-db expression_bench]
+
+import argparse
+import math
+import statistics
+import threading
+import time
+from collections import Counter
+
+from bson import ObjectId
+
+from manager import question_pool as question_pool_module
+from manager.question_pool import QuestionPool
+
+PAPER_TYPES = [1, 2, 2, 2, 2, 3]
+SLOTS = [(q_type, 0) for q_type in PAPER_TYPES]
+
+
+def make_questions(per_type):
+    return [(str(ObjectId()), q_type, 0) for q_type in sorted(set(PAPER_TYPES)) for _ in range(per_type)]
+
+
+def start_exams(exams, start_exam):
+    """exams 个线程同时调用 start_exam(i)，返回 (各场考试选中的题目, 耗时秒数)"""
+    barrier = threading.Barrier(exams)
+    results = [None] * exams
+
+    def worker(i):
+        barrier.wait()
+        results[i] = start_exam(i)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(exams)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def run_legacy(questions, exams, latency):
+    pool = QuestionPool()
+    pool.load(questions)
+
+    def start_exam(_):
+        selected = pool.select(SLOTS, frozenset())
+        time.sleep(latency)
+        for qid in selected:
+            pool.increase_used_times(qid)
+        return selected
+
+    return start_exams(exams, start_exam)
+
+
+def run_reserve(questions, exams, latency):
+    pool = QuestionPool()
+    pool.load(questions)
+
+    def start_exam(_):
+        selected = pool.select(SLOTS, frozenset(), reserve=True)
+        time.sleep(latency)
+        return selected
+
+    return start_exams(exams, start_exam)
+
+
+def run_atomic(questions, exams, latency, workers):
+    from model.question import QuestionModel
+
+    collection = QuestionModel._get_collection()
+    collection.delete_many({})
+    collection.insert_many([{'_id': ObjectId(qid), 'q_type': q_type, 'used_times': used_times, 'index': 0}
+                            for qid, q_type, used_times in questions])
+    # 每个 worker 一个题库索引，模拟多进程部署；claim_least_used 只用数据库排序，索引仅用于排除做过的题目
+    pools = [QuestionPool() for _ in range(workers)]
+    for pool in pools:
+        pool.load(questions)
+
+    def start_exam(i):
+        claimed = []
+
+        def claim(q_type, excluded):
+            qid = question_pool_module.claim_least_used(q_type, excluded)
+            if qid is not None:
+                claimed.append(qid)
+            return qid
+
+        selected = pools[i % workers].select(SLOTS, frozenset(), claim=claim)
+        time.sleep(latency)
+        return selected
+
+    try:
+        return start_exams(exams, start_exam)
+    finally:
+        collection.delete_many({})
+
+
+def report(mode, questions, results, elapsed):
+    picks = {q_type: Counter() for q_type in set(PAPER_TYPES)}
+    for qid, q_type, _ in questions:
+        picks[q_type][qid] = 0
+    for selected in results:
+        for qid, q_type in zip(selected, PAPER_TYPES):
+            picks[q_type][qid] += 1
+
+    for q_type in sorted(picks):
+        counts = list(picks[q_type].values())
+        total = sum(counts)
+        ideal = math.ceil(total / len(counts))
+        print("%-8s type %d | picks %6d | distinct %5d | max %4d (ideal %d) | stdev %6.2f | %7.1f ms" % (
+            mode, q_type, total, sum(1 for c in counts if c), max(counts), ideal, statistics.pstdev(counts),
+            elapsed * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--exams', type=int, default=300)
+    parser.add_argument('--questions', type=int, default=200, help='questions per type')
+    parser.add_argument('--latency', type=float, default=5, help='ms between selecting and committing')
+    parser.add_argument('--modes', default='legacy,reserve')
+    parser.add_argument('--workers', type=int, default=4, help='question pools in atomic mode')
+    parser.add_argument('--mongo-db', default=None, help='scratch database for atomic mode')
+    args = parser.parse_args()
+
+    modes = args.modes.split(',')
+    if args.mongo_db and 'atomic' not in modes:
+        modes.append('atomic')
+    if 'atomic' in modes:
+        if not args.mongo_db:
+            parser.error('atomic mode requires --mongo-db')
+        import mongoengine
+        from config import MongoConfig
+        mongoengine.connect(db=args.mongo_db, host=MongoConfig.host, port=MongoConfig.port,
+                            username=MongoConfig.user, password=MongoConfig.password)
+
+    latency = args.latency / 1000
+    questions = make_questions(args.questions)
+    for mode in modes:
+        if mode == 'legacy':
+            results, elapsed = run_legacy(questions, args.exams, latency)
+        elif mode == 'reserve':
+            results, elapsed = run_reserve(questions, args.exams, latency)
+        elif mode == 'atomic':
+            results, elapsed = run_atomic(questions, args.exams, latency, args.workers)
+        else:
+            parser.error('unknown mode: %s' % mode)
+        report(mode, questions, results, elapsed)
+
+
+if __name__ == '__main__':
+    main()
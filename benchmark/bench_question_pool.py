@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 对比 init_paper 原有的全表扫描选题、在进程内题库索引上逐个遍历选题和 QuestionPool.select 的耗时
+# --history 为用户做过的题目数，这些题目取使用次数最少的题目（最坏情况，逐个遍历时每个槽位都要跳过它们）
+#
+# usage: python -m benchmark.bench_question_pool [--exams 200] [--history 50]
+
+import argparse
+import random
+import time
+
+from bson import ObjectId
+
+from manager.question_pool import QuestionPool
+
+PAPER_TYPES = [1, 2, 2, 2, 2, 3]
+
+
+class FakeQuestion(object):
+    def __init__(self, q_type, used_times):
+        self.id = ObjectId()
+        self.q_type = q_type
+        self.used_times = used_times
+
+
+def make_questions(n):
+    return [FakeQuestion(random.randint(1, 6), random.randint(0, 50)) for _ in range(n)]
+
+
+def select_by_scan(questions, q_history):
+    """原有方案：每场考试重新按 used_times 排序整个题库，再逐个槽位线性扫描"""
+    cursor = sorted(questions, key=lambda q: q.used_times)
+    q_chosen = set()
+    for q_type in PAPER_TYPES:
+        for q in cursor:
+            if q.q_type != q_type:
+                continue
+            qid_str = str(q.id)
+            if qid_str not in q_chosen and qid_str not in q_history:
+                q_chosen.add(qid_str)
+                q.used_times += 1
+                break
+    return q_chosen
+
+
+def select_by_walk(pool, q_history):
+    q_chosen = set()
+    for q_type in PAPER_TYPES:
+        with pool.lock:
+            for qid_str in pool.iter_questions(q_type):
+                if qid_str not in q_chosen and qid_str not in q_history:
+                    q_chosen.add(qid_str)
+                    break
+    for qid_str in q_chosen:
+        pool.increase_used_times(qid_str)
+    return q_chosen
+
+
+def select_by_engine(pool, q_history):
+    q_chosen = pool.select([(q_type, 0) for q_type in PAPER_TYPES], q_history)
+    for qid_str in q_chosen:
+        pool.increase_used_times(qid_str)
+    return q_chosen
+
+
+def run(n, exams, history):
+    questions = make_questions(n)
+    least_used = sorted(questions, key=lambda q: q.used_times)[:history]
+    histories = [set(str(q.id) for q in least_used) for _ in range(exams)]
+
+    start = time.perf_counter()
+    for q_history in histories:
+        select_by_scan(questions, q_history)
+    scan_ms = (time.perf_counter() - start) * 1000 / exams
+
+    timings = []
+    for select in (select_by_walk, select_by_engine):
+        pool = QuestionPool()
+        pool.load((q.id, q.q_type, q.used_times) for q in questions)
+        start = time.perf_counter()
+        for q_history in histories:
+            select(pool, q_history)
+        timings.append((time.perf_counter() - start) * 1000 / exams)
+
+    print("questions: %7d | history: %5d | scan: %9.3f ms/exam | walk: %7.3f ms/exam | select: %7.3f ms/exam" % (
+        n, history, scan_ms, timings[0], timings[1]))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--exams', type=int, default=200)
+    parser.add_argument('--history', type=int, default=50)
+    args = parser.parse_args()
+    for size in (10000, 100000):
+        run(size, args.exams, args.history)
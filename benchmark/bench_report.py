@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 比较逐个调用 generate_report 和 generate_reports_batch 生成报告的耗时
+#
+# usage: python -m benchmark.bench_report [--sizes 100,1000,10000]
+
+import argparse
+import random
+import time
+
+from config import ReportConfig
+from manager import report_manager
+
+PAPER_TYPE = [1, 2, 2, 2, 2, 3]
+
+
+def make_exam():
+    features, scores = {}, {}
+    for i, q_type in enumerate(PAPER_TYPE):
+        features[i + 1], scores[i + 1] = {}, {}
+        if q_type == 1:
+            features[i + 1] = {'clr_ratio': random.random(), 'ftl_ratio': random.random(),
+                               'interval_num': random.randint(0, 3), 'speed': random.uniform(3, 6)}
+            scores[i + 1] = {'quality': random.uniform(0, 100)}
+        elif q_type == 2:
+            scores[i + 1] = {'key': random.uniform(0, 100), 'detail': random.uniform(0, 100)}
+        elif q_type == 3:
+            structure_hit = random.sample(ReportConfig.structure_list, random.randint(0, 3))
+            logic_hit = random.sample(ReportConfig.logic_list, random.randint(0, 3))
+            features[i + 1] = {
+                'structure_hit': structure_hit,
+                'structure_not_hit': [s for s in ReportConfig.structure_list if s not in structure_hit],
+                'logic_hit': logic_hit,
+                'logic_not_hit': [s for s in ReportConfig.logic_list if s not in logic_hit],
+            }
+            scores[i + 1] = {'structure': random.uniform(0, 100), 'logic': random.uniform(0, 100)}
+    return features, scores, PAPER_TYPE
+
+
+def timed(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], default=[100, 1000, 10000])
+    args = parser.parse_args()
+
+    print("numpy: %s" % ('available' if report_manager._numpy() is not None else 'not available'))
+    print("%8s %14s %14s %8s" % ('exams', 'per-exam(ms)', 'batch(ms)', 'speedup'))
+    for size in args.sizes:
+        exams = [make_exam() for _ in range(size)]
+        features_list, scores_list, paper_types = zip(*exams)
+
+        single_time, single = timed(lambda: [report_manager.generate_report(f, s, p) for f, s, p in exams])
+        batch_time, batch = timed(lambda: report_manager.generate_reports_batch(features_list, scores_list, paper_types))
+        assert single == batch
+        print("%8d %14.2f %14.2f %7.2fx" % (size, single_time * 1000, batch_time * 1000, single_time / batch_time))
+
+
+if __name__ == '__main__':
+    main()
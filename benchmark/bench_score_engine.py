@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 比较逐个调用 compute_exam_score 和 score_engine 批量计算成绩的耗时，并校验结果一致
+#
+# usage: python -m benchmark.bench_score_engine [--sizes 1000,10000,100000]
+
+import argparse
+import logging
+import random
+import time
+
+from config import ExamConfig
+from manager.exam_manager import compute_exam_score
+from manager.score_engine import DIMENSIONS, score_engine
+
+PAPER_TYPE = [1, 2, 2, 2, 2, 3]
+
+
+def make_exam():
+    scores = {}
+    for i, q_type in enumerate(PAPER_TYPE):
+        scores[i + 1] = {dim: random.uniform(0, 100) for dim in ExamConfig.score_dimensions[q_type]}
+    return scores, PAPER_TYPE
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')], default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # compute_exam_score 每次调用都会打印日志
+
+    print("dimensions: %s" % ', '.join(DIMENSIONS))
+    print("%8s %14s %12s %12s %8s" % ('exams', 'per-exam(ms)', 'pack(ms)', 'compute(ms)', 'speedup'))
+    for size in args.sizes:
+        exams = [make_exam() for _ in range(size)]
+
+        start = time.perf_counter()
+        single = [compute_exam_score(scores, paper_type) for scores, paper_type in exams]
+        single_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        packed = score_engine.pack(exams)
+        pack_time = time.perf_counter() - start
+        start = time.perf_counter()
+        score_engine.compute(*packed[:2])
+        compute_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        batch = score_engine.score_infos(exams)
+        batch_time = time.perf_counter() - start
+        assert single == batch
+        print("%8d %14.2f %12.2f %12.2f %7.2fx" % (
+            size, single_time * 1000, pack_time * 1000, compute_time * 1000, single_time / batch_time))
+
+
+if __name__ == '__main__':
+    main()
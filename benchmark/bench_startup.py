@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 服务冷启动耗时：每轮启动一个新的 Python 进程，依次计时
+#   interpreter: 从创建进程到执行第一行代码（解释器启动）
+#   idl:         解析依赖服务的 thrift IDL（thrift_idl.load_user_thrift）
+#   import:      import server（加载全部 handler/manager/model 模块）
+#   listen:      创建 thrift server 并开始监听端口，之后即可接受请求
+# 不连接 mongo（ensure_indexes 等初始化的耗时取决于数据库，不计入）
+#
+# 冷启动预算：total 的中位数超过 --budget 毫秒，或 import server 时加载了按需加载的模块（LAZY_MODULES）时返回非 0
+# --importtime N 以 python -X importtime 启动一次，按累计耗时列出前 N 个模块，并按顶层包汇总自身耗时
+#
+# usage: python -m benchmark.bench_startup [--runs 10] [--mode threaded] [--budget 200] [--importtime 30]
+
+import argparse
+import collections
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在少数接口中使用、不应在启动时加载的模块
+LAZY_MODULES = ('Levenshtein', 'numpy', 'jwt')
+COLD_START_BUDGET_MS = 200  # total 中位数的上限（毫秒）
+
+CHILD = '''
+import json, sys, time
+t0 = time.time()
+sys.path.insert(0, %(project)r)
+import thrift_idl
+thrift_idl.load_user_thrift()
+t1 = time.time()
+import server
+from thrift.transport import TSocket
+t2 = time.time()
+srv = server.build_server(%(mode)r, TSocket.TServerSocket(host='127.0.0.1', port=0))
+srv.serverTransport.listen()
+t3 = time.time()
+print(json.dumps([[t0, t1, t2, t3], [m for m in %(lazy)r if m in sys.modules]]))
+'''
+
+IMPORTTIME_CHILD = 'import sys; sys.path.insert(0, %r); import server'
+
+PHASES = ('interpreter', 'idl', 'import', 'listen', 'total')
+
+
+def start_once(mode: str) -> (dict, list):
+    """启动一次，返回 (各阶段耗时, 启动后已加载的 LAZY_MODULES)"""
+    code = CHILD % {'project': PROJECT_DIR, 'mode': mode, 'lazy': LAZY_MODULES}
+    spawn = time.time()
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=PROJECT_DIR)
+    (t0, t1, t2, t3), loaded = json.loads(output.decode().strip().splitlines()[-1])
+    phases = {'interpreter': t0 - spawn, 'idl': t1 - t0, 'import': t2 - t1, 'listen': t3 - t2, 'total': t3 - spawn}
+    return phases, loaded
+
+
+def import_profile(top: int):
+    """解析 -X importtime 的输出（微秒）：按累计耗时列出前 top 个模块，并按顶层包汇总自身耗时"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORTTIME_CHILD % PROJECT_DIR],
+                          cwd=PROJECT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=True)
+    rows = []
+    for line in proc.stderr.decode().splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+
+    print("%10s %10s  module (by cumulative time)" % ('self(ms)', 'cum(ms)'))
+    for self_us, cumulative_us, name in sorted(rows, key=lambda row: -row[1])[:top]:
+        print("%10.1f %10.1f  %s" % (self_us / 1000, cumulative_us / 1000, name))
+
+    packages = collections.Counter()
+    for self_us, _, name in rows:
+        packages[name.strip().split('.')[0]] += self_us
+    print("\n%10s  package (by self time)" % 'self(ms)')
+    for package, self_us in packages.most_common(top):
+        print("%10.1f  %s" % (self_us / 1000, package))
+    print("%10.1f  total" % (sum(packages.values()) / 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--mode', choices=['threaded', 'pool'], default='threaded')
+    parser.add_argument('--budget', type=float, default=COLD_START_BUDGET_MS, help='median total budget in ms')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N', help='print the top N imports and exit')
+    args = parser.parse_args()
+
+    if args.importtime:
+        import_profile(args.importtime)
+        return
+
+    runs = [start_once(args.mode) for _ in range(args.runs)]
+    print("%-12s %10s %10s %10s" % ('phase', 'min(ms)', 'median(ms)', 'max(ms)'))
+    for phase in PHASES:
+        values = [phases[phase] * 1000 for phases, _ in runs]
+        print("%-12s %10.1f %10.1f %10.1f" % (phase, min(values), statistics.median(values), max(values)))
+
+    failed = False
+    total = statistics.median(phases['total'] * 1000 for phases, _ in runs)
+    if total > args.budget:
+        print("FAIL: median cold start %.1fms exceeds budget %.0fms" % (total, args.budget))
+        failed = True
+    loaded = sorted(set(module for _, modules in runs for module in modules))
+    if loaded:
+        print("FAIL: lazily imported modules loaded at startup: %s" % ', '.join(loaded))
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("OK: median cold start %.1fms within budget %.0fms" % (total, args.budget))
+
+
+if __name__ == '__main__':
+    main()
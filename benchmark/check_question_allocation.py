@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 并发开始考试、其中一部分在选题之后失败时，题目的占用是否都被归还：
+#   --exams 个线程同时调用 init_paper，每 --fail-every 场考试在取出题目正文之后、确认使用之前抛出异常
+#   检查：失败的考试都抛出了异常；本地索引中没有残留的占用；每道题目在数据库中的使用次数等于成功开始的考试选中它的次数，
+#   reserve 模式下本地索引中的使用次数与数据库一致（atomic 模式下本地索引只是提示，并发占用时可能暂时落后，只输出不一致的数量）；
+#   并输出题目被选中次数的分布
+# 在本地子进程中启动一个返回空题目历史的替身用户服务；使用 --mongo-db 指定的库（会清空该库，请使用单独的测试库）
+# 任一检查不通过时返回非 0
+#
+# usage: python -m benchmark.check_question_allocation --mongo-db expression_check [--exams 200] [--fail-every 5]
+#                                                      [--allocation reserve]
+
+import argparse
+import math
+import sys
+import threading
+from collections import Counter
+
+import mongoengine
+
+from benchmark.load_user_client import start_service
+from client import user_client_pool
+from config import ExamConfig, MongoConfig
+from manager import exam_manager
+from manager.question_pool import question_pool
+from model.exam import CurrentTestModel
+from model.paper_template import PaperTemplate
+from model.question import QuestionModel
+
+PAPER_TYPES = [1, 2, 2, 2, 2, 3]
+
+
+class InjectedFailure(Exception):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongo-db', required=True, help='scratch database, dropped before the check')
+    parser.add_argument('--exams', type=int, default=200)
+    parser.add_argument('--questions', type=int, default=50, help='questions per type')
+    parser.add_argument('--fail-every', type=int, default=5, help='every N-th exam fails before committing')
+    parser.add_argument('--allocation', choices=['reserve', 'atomic'], default=ExamConfig.question_allocation)
+    parser.add_argument('--port', type=int, default=19095, help='port of the stand-in user service')
+    args = parser.parse_args()
+
+    ExamConfig.question_allocation = args.allocation
+    ExamConfig.used_times_write_behind = False
+    connection = mongoengine.connect(db=args.mongo_db, host=MongoConfig.host, port=MongoConfig.port,
+                                     username=MongoConfig.user, password=MongoConfig.password)
+    connection.drop_database(args.mongo_db)
+    for q_type in sorted(set(PAPER_TYPES)):
+        for i in range(args.questions):
+            QuestionModel(text='question %d' % i, q_type=q_type, used_times=0, index=i).save()
+    template = PaperTemplate(name='check', questions=[{'q_type': t, 'dbid': 0} for t in PAPER_TYPES]).save()
+
+    # 在选题之后、确认使用之前注入失败：构造试卷题目时抛出异常
+    state = threading.local()
+    embed_cls = exam_manager.CurrentQuestionEmbed
+
+    def failing_embed(*a, **kw):
+        if getattr(state, 'fail', False):
+            raise InjectedFailure()
+        return embed_cls(*a, **kw)
+
+    exam_manager.CurrentQuestionEmbed = failing_embed
+
+    user_client_pool.host, user_client_pool.port = '127.0.0.1', args.port
+    service = start_service(args.port, 0)
+    barrier = threading.Barrier(args.exams)
+    results = [None] * args.exams
+
+    def start_exam(i):
+        state.fail = args.fail_every > 0 and i % args.fail_every == 0
+        barrier.wait()
+        try:
+            results[i] = exam_manager.init_paper('check-user-%d' % i, str(template.id))
+        except InjectedFailure:
+            results[i] = InjectedFailure
+
+    try:
+        threads = [threading.Thread(target=start_exam, args=(i,)) for i in range(args.exams)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        service.terminate()
+        exam_manager.CurrentQuestionEmbed = embed_cls
+
+    failed = False
+    expected_failures = sum(1 for i in range(args.exams) if args.fail_every > 0 and i % args.fail_every == 0)
+    failures = sum(1 for r in results if r is InjectedFailure)
+    exam_ids = [r for r in results if r and r is not InjectedFailure]
+    print("exams: %d, started: %d, failed: %d (expected %d)" % (args.exams, len(exam_ids), failures,
+                                                                 expected_failures))
+    if failures != expected_failures or len(exam_ids) != args.exams - expected_failures:
+        print("FAIL: unexpected exam results")
+        failed = True
+
+    if question_pool._reserved:
+        print("FAIL: reservations left in the question pool: %d" % sum(question_pool._reserved.values()))
+        failed = True
+
+    picks = Counter()
+    for test in CurrentTestModel.objects(id__in=exam_ids):
+        picks.update(q.q_id for q in test.questions.values())
+    db_mismatched = index_mismatched = 0
+    for q in QuestionModel.objects():
+        qid = str(q.id)
+        db_mismatched += q.used_times != picks[qid]
+        index_mismatched += question_pool._index.get(qid, (None, None))[1] != q.used_times
+    if db_mismatched:
+        print("FAIL: %d questions whose used_times in the database differ from the papers" % db_mismatched)
+        failed = True
+    if index_mismatched:
+        print("%s: %d questions whose used_times in the index differ from the database" % (
+            'FAIL' if args.allocation == 'reserve' else 'note', index_mismatched))
+        failed = failed or args.allocation == 'reserve'
+
+    for q_type in sorted(set(PAPER_TYPES)):
+        counts = [count for qid, count in picks.items() if question_pool._index[qid][0] == q_type]
+        ideal = math.ceil(len(exam_ids) * PAPER_TYPES.count(q_type) / args.questions)
+        print("type %d | picks %5d | distinct %4d | max %3d (ideal %d)" % (
+            q_type, sum(counts), len(counts), max(counts or [0]), ideal))
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
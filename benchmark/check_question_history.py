@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 同一用户连续开始两场考试时，第二场考试应避开第一场的题目（题目历史有缓存，组卷后需要使缓存失效）
+# 题库中一半题目使用次数为 0、一半为 100，不考虑题目历史时第二场会再次选中第一场的题目
+# 在本地子进程中启动一个返回空题目历史的替身用户服务；使用 --mongo-db 指定的库（会清空该库，请使用单独的测试库）
+# 第二场考试与第一场有重复题目时返回非 0
+#
+# usage: python -m benchmark.check_question_history --mongo-db expression_check [--slots 4]
+
+import argparse
+import sys
+
+import mongoengine
+
+from benchmark.load_user_client import start_service
+from client import user_client_pool
+from config import MongoConfig
+from manager import exam_manager
+from model.exam import CurrentTestModel
+from model.paper_template import PaperTemplate
+from model.question import QuestionModel
+
+Q_TYPE = 2
+
+
+def paper_questions(exam_id: str) -> set:
+    return set(q.q_id for q in CurrentTestModel.objects(id=exam_id).first().questions.values())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongo-db', required=True, help='scratch database, dropped before the check')
+    parser.add_argument('--slots', type=int, default=4, help='questions per paper')
+    parser.add_argument('--port', type=int, default=19094, help='port of the stand-in user service')
+    args = parser.parse_args()
+
+    connection = mongoengine.connect(db=args.mongo_db, host=MongoConfig.host, port=MongoConfig.port,
+                                     username=MongoConfig.user, password=MongoConfig.password)
+    connection.drop_database(args.mongo_db)
+    for used_times in (0, 100):
+        for i in range(args.slots):
+            QuestionModel(text='question %d' % i, q_type=Q_TYPE, used_times=used_times, index=i).save()
+    template = PaperTemplate(name='check', questions=[{'q_type': Q_TYPE, 'dbid': 0}] * args.slots).save()
+
+    user_client_pool.host, user_client_pool.port = '127.0.0.1', args.port
+    service = start_service(args.port, 0)
+    try:
+        first = paper_questions(exam_manager.init_paper('check-user', str(template.id)))
+        second = paper_questions(exam_manager.init_paper('check-user', str(template.id)))
+    finally:
+        service.terminate()
+
+    repeated = first & second
+    print("first: %d questions, second: %d questions, repeated: %d" % (len(first), len(second), len(repeated)))
+    if repeated:
+        print("FAIL: the second exam reused questions of the first one")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
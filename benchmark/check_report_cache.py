@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 报告缓存只包含已结束的考试：
+#   进行中的考试（题目都未作答时 get_exam_result 会提前计算 score_info）不缓存报告，轮询时也不查询 exam_report_cache；
+#   题目全部处理完、或已超时且没有题目在处理中的考试缓存报告，之后的请求直接命中缓存；
+#   get_exam_results 对刚开始的考试（题目都未作答）逐项返回 InProcessing，不保存成绩
+# 使用 --mongo-db 指定的库（会清空该库，请使用单独的测试库）
+# 任一检查不通过时返回非 0
+#
+# usage: python -m benchmark.check_report_cache --mongo-db expression_check [--questions 3]
+
+import argparse
+import datetime
+import sys
+
+import mongoengine
+
+import service
+from config import MongoConfig
+from errors import InProcessing
+from manager.report_cache import report_cache
+from model.exam import CurrentTestModel, ExamReportCacheModel
+
+Q_TYPE = 2
+
+
+def create_exam(questions: int, status: str, expire_in: datetime.timedelta) -> str:
+    now = datetime.datetime.utcnow()
+    score = {'quality': 80, 'key': 80, 'detail': 80, 'structure': 80, 'logic': 80} if status == 'finished' else {}
+    test = CurrentTestModel(user_id='check-user', test_start_time=now, test_expire_time=now + expire_in,
+                            paper_type=[Q_TYPE] * questions,
+                            questions={str(i + 1): {'q_id': str(i), 'q_type': Q_TYPE, 'status': status,
+                                                    'score': score, 'feature': {}} for i in range(questions)})
+    return str(test.save().id)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mongo-db', required=True, help='scratch database, dropped before the check')
+    parser.add_argument('--questions', type=int, default=3)
+    parser.add_argument('--polls', type=int, default=5)
+    args = parser.parse_args()
+
+    connection = mongoengine.connect(db=args.mongo_db, host=MongoConfig.host, port=MongoConfig.port,
+                                     username=MongoConfig.user, password=MongoConfig.password)
+    connection.drop_database(args.mongo_db)
+
+    # 记录查询 exam_report_cache 的次数
+    persisted_lookups = []
+    lookup = report_cache.lookup
+
+    def counting_lookup(exam_id, persist=True):
+        if persist:
+            persisted_lookups.append(exam_id)
+        return lookup(exam_id, persist)
+
+    report_cache.lookup = counting_lookup
+
+    failed = False
+    in_progress = create_exam(args.questions, 'none', datetime.timedelta(hours=1))
+    finished = create_exam(args.questions, 'finished', datetime.timedelta(hours=1))
+    expired = create_exam(args.questions, 'none', -datetime.timedelta(minutes=1))
+    fresh = create_exam(args.questions, 'none', datetime.timedelta(hours=1))
+
+    items = service.get_exam_results([fresh, finished])
+    fresh_saved = bool(CurrentTestModel.objects(id=fresh).first().score_info)
+    print("batch: fresh exam status: %d, score_info saved: %s; finished exam status: %d" % (
+        items[0].statusCode, fresh_saved, items[1].statusCode))
+    if items[0].statusCode != InProcessing().get_status_code() or fresh_saved:
+        print("FAIL: get_exam_results computed the score of a freshly started exam")
+        failed = True
+    if items[1].statusCode != 0:
+        print("FAIL: get_exam_results did not return the result of the finished exam")
+        failed = True
+
+    for _ in range(args.polls):
+        service.get_exam_result(in_progress)
+        service.get_exam_results([in_progress])
+    early_score = bool(CurrentTestModel.objects(id=in_progress).first().score_info)
+    in_progress_lookups = persisted_lookups.count(in_progress)
+    print("in progress: score_info computed early: %s, exam_report_cache lookups: %d, cached: %s" % (
+        early_score, in_progress_lookups, ExamReportCacheModel.objects(exam_id=in_progress).count() > 0))
+    if ExamReportCacheModel.objects(exam_id=in_progress).count() or report_cache.lookup(in_progress, False):
+        print("FAIL: the report of an exam in progress was cached")
+        failed = True
+    if in_progress_lookups:
+        print("FAIL: polling an exam in progress queried exam_report_cache")
+        failed = True
+
+    for name, exam_id in (('finished', finished), ('expired', expired)):
+        first = service.get_exam_result(exam_id)
+        second = service.get_exam_result(exam_id)
+        cached = ExamReportCacheModel.objects(exam_id=exam_id).count() > 0
+        print("%s: cached: %s, same result: %s" % (name, cached, first == second))
+        if not cached or first != second:
+            print("FAIL: the report of the %s exam was not cached" % name)
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
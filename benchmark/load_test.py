@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 压测：以逐级增加的并发度调用 ExamService，统计各并发度下的吞吐量和 p50/p99 延迟
+#
+# usage:
+#   对已启动的服务压测:
+#       python -m benchmark.load_test --port 9091 --concurrency 1,8,32,128
+#   依次启动各 server 模式并压测（需要能连接数据库）:
+#       python -m benchmark.load_test --spawn threaded,pool --concurrency 1,8,32,128
+#   asyncio 模式只支持 framed transport:
+#       python -m benchmark.load_test --spawn asyncio --framed --concurrency 1,8,32,128,1024
+#   服务端使用 compact protocol 时:
+#       python -m benchmark.load_test --spawn threaded --protocol compact --server-args "--protocol compact"
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from thrift.transport import TSocket, TTransport
+
+from exam import ExamService
+from exam.ttypes import GetPaperTemplateRequest, GetExamReportRequest
+from servers import make_protocol_factory
+
+PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_client(host, port, timeout_ms=10000, framed=False, protocol='binary'):
+    sock = TSocket.TSocket(host, port)
+    sock.setTimeout(timeout_ms)
+    transport = TTransport.TFramedTransport(sock) if framed else TTransport.TBufferedTransport(sock)
+    client = ExamService.Client(make_protocol_factory(protocol).getProtocol(transport))
+    transport.open()
+    return client, transport
+
+
+def make_call(args):
+    if args.exam_id:
+        return lambda client: client.getExamReport(GetExamReportRequest(examId=args.exam_id))
+    return lambda client: client.getPaperTemplate(GetPaperTemplateRequest())
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def run_level(args, concurrency):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    call = make_call(args)
+
+    def worker():
+        local, err = [], 0
+        try:
+            client, transport = make_client(args.host, args.port, framed=args.framed, protocol=args.protocol)
+        except Exception:
+            with lock:
+                errors[0] += args.requests
+            return
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            try:
+                call(client)
+                local.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                err += 1
+                transport.close()
+                time.sleep(0.01)
+                try:
+                    client, transport = make_client(args.host, args.port, framed=args.framed, protocol=args.protocol)
+                except Exception:
+                    pass
+        transport.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += err
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'concurrency': concurrency, 'ok': len(latencies), 'errors': errors[0],
+        'qps': len(latencies) / elapsed if elapsed else 0,
+        'p50': percentile(latencies, 50), 'p99': percentile(latencies, 99),
+    }
+
+
+def wait_port(host, port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _, transport = make_client(host, port, 1000)
+            transport.close()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+def run(args, label):
+    print("== %s ==" % label)
+    print("%11s %8s %7s %9s %9s %9s" % ('concurrency', 'ok', 'errors', 'qps', 'p50(ms)', 'p99(ms)'))
+    for concurrency in args.concurrency:
+        r = run_level(args, concurrency)
+        print("%11d %8d %7d %9.1f %9.2f %9.2f" % (
+            r['concurrency'], r['ok'], r['errors'], r['qps'], r['p50'], r['p99']))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9091)
+    parser.add_argument('--concurrency', type=lambda s: [int(x) for x in s.split(',')], default=[1, 8, 32, 128])
+    parser.add_argument('--requests', type=int, default=200, help='requests per connection')
+    parser.add_argument('--exam-id', default=None, help='call getExamReport with this exam, default getPaperTemplate')
+    parser.add_argument('--framed', action='store_true', help='use TFramedTransport (required by asyncio mode)')
+    parser.add_argument('--protocol', choices=['binary', 'compact'], default='binary')
+    parser.add_argument('--spawn', default=None, help='comma separated server modes to start and test in turn')
+    parser.add_argument('--server-args', default='', help='extra arguments passed to server.py in --spawn mode')
+    args = parser.parse_args()
+
+    if not args.spawn:
+        run(args, "%s:%d" % (args.host, args.port))
+        return
+
+    for mode in args.spawn.split(','):
+        cmd = [sys.executable, os.path.join(PROJECT_FOLDER, 'server.py'), '--mode', mode, '--port', str(args.port)]
+        proc = subprocess.Popen(cmd + args.server_args.split(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_port(args.host, args.port):
+                print("server mode %s failed to start" % mode)
+                continue
+            run(args, "mode=%s" % mode)
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
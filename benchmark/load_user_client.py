@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 用户服务客户端的并发压测：在本地子进程中启动一个替身用户服务，--threads 个线程并发调用 getUserInfo
+# 每个响应都校验是否对应本次请求的 userId（共用一个连接时响应会串到其他线程）
+# --restart 在压测进行到一半时重启替身服务（重启期间的调用按退避快速失败），之后再压测一轮，检验连接池重新连接
+# 压测前先检查空闲连接的健康检查：健康的连接 alive() 应在 1ms 内返回 True（不能等待到读超时），
+# 以及调用超时不重试：对响应慢于超时的替身服务（--port + 1）调用应只尝试一次，否则返回非 0
+#
+# usage: python -m benchmark.load_user_client [--threads 200] [--calls 20] [--pool-size 16] [--delay 2]
+#                                             [--restart]
+
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+
+from thriftpy2.rpc import make_server
+
+from client import user_thrift
+from client_pool import ClientPool, PooledClient
+
+
+class StandInUserService(object):
+    def __init__(self, delay):
+        self.delay = delay
+
+    def getUserInfo(self, request):
+        if self.delay:
+            time.sleep(self.delay)
+        return user_thrift.GetUserInfoResponse(
+            userInfo=user_thrift.UserInfo(questionHistory=[request.userId]), statusCode=0, statusMsg='')
+
+
+def serve(port, delay):
+    make_server(user_thrift.UserService, StandInUserService(delay), '127.0.0.1', port).serve()
+
+
+def start_service(port, delay):
+    process = multiprocessing.get_context('fork').Process(target=serve, args=(port, delay), daemon=True)
+    process.start()
+    time.sleep(0.3)
+    return process
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else 0
+
+
+def run(client, threads, calls, on_half=None):
+    """threads 个线程各调用 calls 次，返回 (成功数, 响应错乱数, 异常数, 各次耗时, 总耗时)"""
+    barrier = threading.Barrier(threads)
+    lock = threading.Lock()
+    result = {'ok': 0, 'mismatch': 0, 'error': 0}
+    latencies = []
+    done = [0]
+    half = threads * calls // 2
+    callbacks = []
+
+    def worker(i):
+        barrier.wait()
+        for j in range(calls):
+            user_id = 'user-%d-%d' % (i, j)
+            start = time.perf_counter()
+            try:
+                resp = client.getUserInfo(user_thrift.GetUserInfoRequest(userId=user_id))
+                key = 'ok' if resp.userInfo.questionHistory == [user_id] else 'mismatch'
+            except Exception:
+                key = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                result[key] += 1
+                latencies.append(elapsed)
+                done[0] += 1
+                if done[0] == half and on_half:
+                    callbacks.append(threading.Thread(target=on_half))
+                    callbacks[-1].start()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    for thread in callbacks:
+        thread.join()
+    return result, latencies, time.perf_counter() - start
+
+
+def check_health(pool) -> bool:
+    """借出一个连接并调用一次，归还后对这个空闲连接做健康检查，返回是否符合预期"""
+    with pool.connection() as client:
+        client.getUserInfo(user_thrift.GetUserInfoRequest(userId='health-check'))
+    conn = pool._idle[-1]
+    start = time.perf_counter()
+    alive = conn.alive()
+    elapsed = time.perf_counter() - start
+    ok = alive and elapsed < 0.001
+    print("health check: alive=%s in %.3f ms (socket timeout %.1fs) %s" % (
+        alive, elapsed * 1000, conn.sock.sock.gettimeout(), 'OK' if ok else 'FAIL'))
+    return ok
+
+
+def check_timeout(port) -> bool:
+    """对响应慢于调用超时的替身服务调用一次，应抛出超时且不重试，返回是否符合预期"""
+    service = start_service(port, 0.5)
+    try:
+        pool = ClientPool(user_thrift.UserService, '127.0.0.1', port, retries=1)
+        start = time.perf_counter()
+        try:
+            pool.call('getUserInfo', user_thrift.GetUserInfoRequest(userId='timeout-check'), timeout=0.1)
+            error = None
+        except Exception as e:
+            error = e
+        elapsed = time.perf_counter() - start
+        stats = pool.stats()
+    finally:
+        service.terminate()
+    ok = error is not None and stats.get('timeouts') == 1 and not stats.get('retries') and stats.get('created') == 1
+    print("timeout check: %r in %.3f s, timeouts=%s, retries=%s, connections=%s %s" % (
+        error, elapsed, stats.get('timeouts', 0), stats.get('retries', 0), stats.get('created', 0),
+        'OK' if ok else 'FAIL'))
+    return ok
+
+
+def report(name, result, latencies, elapsed):
+    print("%-7s calls %6d | ok %6d | mismatch %5d | error %5d | %7.0f calls/s | p50 %6.2f ms | p99 %7.2f ms" % (
+        name, len(latencies), result['ok'], result['mismatch'], result['error'], len(latencies) / elapsed,
+        percentile(latencies, 0.5) * 1000, percentile(latencies, 0.99) * 1000))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--calls', type=int, default=20, help='calls per thread')
+    parser.add_argument('--pool-size', type=int, default=16)
+    parser.add_argument('--delay', type=float, default=2, help='stand-in service latency in ms')
+    parser.add_argument('--port', type=int, default=19092)
+    parser.add_argument('--restart', action='store_true', help='restart the stand-in service halfway')
+    args = parser.parse_args()
+
+    service = [start_service(args.port, args.delay / 1000)]
+
+    def restart():
+        service[0].terminate()
+        service[0].join()
+        time.sleep(0.5)
+        service[0] = start_service(args.port, args.delay / 1000)
+
+    try:
+        pool = ClientPool(user_thrift.UserService, '127.0.0.1', args.port, size=args.pool_size,
+                          checkout_timeout=10, backoff_base=0.1, backoff_max=1)
+        if not check_health(pool) or not check_timeout(args.port + 1):
+            sys.exit(1)
+        result, latencies, elapsed = run(PooledClient(pool), args.threads, args.calls,
+                                         restart if args.restart else None)
+        report('pool', result, latencies, elapsed)
+        if args.restart:
+            time.sleep(pool.backoff_max)
+            result, latencies, elapsed = run(PooledClient(pool), args.threads, args.calls)
+            report('after', result, latencies, elapsed)
+        print("pool stats: %s" % ', '.join('%s=%s' % (k, round(v, 3)) for k, v in sorted(pool.stats().items())))
+        pool.close()
+    finally:
+        service[0].terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,13 @@
-import thriftpy2
-from thriftpy2.rpc import make_client
+from client_pool import ClientPool, PooledClient
+from config import UserServiceConfig
+from thrift_idl import load_user_thrift
 
-user_thrift = thriftpy2.load("https://raw.githubusercontent.com/llf-970310/expression-api/master/thrift_idl/user.thrift", module_name="user_thrift")
-user_client = make_client(user_thrift.UserService, '81.68.117.198', 9092)
+user_thrift = load_user_thrift()  # 本地的 thrift_idl/user.thrift，不在启动时访问网络
+user_client_pool = ClientPool(user_thrift.UserService, UserServiceConfig.host, UserServiceConfig.port,
+                              size=UserServiceConfig.pool_size, timeout=UserServiceConfig.timeout,
+                              connect_timeout=UserServiceConfig.connect_timeout,
+                              checkout_timeout=UserServiceConfig.checkout_timeout,
+                              health_check_interval=UserServiceConfig.health_check_interval,
+                              retries=UserServiceConfig.retries, backoff_base=UserServiceConfig.backoff_base,
+                              backoff_max=UserServiceConfig.backoff_max, name='user-service')
+user_client = PooledClient(user_client_pool)  # 线程安全，每次调用借出连接池中的一个连接
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# thriftpy2 客户端连接池：多个线程并发调用时各自借出一个连接，用完归还
+#
+# 连接在首次需要时才建立，空闲超过 health_check_interval 的连接借出前检查对端是否已关闭；
+# 调用出现传输错误的连接直接丢弃（响应可能还在路上，不能再复用），连接失败后按指数退避时间内不再重试连接
+
+import collections
+import contextlib
+import functools
+import logging
+import socket
+import threading
+import time
+
+from thriftpy2.protocol import TBinaryProtocolFactory
+from thriftpy2.thrift import TClient, TException
+from thriftpy2.transport import TBufferedTransportFactory, TSocket, TTransportException
+
+try:
+    from thriftpy2.protocol import TCyBinaryProtocolFactory as TBinaryProtocolFactory
+    from thriftpy2.transport import TCyBufferedTransportFactory as TBufferedTransportFactory
+except ImportError:  # 没有 cython 扩展
+    pass
+
+# 出现以下错误时连接状态未知，丢弃该连接
+_BROKEN_ERRORS = (TTransportException, EOFError, OSError)
+
+
+class PoolTimeout(TTransportException):
+    """等待空闲连接超时"""
+
+
+def _is_timeout(e: BaseException) -> bool:
+    """调用的读写超时：socket.timeout，或被包装为 TIMED_OUT 的 TTransportException（部分 thriftpy2 版本和传输层，inner 为原始异常）"""
+    if isinstance(e, socket.timeout):
+        return True
+    return isinstance(e, TTransportException) and not isinstance(e, PoolTimeout) and (
+        e.type == TTransportException.TIMED_OUT or isinstance(getattr(e, 'inner', None), socket.timeout))
+
+
+class _Connection(object):
+    def __init__(self, client: TClient, sock: TSocket, transport):
+        self.client = client
+        self.sock = sock
+        self.transport = transport
+        self.last_used = time.time()
+
+    def alive(self) -> bool:
+        """对端是否仍保持连接：非阻塞地窥探一个字节，可读到数据或 EOF 都说明连接不可复用"""
+        sock = self.sock.sock
+        if sock is None:
+            return False
+        # 带超时的 socket 上 MSG_DONTWAIT 不生效（CPython 会先等待到超时），窥探时临时切换为非阻塞
+        timeout = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            sock.recv(1, socket.MSG_PEEK)  # 读到数据（上次调用残留的响应）或 b''（对端已关闭）
+            return False
+        except (BlockingIOError, InterruptedError):  # 没有可读的数据，连接正常
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    def close(self):
+        try:
+            self.transport.close()
+        except Exception:
+            pass
+
+
+class ClientPool(object):
+    """
+    service: thriftpy2.load 得到的 service
+    size: 最大连接数，连接都被借出时等待 checkout_timeout 秒，超时抛出 PoolTimeout
+    timeout: 每次调用的默认读写超时(秒)，connect_timeout: 建立连接的超时(秒)
+    retries: 复用的连接出现传输错误（如对端已关闭空闲连接）时，换新连接重试的次数，只应用于幂等的调用
+    backoff_base/backoff_max: 连续连接失败时，下次尝试连接前的等待时间为 base * 2^(失败次数-1)，不超过 max
+    """
+
+    def __init__(self, service, host: str, port: int, size: int = 16, timeout: float = 3, connect_timeout: float = 1,
+                 checkout_timeout: float = 5, health_check_interval: float = 30, retries: int = 1,
+                 backoff_base: float = 0.5, backoff_max: float = 30, name: str = None):
+        self.service = service
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.name = name or '%s:%s' % (host, port)
+
+        self._idle = collections.deque()  # 后进先出，优先复用最近使用的连接，多余的连接自然空闲到被对端关闭
+        self._total = 0  # 已建立和正在建立的连接数
+        self._cond = threading.Condition(threading.Lock())
+        self._failures = 0
+        self._retry_at = 0
+        self.metrics = collections.Counter()
+
+    def _open(self) -> _Connection:
+        now = time.time()
+        if now < self._retry_at:
+            raise TTransportException(TTransportException.NOT_OPEN,
+                                      "%s unavailable, retry in %.1fs" % (self.name, self._retry_at - now))
+        sock = TSocket(self.host, self.port, socket_timeout=self.timeout * 1000,
+                       connect_timeout=self.connect_timeout * 1000)
+        transport = TBufferedTransportFactory().get_transport(sock)
+        try:
+            transport.open()
+        except TTransportException:
+            with self._cond:
+                self._failures += 1
+                self._retry_at = time.time() + min(self.backoff_base * 2 ** (self._failures - 1), self.backoff_max)
+                self.metrics['connect_failures'] += 1
+            logging.warning("[ClientPool._open] connect to %s failed %d times, retry after %.1fs" % (
+                self.name, self._failures, self._retry_at - time.time()))
+            raise
+        with self._cond:
+            self._failures = 0
+            self._retry_at = 0
+            self.metrics['created'] += 1
+        protocol = TBinaryProtocolFactory().get_protocol(transport)
+        return _Connection(TClient(self.service, protocol), sock, transport)
+
+    def _checkout(self) -> _Connection:
+        retry = False
+        while True:
+            conn = self._checkout_idle(count=not retry)
+            if conn is None:
+                break
+            # 健康检查在锁外进行，不阻塞其他线程借还连接
+            if time.time() - conn.last_used < self.health_check_interval or conn.alive():
+                return conn
+            self._count('health_check_failures')
+            self._discard(conn)
+            retry = True
+        try:
+            return self._open()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _checkout_idle(self, count: bool = True) -> _Connection:
+        """取出一个空闲连接；没有空闲连接且未达到 size 时占用一个新连接的名额并返回 None"""
+        deadline = None
+        with self._cond:
+            if count:
+                self.metrics['checkouts'] += 1
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._total < self.size:
+                    self._total += 1
+                    return None
+                if deadline is None:
+                    deadline = time.time() + self.checkout_timeout
+                    self.metrics['checkout_waits'] += 1
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.metrics['checkout_timeouts'] += 1
+                    raise PoolTimeout(TTransportException.TIMED_OUT, "%s pool exhausted" % self.name)
+                self._cond.wait(remaining)
+
+    def _checkin(self, conn: _Connection, reset_timeout: bool = False):
+        if reset_timeout:
+            conn.sock.set_timeout(self.timeout * 1000)
+        conn.last_used = time.time()
+        with self._cond:
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def _discard_locked(self, conn: _Connection):
+        conn.close()
+        self._total -= 1
+        self.metrics['closed'] += 1
+        self._cond.notify()
+
+    def _discard(self, conn: _Connection):
+        with self._cond:
+            self._discard_locked(conn)
+
+    def _count(self, key: str, value=1):
+        with self._cond:
+            self.metrics[key] += value
+
+    @contextlib.contextmanager
+    def connection(self, timeout: float = None):
+        """借出一个连接的 TClient，timeout 为本次使用的读写超时(秒)；出现传输错误时连接被丢弃"""
+        conn = self._checkout()
+        if timeout is not None:
+            conn.sock.set_timeout(timeout * 1000)
+        try:
+            yield conn.client
+        except BaseException as e:
+            # 服务端声明的异常和 TApplicationException 不影响连接，传输错误和其余异常（如 KeyboardInterrupt）时丢弃
+            if isinstance(e, TException) and not isinstance(e, _BROKEN_ERRORS):
+                self._checkin(conn, timeout is not None)
+            else:
+                self._discard(conn)
+            raise
+        self._checkin(conn, timeout is not None)
+
+    def call(self, method: str, *args, timeout: float = None, **kwargs):
+        """调用 service 的一个方法；传输错误时（超时除外）换新连接重试 retries 次"""
+        attempt = 0
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    with self.connection(timeout) as client:
+                        return getattr(client, method)(*args, **kwargs)
+                except _BROKEN_ERRORS as e:
+                    self._count('errors')
+                    if _is_timeout(e):  # 服务端可能仍在处理，重试会使负载加倍
+                        self._count('timeouts')
+                        raise
+                    if attempt >= self.retries or isinstance(e, PoolTimeout) or time.time() < self._retry_at:
+                        raise
+                    attempt += 1
+                    self._count('retries')
+                    logging.info("[ClientPool.call] %s.%s failed, retrying. exception: %s" % (
+                        self.name, method, repr(e)))
+        finally:
+            with self._cond:
+                self.metrics['calls'] += 1
+                self.metrics['call_seconds'] += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        """连接池状态和累计指标"""
+        with self._cond:
+            stats = dict(self.metrics)
+            stats.update(size=self.size, open=self._total, idle=len(self._idle), in_use=self._total - len(self._idle))
+        return stats
+
+    def close(self):
+        """关闭所有空闲连接（借出的连接归还后仍可继续使用）"""
+        with self._cond:
+            while self._idle:
+                self._discard_locked(self._idle.pop())
+
+
+class PooledClient(object):
+    """像 TClient 一样调用 service 的方法，每次调用从连接池借出连接，可额外传入 timeout(秒)"""
+
+    def __init__(self, pool: ClientPool):
+        self.pool = pool
+
+    def __getattr__(self, method: str):
+        if method not in self.pool.service.thrift_services:
+            raise AttributeError(method)
+        return functools.partial(self.pool.call, method)
@@ -21,6 +21,39 @@ class ReportConfig(object):
     }
 
 
+class ServerConfig:
+    host = '0.0.0.0'
+    port = 9091
+    # threaded: 每个连接一个线程; pool: 固定大小线程池 + 有界等待队列
+    # asyncio: 单线程事件循环（仅支持 TFramedTransport），部分接口使用异步 Mongo 驱动，其余接口在线程池中执行
+    mode = 'threaded'
+    transport = None  # buffered | framed，None 表示 asyncio 模式使用 framed，其余模式使用 buffered（调用方需一致）
+    protocol = 'binary'  # binary | compact（调用方需一致），thrift C 扩展可用时自动使用加速实现
+    pool_size = 32  # pool 模式的工作线程数 / asyncio 模式执行同步接口的线程数
+    queue_size = 64  # pool 模式等待工作线程的连接数上限
+    reject_policy = 'block'  # 等待队列满时: block 阻塞 accept; close 直接关闭新连接
+    client_timeout = None  # pool 模式下连接的读写超时(秒)，None 表示不超时
+    # 注意：pool 模式下一个连接在关闭前独占一个工作线程，调用方长连接数应小于 pool_size
+    workers = 1  # worker 进程数，大于 1 时以 pre-fork 方式启动多个进程
+    share_mode = 'reuseport'  # 多进程共享端口的方式: reuseport 各自以 SO_REUSEPORT 监听; shared 共用 fork 前创建的 socket
+    graceful_timeout = 30  # worker 退出时等待进行中请求的最长时间(秒)
+    # Prometheus 指标的 HTTP 端口（GET /metrics），None 表示不开启；多进程时各 worker 使用 metrics_port + worker 序号
+    # （见 PreforkLauncher.worker_index，滚动重启期间新旧 worker 同时存在，会用到更大的序号）
+    metrics_port = 9191
+
+
+class LogConfig:
+    level = 'INFO'  # 根 logger 的级别
+    async_handler = True  # 调用线程只把日志记录放入队列，由后台线程格式化和输出
+    queue_size = 10000  # 队列满时丢弃新的日志记录（不阻塞请求），丢弃数见 util.dropped_log_records
+    # 访问日志（util.func_log），每次调用一行 JSON：method/duration_ms/status_code/error/args/response
+    access_log = True
+    access_payload_limit = 1024  # args/response 的 repr 最多保留的字符数，0 表示不记录 args/response
+    access_sample_rate = 1.0  # 成功调用（无异常且 statusCode 为 0）的采样率，异常、错误码和慢调用总是记录
+    access_sample_rates = {}  # 按方法（handler 函数名）设置的采样率，如 {'get_exam_report': 0.1}
+    access_slow_ms = 1000  # 耗时超过该值(毫秒)的调用以 WARNING 级别记录
+
+
 class MongoConfig:
     host = 'mongo-server.expression.hosts'
     port = 27017
@@ -28,6 +61,20 @@ class MongoConfig:
     user = 'iselab'
     password = 'iselab###nju.cn'
     db = 'expression'
+    ensure_indexes = True  # 服务启动时创建各集合声明的索引
+
+
+class UserServiceConfig:
+    host = '81.68.117.198'
+    port = 9092
+    pool_size = 16  # 连接池最大连接数，连接在首次使用时建立
+    timeout = 3  # 每次调用的读写超时(秒)
+    connect_timeout = 1  # 建立连接的超时(秒)
+    checkout_timeout = 5  # 连接都被占用时等待空闲连接的最长时间(秒)
+    health_check_interval = 30  # 空闲超过该时间(秒)的连接在使用前检查是否已被对端关闭
+    retries = 1  # 复用的连接出现传输错误时换新连接重试的次数（getUserInfo 为只读调用）
+    backoff_base = 0.5  # 连接失败后重连的等待时间(秒)，连续失败时指数增长
+    backoff_max = 30
 
 
 class ExamConfig:
@@ -54,10 +101,36 @@ class ExamConfig:
             "tip": "你有2分钟的时间准备，并有2分钟时间复述"}
     }
 
+    # score config
+    # 各题型计入的成绩维度（未列出的题型不能计算成绩）
+    score_dimensions = {1: ['quality'], 2: ['key', 'detail'], 3: ['structure', 'logic'], 4: [],
+                        5: ['key', 'detail'], 6: ['key', 'detail']}
+    # 各维度平均分在总成绩中的权重，按此顺序累加
+    score_weights = {'quality': 0.3, 'key': 0.35, 'detail': 0.15, 'structure': 0.1, 'logic': 0.1}
+    rescore_batch_size = 5000  # 批量重算成绩时每批处理的考试数
+    rescore_workers = 4  # 批量重算成绩的并行进程数
+    rescore_report_interval = 10  # 批量重算成绩时输出进度的间隔(秒)
+
     # question config
     question_limit_time = {0: 15, 1: 60, 2: 30, 3: 120, 4: 0, 5: 60, 6: 120, 7: 120}
     question_prepare_time = {0: 5, 1: 5, 2: 60, 3: 60, 4: 0, 5: 120, 6: 240, 7: 120}
     detect_left_exam = True  # 是否断点续作
+    max_question_num = 20  # 试卷最大题目数，用于构造读取考试时的字段投影
+    question_pool_refresh_interval = 60  # 进程内题库索引的刷新间隔(秒)
+    user_history_cache_ttl = 10  # 用户做题历史的缓存时间(秒)
+    user_history_cache_size = 10000  # 缓存的用户数上限，超过时淘汰最早写入的项
+    # 并发选题时题目的占用方式：
+    # reserve: 选题的同时在进程内题库索引上累加使用次数，同一进程内同时开始的考试会分散到不同题目
+    # atomic: 每道题用 find_one_and_update 在数据库中原子地选取并累加使用次数，多进程/多实例之间也不会重复选中
+    question_allocation = 'reserve'
+    used_times_write_behind = False  # 是否在内存中累计题目使用次数，定时批量写入数据库
+    used_times_flush_interval = 5  # write-behind 模式下的写入间隔(秒)
+    template_cache_check_interval = 5  # 检查试卷模板缓存版本号的间隔(秒)
+    archived_exam_cache_size = 100000  # 记录已归档考试 id 的最大数量
+    report_cache_size = 10000  # 进程内缓存的考试报告数量
+    batch_max_exams = 200  # getExamResults/computeExamScores 单次请求的最大考试数
+    exam_record_page_max = 100  # getExamRecord 分页模式单页的最大记录数，limit 超过时按该值返回
+    exam_record_from_summary = False  # 是否从 exam_summary 获取考试记录，开启前需执行 python manage.py rebuild-summary
 
     # storage config
     audio_save_basedir = 'audio'
@@ -1,9 +1,6 @@
-import time
-
-import jwt
-
 from exam.ttypes import *
 import service
+from config import ExamConfig
 from errors import *
 from util import func_log
 
@@ -56,7 +53,16 @@ def get_exam_record(request: GetExamRecordRequest) -> GetExamRecordResponse:
         return resp
 
     try:
-        record_list = service.get_exam_record(user_id, template_id)
+        if request.limit:  # 分页模式
+            if request.limit < 0:
+                fill_status_of_resp(resp, InvalidParam())
+                return resp
+            limit = min(request.limit, ExamConfig.exam_record_page_max)
+            record_list, next_cursor = service.get_exam_record_page(
+                user_id, template_id, request.cursor, limit, request.startTime, request.endTime)
+            resp.nextCursor = next_cursor
+        else:
+            record_list = service.get_exam_record(user_id, template_id)
         resp.examList = record_list
         fill_status_of_resp(resp)
     except ErrorWithCode as e:
@@ -219,3 +225,39 @@ def save_paper_template(request: SavePaperTemplateRequest) -> SavePaperTemplateR
         fill_status_of_resp(resp, e)
 
     return resp
+
+
+@func_log
+def get_exam_results(request: GetExamResultsRequest) -> GetExamResultsResponse:
+    resp = GetExamResultsResponse(results=[])
+    exam_ids = request.examIds
+
+    if exam_ids is None:
+        fill_status_of_resp(resp, InvalidParam())
+        return resp
+
+    try:
+        resp.results = service.get_exam_results(exam_ids)
+        fill_status_of_resp(resp)
+    except ErrorWithCode as e:
+        fill_status_of_resp(resp, e)
+
+    return resp
+
+
+@func_log
+def compute_exam_scores(request: ComputeExamScoresRequest) -> ComputeExamScoresResponse:
+    resp = ComputeExamScoresResponse(results=[])
+    exam_ids = request.examIds
+
+    if exam_ids is None:
+        fill_status_of_resp(resp, InvalidParam())
+        return resp
+
+    try:
+        resp.results = service.compute_exam_scores(exam_ids)
+        fill_status_of_resp(resp)
+    except ErrorWithCode as e:
+        fill_status_of_resp(resp, e)
+
+    return resp
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 运维命令行工具
+#
+# usage: python manage.py <command> [options]
+#   rebuild-summary [--user USER_ID]    根据 current/history 重建 exam_summary
+#   ensure-indexes                      创建各集合声明的索引
+#   verify-indexes                      explain() 各查询形态，出现 COLLSCAN 时返回非 0
+#   rescore [--collection history] [--workers N] [--job-id ID] [--restart] [--dry-run]
+#                                       按当前成绩规则重算 history/current 中考试的成绩，中断后重新执行会从断点继续
+#   fetch-idl [--if-missing]            下载依赖服务的 thrift IDL 到 thrift_idl/（更新接口或构建镜像时执行，之后提交该文件）
+#
+# 可通过 --mongo-host/--mongo-port/--no-auth 连接其他 mongod（如本地测试库）
+
+import os
+import sys
+
+project_folder = os.path.abspath(__file__).split('/manage.py')[0]
+sys.path.append(os.path.join(project_folder, 'gen-py'))
+
+import argparse
+import logging
+
+from config import ExamConfig, MongoConfig
+from model import connect_db
+
+
+def rebuild_summary(args):
+    from manager import summary_manager
+    count = summary_manager.rebuild(args.user, args.batch_size)
+    print("exam summary rebuilt, %d exams" % count)
+
+
+def ensure_indexes(args):
+    from model.indexes import ensure_indexes
+    ensure_indexes()
+    print("indexes ensured")
+
+
+def verify_indexes(args):
+    from model.indexes import ensure_indexes, verify_indexes
+    if args.ensure:
+        ensure_indexes()
+    failed = 0
+    for name, stages in verify_indexes():
+        ok = 'COLLSCAN' not in stages
+        failed += not ok
+        print("%-4s %-32s %s" % ('OK' if ok else 'FAIL', name, ' <- '.join(stages)))
+    if failed:
+        print("%d query shapes use COLLSCAN" % failed)
+        sys.exit(1)
+
+
+def rescore(args):
+    from manager import rescore_manager
+    stats = rescore_manager.rescore(args.collection or list(rescore_manager.COLLECTIONS), args.job_id, args.batch_size,
+                                    args.workers, args.user, args.dry_run, args.restart)
+    for name, counts in stats.items():
+        print("%-8s scanned: %d, %s: %d, skipped: %d, failed: %d" % (
+            name, counts['scanned'], 'would change' if args.dry_run else 'changed', counts['changed'],
+            counts['skipped'], counts['failed']))
+
+
+def fetch_idl(args):
+    import thrift_idl
+    if args.if_missing and os.path.exists(thrift_idl.USER_THRIFT_PATH):
+        print("%s already exists" % thrift_idl.USER_THRIFT_PATH)
+        return
+    thrift_idl.fetch(args.url or thrift_idl.USER_THRIFT_URL, thrift_idl.USER_THRIFT_PATH)
+    thrift_idl.load_user_thrift()  # 确认下载的 IDL 可以解析
+    print("%s updated" % thrift_idl.USER_THRIFT_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='expression-exam management commands')
+    parser.add_argument('--mongo-host', default=None, help='override MongoConfig.host')
+    parser.add_argument('--mongo-port', type=int, default=None, help='override MongoConfig.port')
+    parser.add_argument('--no-auth', action='store_true', help='connect without username/password')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    p = subparsers.add_parser('rebuild-summary', help='rebuild exam_summary from current/history')
+    p.add_argument('--user', default=None, help='only rebuild exams of this user')
+    p.add_argument('--batch-size', type=int, default=1000)
+    p.set_defaults(func=rebuild_summary)
+
+    p = subparsers.add_parser('ensure-indexes', help='create declared indexes')
+    p.set_defaults(func=ensure_indexes)
+
+    p = subparsers.add_parser('verify-indexes', help='explain() every query shape and fail on COLLSCAN')
+    p.add_argument('--ensure', action='store_true', help='ensure indexes before verifying')
+    p.set_defaults(func=verify_indexes)
+
+    p = subparsers.add_parser('rescore', help='recompute score_info of exams in batches, resumable')
+    p.add_argument('--collection', action='append', choices=['history', 'current'],
+                   help='collections to rescore (repeatable), default: history and current')
+    p.add_argument('--job-id', default=None, help='checkpoint name, default: derived from score weights and --user')
+    p.add_argument('--restart', action='store_true', help='ignore the existing checkpoint of this job')
+    p.add_argument('--user', default=None, help='only rescore exams of this user')
+    p.add_argument('--batch-size', type=int, default=ExamConfig.rescore_batch_size)
+    p.add_argument('--workers', type=int, default=ExamConfig.rescore_workers, help='number of worker processes')
+    p.add_argument('--dry-run', action='store_true', help='only count exams whose score would change')
+    p.set_defaults(func=rescore)
+
+    p = subparsers.add_parser('fetch-idl', help='download thrift IDL of the user service into thrift_idl/')
+    p.add_argument('--url', default=None, help='default: thrift_idl.USER_THRIFT_URL')
+    p.add_argument('--if-missing', action='store_true', help='do nothing if the IDL is already vendored')
+    p.set_defaults(func=fetch_idl)
+
+    args = parser.parse_args()
+    if args.mongo_host:
+        MongoConfig.host = args.mongo_host
+    if args.mongo_port:
+        MongoConfig.port = args.mongo_port
+    if args.no_auth:
+        MongoConfig.user = MongoConfig.password = None
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s",
+                        datefmt="%Y/%m/%d %H:%M:%S")
+    connect_db()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
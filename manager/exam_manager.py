@@ -1,27 +1,137 @@
 import datetime
+import heapq
 import logging
 import random
+import threading
 import time
+from collections import OrderedDict
 from typing import Union
 
+from bson import ObjectId
+from pymongo import UpdateOne
+
 import util
-from client import user_client, user_thrift
 from config import ReportConfig, ExamConfig
-from errors import InternalError, InProcessing
+from errors import InProcessing
 from exam.ttypes import ExamScore, ExamType
+from manager import summary_manager, user_manager
+from manager.question_pool import question_pool, is_question_id, allocate, commit_allocation, rollback_allocation
+from manager.template_cache import template_cache
+from model.aio import get_async_collection
 from model.exam import CurrentTestModel, HistoryTestModel, CurrentQuestionEmbed
-from model.paper_template import PaperTemplate
 from model.question import QuestionModel
 
 
-# 先从 current 中找，current 不存在到 history 中找
-def get_exam_by_id(test_id):
-    test = CurrentTestModel.objects(id=test_id).first()
+# 已归档到 history 的考试 id（考试只会从 current 移到 history，不会移回），命中时只需查一次 history
+_archived_exam_ids = OrderedDict()
+_archived_lock = threading.Lock()
+# archived_hit: 命中已归档记录(1次查询)  current_hit: current 中找到(1次查询)
+# archived_miss: 首次查到已归档考试(2次查询)  not_found: 两个集合都不存在(2次查询)
+_exam_lookup_stats = {'archived_hit': 0, 'current_hit': 0, 'archived_miss': 0, 'not_found': 0}
+
+
+def _count_exam_lookup(key: str, archived_id: str = None):
+    with _archived_lock:
+        _exam_lookup_stats[key] += 1
+        if archived_id:
+            _archived_exam_ids[archived_id] = True
+            if len(_archived_exam_ids) > ExamConfig.archived_exam_cache_size:
+                _archived_exam_ids.popitem(last=False)
+
+
+def get_exam_lookup_stats() -> dict:
+    with _archived_lock:
+        return dict(_exam_lookup_stats, archived_cached=len(_archived_exam_ids))
+
+
+def _question_fields(*fields) -> list:
+    return ['questions.%d.%s' % (i, f) for i in range(1, ExamConfig.max_question_num + 1) for f in fields]
+
+
+# 读取考试时的字段投影 {profile: (投影方式, 字段列表)}，避免每次都取出全部题目正文、feature 和 stack
+EXAM_READ_PROFILES = {
+    # 只用到 score_info 和各题 status/score
+    'score': ('exclude', _question_fields('q_text', 'feature', 'stack', 'wav_upload_url', 'wav_temp_url')),
+    # 生成报告还需要各题 feature
+    'report': ('exclude', _question_fields('q_text', 'stack', 'wav_upload_url', 'wav_temp_url')),
+    # 校验已缓存报告的成绩版本
+    'score_info': ('only', ['score_info']),
+}
+
+
+def exam_projection(profile: str, question_num: int = None) -> (str, list):
+    """
+    返回读取考试时使用的投影方式('only'|'exclude')和字段列表
+
+    profile 为 'question' 时只取第 question_num 题，以及用于判断是否为最后一题的下一题题型
+    """
+    if profile == 'question':
+        return 'only', ['questions.%d' % question_num, 'questions.%d.q_type' % (question_num + 1),
+                        'user_id', 'paper_type', 'test_start_time', 'test_expire_time', 'current_q_num']
+    return EXAM_READ_PROFILES[profile]
+
+
+def _with_projection(queryset, profile: str = None, question_num: int = None):
+    if profile is None:
+        return queryset
+    mode, fields = exam_projection(profile, question_num)
+    return getattr(queryset, mode)(*fields)
+
+
+# 先从 current 中找，current 不存在到 history 中找；已知归档的考试直接到 history 中找
+# profile 指定读取的字段，见 EXAM_READ_PROFILES，按 profile 读出的考试只能用 save() 保存修改过的字段
+def get_exam_by_id(test_id, profile: str = None):
+    with _archived_lock:
+        archived = test_id in _archived_exam_ids
+        if archived:
+            _archived_exam_ids.move_to_end(test_id)
+    if archived:
+        _count_exam_lookup('archived_hit')
+        return _with_projection(HistoryTestModel.objects(current_id=test_id), profile).first()
+
+    test = _with_projection(CurrentTestModel.objects(id=test_id), profile).first()
+    if test is not None:
+        _count_exam_lookup('current_hit')
+        return test
+
+    test = _with_projection(HistoryTestModel.objects(current_id=test_id), profile).first()
     if test is None:
-        test = HistoryTestModel.objects(current_id=test_id).first()
+        _count_exam_lookup('not_found')
+    else:
+        _count_exam_lookup('archived_miss', test_id)
     return test
 
 
+# 批量读取考试：current 和 history 各一次 $in 查询，返回 {test_id: test}，不存在的 id 不在结果中
+# test_ids 须为合法的 ObjectId 字符串
+def get_exams_by_ids(test_ids: list, profile: str = None) -> dict:
+    tests = {}
+    if not test_ids:
+        return tests
+    for test in _with_projection(CurrentTestModel.objects(id__in=test_ids), profile):
+        tests[str(test.id)] = test
+
+    missing = [test_id for test_id in test_ids if test_id not in tests]
+    if missing:
+        for test in _with_projection(HistoryTestModel.objects(current_id__in=missing), profile):
+            tests[test.current_id] = test
+            _count_exam_lookup('archived_miss', test.current_id)
+    return tests
+
+
+# 批量写回新计算的 score_info：每个集合一次无序 bulk_write，摘要同样批量更新
+def save_exam_scores(tests: list):
+    if not tests:
+        return
+    requests = {CurrentTestModel: [], HistoryTestModel: []}
+    for test in tests:
+        requests[type(test)].append(UpdateOne({'_id': test.pk}, {'$set': {'score_info': test['score_info']}}))
+    for model, model_requests in requests.items():
+        if model_requests:
+            model._get_collection().bulk_write(model_requests, ordered=False)
+    summary_manager.update_scores({get_exam_id(test): test['score_info'] for test in tests})
+
+
 # 筛选出 score 和 feature 中的有用数据
 def get_score_and_feature(question_list):
     score = {}  # {1:{'quality': 80}, 2:{'key':100,'detail':xx}, ...}
@@ -77,30 +187,81 @@ def question_all_finished(question_dict) -> bool:
     return True
 
 
+# 考试是否已结束（成绩和报告不再变化）：已归档，或题目全部处理完，或已超时且没有题目在处理中
+# 题目全部未作答时 get_score_and_feature 也会返回完整的 score，不能据此判断；test 可以是 as_pymongo() 取出的 dict
+def exam_finished(test, is_history: bool = None, now: datetime.datetime = None) -> bool:
+    if is_history is None:
+        is_history = isinstance(test, HistoryTestModel)
+    questions = test['questions']
+    if is_history or question_all_finished(questions):
+        return True
+    if any(q['status'] == 'handling' for q in questions.values()):
+        return False
+    expire_time = test['test_expire_time'] if 'test_expire_time' in test else None  # 早期的考试 dict 中可能没有该字段
+    return expire_time is not None and (now or datetime.datetime.utcnow()) > expire_time
+
+
+# current 中的考试 id 即 history 中的 current_id
+def get_exam_id(test: Union[CurrentTestModel, HistoryTestModel]) -> str:
+    return test.current_id if isinstance(test, HistoryTestModel) else str(test.id)
+
+
+# 将数据库中的 score_info 转换为 ExamScore
+def score_info_to_exam_score(score_info: dict) -> ExamScore:
+    return ExamScore(
+        total=score_info['total'], quality=score_info['音质'], key=score_info['主旨'],
+        detail=score_info['细节'], structure=score_info['结构'], logic=score_info['逻辑']
+    )
+
+
+# 只读地获取测试分数（有分数直接取，无分数时在内存中计算但不保存），test 可以是 as_pymongo() 取出的 dict
+# 返回 None 表示还有题目在处理中
+def peek_exam_score(test, is_history: bool):
+    if test.get('score_info'):
+        return score_info_to_exam_score(test['score_info'])
+    if is_history:
+        return ExamScore(total=0, quality=0, key=0, detail=0, structure=0, logic=0)
+    questions = test.get('questions', {})
+    if not question_all_finished(questions):
+        return None
+    tmp_dict = {int(k): v.get('score', {}) for k, v in questions.items()}
+    return score_info_to_exam_score(compute_exam_score(tmp_dict, test.get('paper_type', [])))
+
+
 # 获取测试分数（有分数直接取，无分数会计算并保存）
 def get_exam_score(test: Union[CurrentTestModel, HistoryTestModel]) -> ExamScore:
+    if fill_exam_score(test):
+        test.save()
+        summary_manager.update_score(str(test.id), test['score_info'])
+
+    return stored_exam_score(test)
+
+
+def stored_exam_score(test: Union[CurrentTestModel, HistoryTestModel]) -> ExamScore:
     if test["score_info"]:  # 数据库有成绩信息 => 直接返回
         score = ExamScore(
             total=test['score_info']['total'], quality=test['score_info']['音质'], key=test['score_info']['主旨'],
             detail=test['score_info']['细节'], structure=test['score_info']['结构'], logic=test['score_info']['逻辑']
         )
-    elif isinstance(test, HistoryTestModel):  # 没成绩信息，但是 history test => 返回 0
+    else:  # 没成绩信息，但是 history test => 返回 0
         score = ExamScore(total=0, quality=0, key=0, detail=0, structure=0, logic=0)
-    elif question_all_finished(test["questions"]):  # 没成绩信息，是 current test，题目全部结束 => 计算成绩
-        tmp_dict = {}
-        for k, v in test["questions"].items():
-            tmp_dict[int(k)] = v['score']
-        test['score_info'] = compute_exam_score(tmp_dict, test.paper_type)
-        test.save()
 
-        score = ExamScore(
-            total=test['score_info']['total'], quality=test['score_info']['音质'], key=test['score_info']['主旨'],
-            detail=test['score_info']['细节'], structure=test['score_info']['结构'], logic=test['score_info']['逻辑']
-        )
-    else:  # 没成绩信息，是 current test，还有题目在处理中 => 抛出异常
+    return score
+
+
+# 没成绩信息的 current test 题目全部结束时计算 score_info（只修改 test，不保存），返回是否新计算了成绩
+# 没成绩信息的 current test 还有题目在处理中 => 抛出 InProcessing
+def fill_exam_score(test: Union[CurrentTestModel, HistoryTestModel]) -> bool:
+    if test["score_info"] or isinstance(test, HistoryTestModel):
+        return False
+    if not question_all_finished(test["questions"]):
         raise InProcessing
 
-    return score
+    tmp_dict = {}
+    for k, v in test["questions"].items():
+        tmp_dict[int(k)] = v['score']
+    test['score_info'] = compute_exam_score(tmp_dict, test.paper_type)
+    return True
 
 
 # 根据每道题目的成绩信息计算总成绩
@@ -112,14 +273,7 @@ def compute_exam_score(question_score_dict: dict, question_type_list: list) -> d
     """
     logging.info("[compute_exam_score] question_score_dict: %r" % question_score_dict)
 
-    q_dimensions = {
-        1: ['quality'],
-        2: ['key', 'detail'],
-        3: ['structure', 'logic'],
-        4: [],
-        5: ['key', 'detail'],
-        6: ['key', 'detail']
-    }
+    q_dimensions = ExamConfig.score_dimensions
     tmp_total = {'quality': 0, 'key': 0, 'detail': 0, 'structure': 0, 'logic': 0}
     cnt_total = {'quality': 0, 'key': 0, 'detail': 0, 'structure': 0, 'logic': 0}  # 求平均分时的除数
     avg_total = {}  # 平均分
@@ -135,8 +289,10 @@ def compute_exam_score(question_score_dict: dict, question_type_list: list) -> d
         else:
             avg_total[dim] = 0
 
-    total = round(avg_total["quality"] * 0.3 + avg_total["key"] * 0.35 + avg_total["detail"] * 0.15 +
-                  avg_total["structure"] * 0.1 + avg_total["logic"] * 0.1, 6)
+    total = 0
+    for dim, weight in ExamConfig.score_weights.items():
+        total += avg_total[dim] * weight
+    total = round(total, 6)
     result = {"音质": avg_total['quality'], "结构": avg_total['structure'], "逻辑": avg_total['logic'],
               "细节": avg_total['detail'], "主旨": avg_total['key'], "total": total}
     logging.info("[compute_exam_score] score_result: %r" % result)
@@ -159,9 +315,91 @@ def generate_upload_path(exam_type: ExamType, user_id: str) -> str:
     return file_dir + '/' + file_name
 
 
+# 分页查询考试记录时读取的字段（current 中未计算成绩的考试还需要各题 status/score）
+EXAM_RECORD_FIELDS = ['test_start_time', 'paper_tpl_id', 'score_info']
+
+
+def iter_exam_records(user_id: str, template_id: str = None, start_time=None, end_time=None,
+                      end_exclusive: bool = False):
+    """
+    按 (test_start_time, exam_id) 升序合并 history 和 current 中的考试记录，只读，不修改数据库
+    end_exclusive: 不包含开始时间等于 end_time 的考试
+
+    yield: (test_start_time, exam_id, 投影后的考试 dict, 是否为 history)
+    """
+    query = {'user_id': user_id}
+    if template_id:
+        query['paper_tpl_id'] = template_id
+    time_cond = {}
+    if start_time:
+        time_cond['$gte'] = start_time
+    if end_time:
+        time_cond['$lt' if end_exclusive else '$lte'] = end_time
+    if time_cond:
+        query['test_start_time'] = time_cond
+
+    history = HistoryTestModel.objects(__raw__=query).order_by('test_start_time', 'current_id') \
+        .only('current_id', *EXAM_RECORD_FIELDS).as_pymongo()
+    current = CurrentTestModel.objects(__raw__=query).order_by('test_start_time', 'id') \
+        .only('paper_type', *EXAM_RECORD_FIELDS, *_question_fields('status', 'score')).as_pymongo()
+
+    history = ((t.get('test_start_time') or datetime.datetime.min, t.get('current_id') or '', t, True)
+               for t in history)
+    current = ((t.get('test_start_time') or datetime.datetime.min, str(t['_id']), t, False) for t in current)
+    return heapq.merge(history, current, key=lambda item: item[:2])
+
+
+# 只取出 current 中指定题目（以及判断是否为最后一题所需的字段）
+def get_current_question(test_id: str, question_num: int):
+    return _with_projection(CurrentTestModel.objects(id=test_id), 'question', question_num).first()
+
+
+# 以下为 asyncio 模式使用的异步读写（model.aio），返回数据库中的原始 dict
+# 考试 id 不是合法的 ObjectId 时抛出 bson.errors.InvalidId
+
+def _raw_projection(profile: str, question_num: int = None) -> dict:
+    mode, fields = exam_projection(profile, question_num)
+    return {field: 1 if mode == 'only' else 0 for field in fields}
+
+
+# 与 get_exam_by_id 相同的查找顺序，返回 (考试 dict, 是否为 history)，不存在时为 (None, False)
+async def get_exam_by_id_async(test_id: str, profile: str = None) -> (dict, bool):
+    projection = _raw_projection(profile) if profile else None
+    history = get_async_collection(HistoryTestModel)
+    with _archived_lock:
+        archived = test_id in _archived_exam_ids
+        if archived:
+            _archived_exam_ids.move_to_end(test_id)
+    if archived:
+        _count_exam_lookup('archived_hit')
+        return await history.find_one({'current_id': test_id}, projection), True
+
+    test = await get_async_collection(CurrentTestModel).find_one({'_id': ObjectId(test_id)}, projection)
+    if test is not None:
+        _count_exam_lookup('current_hit')
+        return test, False
+
+    test = await history.find_one({'current_id': test_id}, projection)
+    if test is None:
+        _count_exam_lookup('not_found')
+        return None, False
+    _count_exam_lookup('archived_miss', test_id)
+    return test, True
+
+
+async def get_current_question_async(test_id: str, question_num: int) -> dict:
+    return await get_async_collection(CurrentTestModel).find_one(
+        {'_id': ObjectId(test_id)}, _raw_projection('question', question_num))
+
+
+# 只 $set 指定字段，与按投影读出的考试 save() 时写入的内容相同
+async def update_current_exam_async(test_id, fields: dict):
+    await get_async_collection(CurrentTestModel).update_one({'_id': ObjectId(test_id)}, {'$set': fields})
+
+
 # 初始化试卷
 def init_paper(user_id: str, template_id: str) -> str:
-    paper_tpl = PaperTemplate.objects(id=template_id).first()  # TODO: cache in redis
+    paper_tpl = template_cache.get(template_id)
     if not paper_tpl:
         logging.error('[init_paper] paper template not found, tpl_id: %s' % template_id)
         return ""
@@ -173,98 +411,42 @@ def init_paper(user_id: str, template_id: str) -> str:
     current_test.test_start_time = _start_time
     current_test.test_expire_time = _start_time + datetime.timedelta(seconds=paper_tpl.duration)
 
-    # 一次性取出全部试题（按使用次数倒序）
-    # 选题条件：题号<=10000(大于10000的题目用作其他用途)
-    d = {'index': {'$lte': 10000}}
-    questions = QuestionModel.objects(__raw__=d).order_by('used_times')
+    # 从进程内题库索引中选题（按使用次数升序），题目正文在选定后一次性取出
+    question_pool.refresh()
 
     # 生成 question_type_list 和 questions
-    question_type_list = []
-    temp_all_q_lst = []
-    q_chosen = set()  # 存放选中题目的id字符串
-    use_backup = {}  # 避免每次选题都遍历数据库
-    for q_needed in paper_tpl.questions:
-        q_type = q_needed['q_type']
-        q_id = q_needed['dbid']
-        question_type_list.append(q_type)  # 记入 question_type_list
-
-        # 选题
-        if isinstance(q_id, str) and len(q_id) in [24, 12]:  # 指定id
-            q = QuestionModel.objects(id=q_id).first()
-            temp_all_q_lst.append(q)
-            q_chosen.add(q_id)
-        else:  # 未指定id，按约定方案选题
-            resp = user_client.getUserInfo(user_thrift.GetUserInfoRequest(
-                userId=user_id
-            ))
-            if resp is None or resp.statusCode != 0:
-                logging.error("[init_paper] user_client.getUserInfo failed")
-                raise InternalError
-
-            q_history = set(resp.userInfo.questionHistory)
-            q_backup_1 = None  # 记录已做过但未选中的指定类型题目,优先备选
-            q_backup_2 = None  # 记录已选中的指定类型题目,最差的备选
-            count_before = len(q_chosen)
-
-            tactic = use_backup.get(q_type)
-            if q_id == 0:  # 按最少使用次数选取指定类型的题目
-                # questions = get_cached_questions(q_type)  # TODO: 完善缓存处理机制
-                for q in questions:
-                    if q.q_type != q_type:
-                        continue
-                    flag_add = False
-                    qid_str = str(q.id)
-                    if qid_str in q_chosen:
-                        if tactic == 2:
-                            flag_add = True
-                        q_backup_2 = q if q_backup_2 is None else None
-                    else:
-                        if qid_str not in q_history:
-                            flag_add = True
-                        else:
-                            if tactic == 1:
-                                flag_add = True
-                            q_backup_1 = q if q_backup_1 is None else None
-                    if flag_add:
-                        temp_all_q_lst.append(q)
-                        q_chosen.add(qid_str)
-                        break
-            # elif q_id == 1:  # 随机选取指定类型的题目
-            #     pipeline = [{"$match": d}, {"$sample": {"size": 1}}]
-            #     for _ in range(DefaultValue.max_random_try):
-            #         rand_q = QuestionModel.objects.aggregate(*pipeline)
-            #         qid_str = str(rand_q.id)
-            #         if qid_str in q_chosen:
-            #             q_backup_2 = rand_q if q_backup_2 is None else None
-            #         else:
-            #             if qid_str not in q_history:
-            #                 temp_all_q_lst.append(rand_q)
-            #                 q_chosen.add(qid_str)
-            #                 break
-            #             else:
-            #                 q_backup_1 = rand_q if q_backup_1 is None else None
-
-            # 如果题目数量不够，用重复的题目补够
-            if len(q_chosen) == count_before:
-                if q_backup_1:
-                    use_backup.update({q_type: 1})
-                    temp_all_q_lst.append(q_backup_1)
-                    q_chosen.add(str(q_backup_1.id))
-                else:  # 所有该类型题目不够组卷,使用相同题目组卷
-                    if q_backup_2:
-                        use_backup.update({q_type: 2})
-                        temp_all_q_lst.append(q_backup_2)
-                        q_chosen.add(str(q_backup_2.id))
-                    else:  # 根本没有指定类型的题目
-                        return ""
-
-    questions_chosen = {}
-    for i in range(len(temp_all_q_lst)):  # TODO: 加缓存，异步刷入数据库?
-        q = temp_all_q_lst[i]
-        q_current = CurrentQuestionEmbed(q_id=str(q.id), q_type=q.q_type, q_text=q.text, wav_upload_url='')
-        questions_chosen.update({str(i + 1): q_current})
-        q.update(inc__used_times=1)  # 更新使用次数
+    question_type_list = [q_needed['q_type'] for q_needed in paper_tpl.questions]
+    slots = [(q_needed['q_type'], q_needed['dbid']) for q_needed in paper_tpl.questions]
+    q_history = frozenset()  # 用户做过的题目id集合，只有需要按约定方案选题时才获取
+    if not all(is_question_id(q_id) for _, q_id in slots):
+        q_history = user_manager.get_question_history(user_id)
+    # 选题时即占用题目，同时开始的考试会分散到不同题目上
+    temp_all_q_lst, claimed = allocate(slots, q_history)  # 存放选中题目的id字符串（按题号顺序，可能重复）
+    if temp_all_q_lst is None:  # 根本没有指定类型的题目
+        return ""
+    try:
+        q_chosen = set(temp_all_q_lst)
+
+        # 一次性取出选中题目的正文
+        questions = {str(q.id): q for q in QuestionModel.objects(id__in=list(q_chosen))}
+        if len(questions) != len(q_chosen):
+            logging.error('[init_paper] question not found, q_chosen: %s' % q_chosen)
+            rollback_allocation(temp_all_q_lst, claimed)
+            return ""
+
+        questions_chosen = {}
+        for i in range(len(temp_all_q_lst)):
+            q = questions[temp_all_q_lst[i]]
+            q_current = CurrentQuestionEmbed(q_id=str(q.id), q_type=q.q_type, q_text=q.text, wav_upload_url='')
+            questions_chosen.update({str(i + 1): q_current})
+        commit_allocation(temp_all_q_lst, claimed)  # 批量更新使用次数
+    except Exception:  # 归还占用的题目，否则本地索引中的占用一直存在，影响之后的选题
+        logging.error('[init_paper] failed before committing allocation, releasing q_chosen: %s' % temp_all_q_lst)
+        rollback_allocation(temp_all_q_lst, claimed)
+        raise
     current_test.questions = questions_chosen
     current_test.paper_type = question_type_list
     current_test.save()
+    user_manager.invalidate_question_history(user_id, temp_all_q_lst)  # 用户做过的题目已变化
+    summary_manager.add_exam(current_test)
     return str(current_test.id)
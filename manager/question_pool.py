@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 进程内题库索引：按 q_type 分组，组内按 used_times 升序排列，选题时无需每次重新读取整个 questions 集合
+
+import atexit
+import bisect
+import logging
+import threading
+import time
+from collections import Counter
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from config import ExamConfig
+from model.question import QuestionModel
+
+# 选题条件：题号<=10000(大于10000的题目用作其他用途)
+QUESTION_POOL_QUERY = {'index': {'$lte': 10000}}
+
+
+def is_question_id(dbid) -> bool:
+    """试卷模板中的 dbid 是否为指定的题目 id（否则按约定方案选题）"""
+    return isinstance(dbid, str) and len(dbid) in [24, 12]
+
+
+def _first_gap(positions: list) -> int:
+    """positions 升序且不重复，返回第一个不在其中的位置"""
+    for expected, pos in enumerate(positions):
+        if pos != expected:
+            return expected
+    return len(positions)
+
+
+class _SeenPositions(object):
+    """用户做过的某类题目在有序列表中的位置（升序），二分查找下一个没做过的位置"""
+
+    def __init__(self, positions: list):
+        self.positions = positions
+        self._offsets = [pos - i for i, pos in enumerate(positions)]  # 非递减，连续的一段位置取值相同
+
+    def next_gap(self, start: int) -> int:
+        """返回 >= start 的第一个没做过的位置"""
+        j = bisect.bisect_left(self.positions, start)
+        if j == len(self.positions) or self.positions[j] != start:
+            return start
+        return start + bisect.bisect_right(self._offsets, start - j) - j
+
+
+class QuestionPool(object):
+    """
+    题库索引，只保存 id / q_type / used_times，题目正文在选中后再按 id 批量取出
+
+    _entries: {q_type: [(used_times, qid_str), ...]}，组内有序，定位和更新均为 O(log n) 查找
+    _index:   {qid_str: (q_type, used_times)}
+
+    pending: 返回尚未写入数据库的使用次数增量 {qid: count} 的函数，从数据库刷新时并入，不会丢失本地的累加
+    """
+
+    def __init__(self, refresh_interval=ExamConfig.question_pool_refresh_interval, pending=None):
+        self.lock = threading.RLock()
+        self.refresh_interval = refresh_interval
+        self.pending = pending
+        self._entries = {}
+        self._index = {}
+        self._loaded_at = 0
+        self._reserved = Counter()  # select(reserve=True) 占用、尚未写入数据库的使用次数
+        self._refresh_lock = threading.Lock()  # 同一时间只有一个线程从数据库读取题库
+
+    def __len__(self):
+        return len(self._index)
+
+    def _insert(self, qid: str, q_type: int, used_times: int):
+        self._index[qid] = (q_type, used_times)
+        bisect.insort(self._entries.setdefault(q_type, []), (used_times, qid))
+
+    def _remove(self, qid: str):
+        q_type, used_times = self._index.pop(qid)
+        lst = self._entries[q_type]
+        pos = bisect.bisect_left(lst, (used_times, qid))
+        del lst[pos]
+
+    def update(self, qid: str, q_type: int, used_times: int):
+        """新增题目，或更新题目的类型/使用次数"""
+        with self.lock:
+            old = self._index.get(qid)
+            if old == (q_type, used_times):
+                return
+            if old is not None:
+                self._remove(qid)
+            self._insert(qid, q_type, used_times)
+
+    def load(self, items, full=True):
+        """
+        用 (qid, q_type, used_times) 序列增量更新索引
+
+        full=True 表示 items 是完整题库，索引中不在 items 里的题目会被移除
+        items 中的使用次数来自数据库，会加上尚未写入数据库的增量（pending 和本地占用的题目）
+        """
+        pending = self.pending() if self.pending else Counter()
+        with self.lock:
+            pending.update(self._reserved)
+            seen = set()
+            for qid, q_type, used_times in items:
+                qid = str(qid)
+                seen.add(qid)
+                self.update(qid, q_type, (used_times or 0) + pending.get(qid, 0))
+            if full:
+                for qid in [qid for qid in self._index if qid not in seen]:
+                    self._remove(qid)
+            self._loaded_at = time.time()
+
+    def _fresh(self) -> bool:
+        return bool(self._loaded_at) and time.time() - self._loaded_at < self.refresh_interval
+
+    def refresh(self, force=False):
+        """
+        从数据库刷新索引（仅投影 id/q_type/used_times），未过期时直接返回
+        过期时只有一个线程读取数据库，同时到达的线程等待其完成后直接使用新的索引
+        """
+        if not force and self._fresh():
+            return
+        with self._refresh_lock:
+            if not force and self._fresh():  # 等待期间已由其他线程刷新
+                return
+            cursor = QuestionModel.objects(__raw__=QUESTION_POOL_QUERY).only('id', 'q_type', 'used_times').as_pymongo()
+            self.load([(q['_id'], q.get('q_type'), q.get('used_times', 0)) for q in cursor])
+        logging.info("[QuestionPool.refresh] question pool refreshed, size: %d" % len(self))
+
+    def iter_questions(self, q_type: int):
+        """按使用次数升序遍历指定类型的题目 id，调用方需持有 self.lock"""
+        for _, qid in self._entries.get(q_type, []):
+            yield qid
+
+    def _positions(self, q_type: int, qids) -> list:
+        """qids 中属于 q_type 的题目在该类型有序列表中的位置（升序），调用方需持有 self.lock"""
+        lst = self._entries.get(q_type, [])
+        positions = []
+        for qid in qids:
+            entry = self._index.get(qid)
+            if entry is not None and entry[0] == q_type:
+                positions.append(bisect.bisect_left(lst, (entry[1], qid)))
+        positions.sort()
+        return positions
+
+    def _select_one(self, q_type: int, tactic, chosen: set, seen) -> (list, int):
+        """
+        为一个未指定题目的槽位选题，返回 (加入试卷的题目 id 列表, 该类型之后使用的策略)，列表为空表示没有可用题目
+
+        与原先在有序列表上逐个遍历的结果一致，但只需定位已选中的题目，在 seen（_SeenPositions）上二分查找，不必遍历题库：
+        tactic None: 第一个未选中且没做过的题目
+        tactic 1: 第一个未选中的题目
+        tactic 2: 第一个已选中或没做过的题目
+        找不到时使用备选：q_backup_1（做过但未选中的题目）优先于 q_backup_2（已选中的题目），策略随之改为 1/2
+        遍历中每遇到一个备选题目，备选就在“该题目”和“无”之间切换，因此备选是同类题目中最后一个、且仅当其个数为奇数时存在
+        """
+        lst = self._entries.get(q_type, [])
+        size = len(lst)
+        chosen_pos = self._positions(q_type, chosen)
+        chosen_set = set(chosen_pos)
+
+        if tactic == 1:
+            pos = _first_gap(chosen_pos)
+            if pos < size:
+                return [lst[pos][1]], tactic
+            return ([lst[-1][1]], 2) if size % 2 else ([], tactic)
+
+        if tactic == 2:
+            # 第一个不属于“做过但未选中”的位置
+            pos = seen.next_gap(0)
+            pos = min([p for p in chosen_pos if p < pos] or [pos])
+            if pos >= size:
+                return ([lst[-1][1]], 1) if size % 2 else ([], tactic)
+            qid = lst[pos][1]
+            if pos not in chosen_set:
+                return [qid], tactic
+            # 选中的是已选中的题目时试卷题目数没有增加，原有逻辑会再追加一道备选题目（保持不变）
+            # 此时之前的 pos 道题目都是做过但未选中的题目，已选中的题目只有这一道
+            return ([qid, lst[pos - 1][1]], 1) if pos % 2 else ([qid, qid], tactic)
+
+        pos = seen.next_gap(0)
+        while pos in chosen_set:
+            pos = seen.next_gap(pos + 1)
+        if pos < size:
+            return [lst[pos][1]], tactic
+        # 该类型的题目全部已选中或做过
+        seen_not_chosen = len(seen.positions) - len(chosen_set.intersection(seen.positions))
+        if seen_not_chosen % 2:
+            last = next(p for p in reversed(seen.positions) if p not in chosen_set)
+            return [lst[last][1]], 1
+        if len(chosen_pos) % 2:
+            return [lst[chosen_pos[-1]][1]], 2
+        return [], tactic
+
+    def _of_type(self, q_type: int, qids) -> list:
+        """qids 中可能属于 q_type 的题目（排除索引中已知为其他类型的题目）"""
+        with self.lock:
+            return [qid for qid in qids if self._index.get(qid, (q_type,))[0] == q_type]
+
+    def _select(self, slots, q_history, pick) -> list:
+        """
+        select 的选题流程，pick(q_type, chosen) 返回该类型下一个未选中且没做过的题目 id，没有时返回 None；
+        没做过的题目用完时（很少见）才加锁定位做过的题目，按原有策略计算备选
+        """
+        selected = []
+        chosen = set()
+        tactics = {}  # 避免每次选题都遍历题库
+        for q_type, q_id in slots:
+            if is_question_id(q_id):  # 指定id
+                qids = [q_id]
+            elif q_id == 0:  # 按最少使用次数选取指定类型的题目
+                tactic = tactics.get(q_type)
+                qid = pick(q_type, chosen) if tactic is None else None
+                if qid is not None:
+                    qids = [qid]
+                else:
+                    with self.lock:
+                        seen = _SeenPositions(self._positions(q_type, q_history))
+                        qids, tactics[q_type] = self._select_one(q_type, tactic, chosen, seen)
+            else:
+                qids = []
+            if not qids:  # 根本没有指定类型的题目
+                return None
+            selected.extend(qids)
+            chosen.update(qids)
+        return selected
+
+    def select(self, slots, q_history, reserve: bool = False, claim=None) -> list:
+        """
+        按试卷模板选题，返回按题号顺序的题目 id 列表（可能重复），有槽位选不到题目时返回 None
+
+        slots: [(q_type, dbid)]，dbid 为题目 id 时直接使用，为 0 时按使用次数升序选取用户没做过的题目
+        默认在锁内完成整张试卷的选题：同类型的槽位共用一个“有序列表减去做过的题目”的迭代器，
+        每场考试只需跳过一次排在前面的做过的题目，之后每个槽位 O(1)，与题库大小无关
+        reserve: 在同一次加锁中累加选中题目的使用次数（占用），之后并发开始的考试会排到其他题目上，
+                 调用方之后用 increase_used_times(..., reserved=True) 写入数据库，失败时用 release 归还
+        claim: claim(q_type, excluded) 原子地占用并返回该类型使用次数最少且不在 excluded 中的题目，
+               用于在数据库中占用题目（见 claim_least_used），此时不持有锁等待数据库
+        """
+        q_history = q_history or frozenset()
+        if claim is not None:
+            history = {}  # {q_type: 可能属于该类型的做过的题目}
+
+            def pick(q_type, chosen):
+                if q_type not in history:
+                    history[q_type] = self._of_type(q_type, q_history)
+                return claim(q_type, history[q_type] + self._of_type(q_type, chosen))
+
+            return self._select(slots, q_history, pick)
+
+        unseen = {}  # {q_type: 没做过的题目 id 迭代器}
+
+        def pick(q_type, chosen):
+            if q_type not in unseen:
+                unseen[q_type] = (qid for qid in self.iter_questions(q_type) if qid not in q_history)
+            return next((qid for qid in unseen[q_type] if qid not in chosen), None)
+
+        with self.lock:
+            selected = self._select(slots, q_history, pick)
+            if selected and reserve:
+                counts = Counter(selected)
+                for qid, count in counts.items():
+                    self.increase_used_times(qid, count)
+                self._reserved.update(counts)
+        return selected
+
+    def increase_used_times(self, qid: str, count: int = 1):
+        """本地累加使用次数，使索引在两次刷新之间保持有序"""
+        with self.lock:
+            old = self._index.get(qid)
+            if old is not None:
+                self.update(qid, old[0], max(old[1] + count, 0))
+
+    def release(self, qid_list: list):
+        """归还 select(reserve=True) 占用但最终没有使用的题目"""
+        counts = Counter(qid_list)
+        with self.lock:
+            for qid, count in counts.items():
+                self.increase_used_times(qid, -count)
+            self._reserved -= counts
+
+    def unreserve(self, qid_list):
+        """select(reserve=True) 占用的题目的使用次数已写入数据库（或 pending），刷新时不再额外累加"""
+        with self.lock:
+            self._reserved -= Counter(qid_list)
+
+
+_pending_used_times = Counter()  # write-behind 模式下尚未写入数据库的使用次数增量
+_flushing_used_times = Counter()  # 正在写入数据库的增量
+_pending_lock = threading.Lock()
+_flusher = None
+
+
+def _unwritten_used_times() -> Counter:
+    """尚未写入数据库的使用次数增量（包括正在写入的）"""
+    with _pending_lock:
+        return _pending_used_times + _flushing_used_times
+
+
+question_pool = QuestionPool(pending=_unwritten_used_times)
+
+
+def claim_least_used(q_type: int, excluded: list) -> str:
+    """
+    在数据库中原子地选取指定类型中使用次数最少、且不在 excluded 中的题目，同时将其使用次数加 1，没有时返回 None
+
+    排序同进程内索引（used_times, id），并发的调用各自占用不同的题目；占用后用数据库中的使用次数更新本地索引
+    """
+    query = dict(QUESTION_POOL_QUERY, q_type=q_type)
+    excluded = [ObjectId(qid) for qid in excluded if ObjectId.is_valid(qid)]
+    if excluded:
+        query['_id'] = {'$nin': excluded}
+    doc = QuestionModel._get_collection().find_one_and_update(
+        query, {'$inc': {'used_times': 1}}, projection={'_id': 1, 'used_times': 1},
+        sort=[('used_times', 1), ('_id', 1)], return_document=ReturnDocument.AFTER)
+    if doc is None:
+        return None
+    qid = str(doc['_id'])
+    question_pool.update(qid, q_type, doc['used_times'])
+    return qid
+
+
+def allocate(slots, q_history) -> (list, list):
+    """
+    按 ExamConfig.question_allocation 选题并占用题目，返回 (选中的题目 id 列表, 在数据库中占用的题目 id 列表)
+    选不到题目时前者为 None；题目确认使用后调用 commit_allocation，放弃时调用 rollback_allocation
+    """
+    if ExamConfig.question_allocation != 'atomic':
+        return question_pool.select(slots, q_history, reserve=True), []
+
+    claimed = []
+
+    def claim(q_type, excluded):
+        qid = claim_least_used(q_type, excluded)
+        if qid is not None:
+            claimed.append(qid)
+        return qid
+
+    selected = question_pool.select(slots, q_history, claim=claim)
+    if selected is None:
+        rollback_allocation(None, claimed)
+    return selected, claimed
+
+
+def commit_allocation(selected: list, claimed: list):
+    """累加选中题目的使用次数，已在数据库中占用的题目不再重复累加"""
+    if ExamConfig.question_allocation != 'atomic':
+        increase_used_times(selected, reserved=True)
+    else:
+        increase_used_times(list((Counter(selected) - Counter(claimed)).elements()))
+
+
+def rollback_allocation(selected: list, claimed: list):
+    """归还 allocate 占用的题目"""
+    if ExamConfig.question_allocation != 'atomic':
+        question_pool.release(selected or [])
+        return
+    question_pool.release(claimed)
+    _bulk_increase(Counter({qid: -count for qid, count in Counter(claimed).items()}))
+
+
+def increase_used_times(qid_list: list, reserved: bool = False):
+    """
+    累加题目使用次数（qid_list 中重复出现的题目按出现次数累加）
+
+    默认将一场考试的全部增量合并为一次无序 bulk write；
+    ExamConfig.used_times_write_behind 开启时先在内存中累计，由后台线程定时或在进程退出时写入
+    reserved: 选题时已经在本地索引中占用（select(reserve=True)），只需写入数据库
+    """
+    counts = Counter(qid_list)
+    if not counts:
+        return
+    if not reserved:
+        for qid, count in counts.items():
+            question_pool.increase_used_times(qid, count)
+
+    try:
+        if ExamConfig.used_times_write_behind:
+            with _pending_lock:
+                _pending_used_times.update(counts)
+            _start_flusher()
+        else:
+            _bulk_increase(counts)
+    finally:
+        if reserved:  # 写入失败时本地的累加在下次刷新时被数据库中的值覆盖
+            question_pool.unreserve(counts)
+
+
+def flush_used_times():
+    """将内存中累计的使用次数增量写入数据库，写入失败时放回等待下次重试"""
+    global _pending_used_times, _flushing_used_times
+    with _pending_lock:
+        if not _pending_used_times:
+            return
+        counts, _pending_used_times = _pending_used_times, Counter()
+        _flushing_used_times += counts
+    try:
+        _bulk_increase(counts)
+    except Exception as e:
+        logging.error("[flush_used_times] bulk write failed, %d questions pending. exception: %s" % (len(counts), repr(e)))
+        with _pending_lock:
+            _pending_used_times.update(counts)
+    finally:
+        with _pending_lock:
+            _flushing_used_times -= counts
+
+
+def _bulk_increase(counts: Counter):
+    requests = [UpdateOne({'_id': ObjectId(qid)}, {'$inc': {'used_times': count}}) for qid, count in counts.items()]
+    if requests:
+        QuestionModel._get_collection().bulk_write(requests, ordered=False)
+
+
+def _flush_loop():
+    while True:
+        time.sleep(ExamConfig.used_times_flush_interval)
+        flush_used_times()
+
+
+def _start_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _pending_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name='used-times-flusher', daemon=True)
+            _flusher.start()
+            atexit.register(flush_used_times)
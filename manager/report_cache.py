@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 考试报告缓存：出成绩后 score_info 不再变化，报告只需生成一次
+# 进程内 LRU + exam_report_cache 集合，按 (考试 id, 成绩版本) 命中
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+from pymongo import UpdateOne
+from thrift.TSerialization import serialize, deserialize
+from thrift.protocol import TCompactProtocol
+
+from config import ExamConfig
+from exam.ttypes import ExamReport, ExamScore
+from manager.report_manager import REPORT_VERSION
+from model.exam import ExamReportCacheModel
+
+_protocol_factory = TCompactProtocol.TCompactProtocolFactory()
+
+
+def score_version(score_info: dict) -> str:
+    """成绩版本：score_info 和报告生成规则版本的摘要，任一变化（如重新评分）都会使缓存失效"""
+    raw = json.dumps(score_info, sort_keys=True, default=str) + '|' + REPORT_VERSION
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+class ReportCache(object):
+    """
+    get 先查进程内 LRU，再查 exam_report_cache；put 同时写入两者
+    persist=False 时只使用进程内 LRU（如在事件循环中不能执行同步数据库操作时）
+    """
+
+    def __init__(self, size=ExamConfig.report_cache_size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # {exam_id: (score_version, ExamReport, ExamScore)}
+
+    def _get_local(self, exam_id: str):
+        with self._lock:
+            entry = self._entries.get(exam_id)
+            if entry is not None:
+                self._entries.move_to_end(exam_id)
+            return entry
+
+    def _put_local(self, exam_id: str, version: str, report: ExamReport, score: ExamScore):
+        with self._lock:
+            self._entries[exam_id] = (version, report, score)
+            self._entries.move_to_end(exam_id)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def lookup(self, exam_id: str, persist=True):
+        """返回 (score_version, ExamReport, ExamScore)，没有缓存时返回 None"""
+        entry = self._get_local(exam_id)
+        if entry is not None or not persist:
+            return entry
+
+        doc = ExamReportCacheModel.objects(exam_id=exam_id).first()
+        if doc is None:
+            return None
+        try:
+            entry = (doc.score_version, deserialize(ExamReport(), doc.report, _protocol_factory),
+                     deserialize(ExamScore(), doc.score, _protocol_factory))
+        except Exception as e:
+            logging.warning("[ReportCache.lookup] bad cache entry, exam_id: %s, exception: %r" % (exam_id, e))
+            return None
+        self._put_local(exam_id, *entry)
+        return entry
+
+    def get(self, exam_id: str, version: str, persist=True):
+        """返回 (ExamReport, ExamScore)，未缓存或版本不一致时返回 None"""
+        entry = self.lookup(exam_id, persist)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1], entry[2]
+
+    def get_many(self, versions: dict, persist=True) -> dict:
+        """
+        versions: {exam_id: score_version}，返回 {exam_id: (ExamReport, ExamScore)}，只包含版本一致的缓存
+        进程内 LRU 未命中的 id 合并为一次 exam_report_cache 查询
+        """
+        found, missing = {}, []
+        for exam_id, version in versions.items():
+            entry = self._get_local(exam_id)
+            if entry is not None and entry[0] == version:
+                found[exam_id] = entry[1], entry[2]
+            else:
+                missing.append(exam_id)
+        if not missing or not persist:
+            return found
+
+        for doc in ExamReportCacheModel.objects(exam_id__in=missing):
+            if doc.score_version != versions[doc.exam_id]:
+                continue
+            try:
+                entry = (doc.score_version, deserialize(ExamReport(), doc.report, _protocol_factory),
+                         deserialize(ExamScore(), doc.score, _protocol_factory))
+            except Exception as e:
+                logging.warning("[ReportCache.get_many] bad cache entry, exam_id: %s, exception: %r" % (doc.exam_id, e))
+                continue
+            self._put_local(doc.exam_id, *entry)
+            found[doc.exam_id] = entry[1], entry[2]
+        return found
+
+    def put(self, exam_id: str, version: str, report: ExamReport, score: ExamScore, persist=True):
+        self._put_local(exam_id, version, report, score)
+        if not persist:
+            return
+        try:
+            ExamReportCacheModel.objects(exam_id=exam_id).update_one(
+                set__score_version=version,
+                set__report=serialize(report, _protocol_factory),
+                set__score=serialize(score, _protocol_factory),
+                upsert=True
+            )
+        except Exception as e:  # 缓存写入失败不影响本次请求
+            logging.error("[ReportCache.put] save failed, exam_id: %s, exception: %r" % (exam_id, e))
+
+    def put_many(self, entries: list, persist=True):
+        """entries: [(exam_id, score_version, ExamReport, ExamScore)]，持久化时一次 bulk_write"""
+        for entry in entries:
+            self._put_local(*entry)
+        if not entries or not persist:
+            return
+        requests = [UpdateOne({'_id': exam_id}, {'$set': {
+            'score_version': version,
+            'report': serialize(report, _protocol_factory),
+            'score': serialize(score, _protocol_factory),
+        }}, upsert=True) for exam_id, version, report, score in entries]
+        try:
+            ExamReportCacheModel._get_collection().bulk_write(requests, ordered=False)
+        except Exception as e:  # 缓存写入失败不影响本次请求
+            logging.error("[ReportCache.put_many] save failed, count: %d, exception: %r" % (len(entries), e))
+
+
+report_cache = ReportCache()
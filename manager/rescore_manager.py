@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 批量重算考试成绩（如修改权重或重新评分后）的离线任务，可断点续跑
+#
+# 主进程用服务端游标按 _id 顺序只扫描 _id（只走 _id 索引），每 batch_size 个切成一个 _id 区间；
+# 各区间由 workers 个进程并行读取投影后的字段，用 score_engine 批量计算，发生变化的成绩一次无序 bulk_write 写回；
+# 主进程按区间顺序收集结果，把连续完成的最后一个 _id 记为断点（rescore_checkpoint），中断后从断点之后继续
+
+import collections
+import datetime
+import hashlib
+import json
+import logging
+import multiprocessing
+import time
+
+from pymongo import UpdateOne
+
+from config import ExamConfig
+from manager import summary_manager
+from manager.score_engine import score_engine
+from model import connect_db, disconnect_db
+from model.exam import CurrentTestModel, HistoryTestModel
+from model.rescore_checkpoint import RescoreCheckpointModel
+
+COLLECTIONS = collections.OrderedDict([('history', HistoryTestModel), ('current', CurrentTestModel)])
+
+# 重算成绩只需各题 status/score
+RESCORE_FIELDS = ['current_id', 'paper_type', 'score_info', 'test_expire_time'] + [
+    'questions.%d.%s' % (i, f) for i in range(1, ExamConfig.max_question_num + 1) for f in ('status', 'score')]
+
+
+def default_job_id(user_id: str = None) -> str:
+    """由成绩规则（和用户）生成任务 id：规则不变时重复执行会续跑，修改权重后自动成为新任务"""
+    raw = json.dumps([ExamConfig.score_dimensions, ExamConfig.score_weights, user_id], sort_keys=True)
+    return 'score-' + hashlib.md5(raw.encode('utf-8')).hexdigest()[:12]
+
+
+def question_scores(test: dict) -> dict:
+    """as_pymongo() 取出的考试 -> compute_exam_score 的 question_score_dict，未完成的题目记 0 分（同 get_score_and_feature）"""
+    return {int(k): (q.get('score') or {}) if q.get('status') == 'finished' else {}
+            for k, q in (test.get('questions') or {}).items()}
+
+
+def rescorable(test: dict, is_history: bool, now: datetime.datetime) -> bool:
+    """
+    是否可以计算成绩：没有评分中的题目；current 中的考试还需要题目全部结束或已超时
+    （同 get_exam_score/get_exam_result，避免给还在作答的考试写入成绩）
+    """
+    statuses = [q.get('status') for q in (test.get('questions') or {}).values()]
+    if 'handling' in statuses:
+        return False
+    if is_history or all(status in ('finished', 'error') for status in statuses):
+        return True
+    expire_time = test.get('test_expire_time')
+    return expire_time is not None and now > expire_time
+
+
+def rescore_batch(model, tests: list, dry_run: bool = False) -> dict:
+    """重算一批考试的成绩，写回发生变化的 score_info，返回各项计数"""
+    is_history = model is HistoryTestModel
+    now = datetime.datetime.utcnow()
+    counts = {'scanned': len(tests), 'changed': 0, 'skipped': 0, 'failed': 0}
+
+    targets = [test for test in tests if rescorable(test, is_history, now)]
+    counts['skipped'] = len(tests) - len(targets)
+    score_infos = score_engine.score_infos((question_scores(test), test.get('paper_type') or []) for test in targets)
+
+    requests, summaries = [], {}
+    for test, score_info in zip(targets, score_infos):
+        if score_info is None:
+            counts['failed'] += 1
+            logging.warning("[rescore_batch] can not compute score. %s id: %s" % (model._meta['collection'], test['_id']))
+            continue
+        if score_info == test.get('score_info'):
+            continue
+        requests.append(UpdateOne({'_id': test['_id']}, {'$set': {'score_info': score_info}}))
+        exam_id = test.get('current_id') if is_history else str(test['_id'])
+        if exam_id:
+            summaries[exam_id] = score_info
+
+    counts['changed'] = len(requests)
+    if requests and not dry_run:
+        model._get_collection().bulk_write(requests, ordered=False)
+        summary_manager.update_scores(summaries)
+    return counts
+
+
+def _rescore_range(task) -> (object, dict):
+    """读取 [first_id, last_id] 区间内的考试并重算，在 worker 进程中执行"""
+    collection_name, query, first_id, last_id, dry_run = task
+    model = COLLECTIONS[collection_name]
+    query = dict(query, _id={'$gte': first_id, '$lte': last_id})
+    projection = dict.fromkeys(RESCORE_FIELDS, 1)
+    tests = list(model._get_collection().find(query, projection))
+    return last_id, rescore_batch(model, tests, dry_run)
+
+
+def _iter_id_ranges(model, query: dict, after_id, batch_size: int):
+    """服务端游标按 _id 顺序扫描 _id，产出每 batch_size 个考试的 (first_id, last_id)"""
+    if after_id is not None:
+        query = dict(query, _id={'$gt': after_id})
+    cursor = model._get_collection().find(query, {'_id': 1}, no_cursor_timeout=True).sort('_id', 1).batch_size(batch_size)
+    try:
+        first_id = last_id = None
+        count = 0
+        for doc in cursor:
+            if first_id is None:
+                first_id = doc['_id']
+            last_id = doc['_id']
+            count += 1
+            if count >= batch_size:
+                yield first_id, last_id
+                first_id, count = None, 0
+        if first_id is not None:
+            yield first_id, last_id
+    finally:
+        cursor.close()
+
+
+class ThroughputMeter(object):
+    """统计已处理的考试数、整体速率、最近 window 秒内的速率和预计剩余时间"""
+
+    def __init__(self, total: int = None, window: float = 30):
+        self.total = total
+        self.window = window
+        self.count = 0
+        self.start = time.time()
+        self._samples = collections.deque([(self.start, 0)])
+
+    def update(self, n: int):
+        now = time.time()
+        self.count += n
+        self._samples.append((now, self.count))
+        while len(self._samples) > 2 and now - self._samples[1][0] > self.window:
+            self._samples.popleft()
+
+    @property
+    def rate(self) -> float:
+        return self.count / max(time.time() - self.start, 1e-6)
+
+    @property
+    def recent_rate(self) -> float:
+        (start, start_count), (end, end_count) = self._samples[0], self._samples[-1]
+        return (end_count - start_count) / max(end - start, 1e-6)
+
+    def report(self) -> str:
+        text = "%d exams, %.0f exams/s (recent %.0f exams/s)" % (self.count, self.rate, self.recent_rate)
+        if self.total:
+            rate = self.recent_rate or self.rate
+            eta = (self.total - self.count) / rate if rate else float('inf')
+            text += ", %.1f%%, eta %.0fs" % (min(self.count / self.total, 1) * 100, eta)
+        return text
+
+
+def _load_checkpoint(job_id: str, collection_name: str, restart: bool) -> RescoreCheckpointModel:
+    key = '%s:%s' % (job_id, collection_name)
+    checkpoint = None if restart else RescoreCheckpointModel.objects(key=key).first()
+    return checkpoint or RescoreCheckpointModel(key=key, job_id=job_id, collection_name=collection_name)
+
+
+def rescore_collection(collection_name: str, job_id: str, batch_size: int = ExamConfig.rescore_batch_size,
+                       workers: int = ExamConfig.rescore_workers, user_id: str = None, dry_run: bool = False,
+                       restart: bool = False) -> dict:
+    """重算一个集合中的考试成绩，dry_run 时只统计，不写入成绩和断点"""
+    model = COLLECTIONS[collection_name]
+    query = {'user_id': user_id} if user_id else {}
+    checkpoint = _load_checkpoint(job_id, collection_name, restart or dry_run)
+    if checkpoint.finished:
+        logging.info("[rescore_collection] %s already finished in job %s" % (collection_name, job_id))
+        return {'scanned': 0, 'changed': 0, 'skipped': 0, 'failed': 0}
+
+    remaining = dict(query, _id={'$gt': checkpoint.last_id}) if checkpoint.last_id else query
+    meter = ThroughputMeter(model._get_collection().count_documents(remaining))
+    logging.info("[rescore_collection] %s: job %s, %d exams to scan, resume after: %s, workers: %d" % (
+        collection_name, job_id, meter.total, checkpoint.last_id, workers))
+
+    counts = {'scanned': 0, 'changed': 0, 'skipped': 0, 'failed': 0}
+    tasks = ((collection_name, query, first_id, last_id, dry_run)
+             for first_id, last_id in _iter_id_ranges(model, query, checkpoint.last_id, batch_size))
+    pool = None
+    if workers > 1:
+        # mongo 连接不能跨 fork 使用，fork 前断开，worker 和主进程各自重新连接
+        disconnect_db()
+        pool = multiprocessing.get_context('fork').Pool(workers, initializer=connect_db)
+        connect_db()
+    try:
+        results = pool.imap(_rescore_range, tasks) if pool else map(_rescore_range, tasks)
+        last_report = time.time()
+        for last_id, batch_counts in results:  # imap 按区间顺序返回，last_id 之前的区间都已完成
+            for key, value in batch_counts.items():
+                counts[key] += value
+            meter.update(batch_counts['scanned'])
+            if not dry_run:
+                checkpoint.last_id = last_id
+                for key, value in batch_counts.items():
+                    setattr(checkpoint, key, getattr(checkpoint, key) + value)
+                checkpoint.update_time = datetime.datetime.utcnow()
+                checkpoint.save()
+            if time.time() - last_report >= ExamConfig.rescore_report_interval:
+                last_report = time.time()
+                logging.info("[rescore_collection] %s: %s, changed: %d, skipped: %d, failed: %d" % (
+                    collection_name, meter.report(), counts['changed'], counts['skipped'], counts['failed']))
+        if pool:
+            pool.close()
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    if not dry_run:
+        checkpoint.finished = True
+        checkpoint.update_time = datetime.datetime.utcnow()
+        checkpoint.save()
+    logging.info("[rescore_collection] %s done: %s, changed: %d, skipped: %d, failed: %d" % (
+        collection_name, meter.report(), counts['changed'], counts['skipped'], counts['failed']))
+    return counts
+
+
+def rescore(collection_names=tuple(COLLECTIONS), job_id: str = None, batch_size: int = ExamConfig.rescore_batch_size,
+            workers: int = ExamConfig.rescore_workers, user_id: str = None, dry_run: bool = False,
+            restart: bool = False) -> dict:
+    """依次重算各集合的考试成绩，返回 {集合名: 计数}"""
+    job_id = job_id or default_job_id(user_id)
+    start = time.time()
+    stats = collections.OrderedDict()
+    for collection_name in collection_names:
+        stats[collection_name] = rescore_collection(collection_name, job_id, batch_size, workers, user_id,
+                                                    dry_run, restart)
+    logging.info("[rescore] job %s finished in %.1fs" % (job_id, time.time() - start))
+    return stats
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 向量化的考试成绩计算：一批考试的各题维度成绩打包为数组，按题型-维度掩码矩阵一次算出所有考试的 score_info
+# 结果与 exam_manager.compute_exam_score 逐位一致（按题目顺序逐列累加，按权重顺序求总分，总分用 Python round）
+
+import numpy as np
+
+from config import ExamConfig
+
+DIMENSIONS = ('quality', 'key', 'detail', 'structure', 'logic')
+# 维度在 score_info 中的字段名，顺序同 compute_exam_score 的返回值
+SCORE_INFO_KEYS = {'quality': '音质', 'structure': '结构', 'logic': '逻辑', 'detail': '细节', 'key': '主旨'}
+
+
+class ScoreEngine(object):
+    """
+    scores: float64 [考试数, 题目数, 维度数]，维度顺序同 DIMENSIONS，缺失的维度为 0
+    q_types: int [考试数, 题目数]，题目数不足的考试用 -1 补齐
+
+    mask 为 [题型数 + 1, 维度数] 的 bool 矩阵，最后一行全为 False，供补齐位置和未知题型使用
+    """
+
+    def __init__(self, dimensions: dict = None, weights: dict = None):
+        dimensions = ExamConfig.score_dimensions if dimensions is None else dimensions
+        weights = ExamConfig.score_weights if weights is None else weights
+        if set(weights) != set(DIMENSIONS):
+            raise ValueError("weights must cover dimensions: %s" % ', '.join(DIMENSIONS))
+
+        # {q_type: [(维度下标, 维度名)]}
+        self.type_dims = {q_type: [(DIMENSIONS.index(dim), dim) for dim in dims] for q_type, dims in dimensions.items()}
+        self.pad_row = max(dimensions) + 1 if dimensions else 0
+        self.mask = np.zeros((self.pad_row + 1, len(DIMENSIONS)), dtype=bool)
+        for q_type, dims in dimensions.items():
+            for dim in dims:
+                self.mask[q_type, DIMENSIONS.index(dim)] = True
+        # 总分按 weights 的顺序累加，与 compute_exam_score 一致
+        self.weight_order = [DIMENSIONS.index(dim) for dim in weights]
+        self.weights = [weights[dim] for dim in weights]
+
+    def pack(self, exams) -> (np.ndarray, np.ndarray, np.ndarray):
+        """
+        exams: [(question_score_dict, question_type_list)]，参数同 compute_exam_score
+        返回 (scores, q_types, valid)，valid[i] 为 False 表示该考试无法计算（未知题型、缺少题目成绩或成绩不是数值）
+        """
+        exams = list(exams)
+        n = len(exams)
+        width = max((len(types) for _, types in exams), default=0)
+        scores = np.zeros((n, width, len(DIMENSIONS)))
+        q_types = np.full((n, width), -1, dtype=np.int64)
+        valid = np.ones(n, dtype=bool)
+
+        for i, (question_score_dict, question_type_list) in enumerate(exams):
+            try:
+                row = scores[i]
+                for j, q_type in enumerate(question_type_list):
+                    type_dims = self.type_dims[q_type]  # 未知题型抛出 KeyError
+                    q_score = question_score_dict[j + 1]
+                    for k, dim in type_dims:
+                        value = q_score.get(dim, 0)
+                        if not isinstance(value, (int, float)):
+                            raise TypeError("score is not a number: %r" % value)
+                        row[j, k] = value
+                q_types[i, :len(question_type_list)] = question_type_list
+            except (KeyError, TypeError, AttributeError):
+                valid[i] = False
+                scores[i] = 0
+                q_types[i] = -1
+        return scores, q_types, valid
+
+    def compute(self, scores: np.ndarray, q_types: np.ndarray) -> (np.ndarray, np.ndarray, np.ndarray):
+        """返回 (各维度平均分 [考试数, 维度数], 各维度题目数 [考试数, 维度数], 未取整的总分 [考试数])"""
+        rows = np.where((q_types >= 0) & (q_types < self.pad_row), q_types, self.pad_row)
+        mask = self.mask[rows]  # [考试数, 题目数, 维度数]
+
+        # 按题目顺序逐列累加，保证浮点求和顺序与逐个计算相同
+        sums = np.zeros((scores.shape[0], len(DIMENSIONS)))
+        for j in range(scores.shape[1]):
+            sums += np.where(mask[:, j], scores[:, j], 0.0)
+        counts = mask.sum(axis=1)
+        averages = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+        totals = np.zeros(scores.shape[0])
+        for k, weight in zip(self.weight_order, self.weights):
+            totals += averages[:, k] * weight
+        return averages, counts, totals
+
+    def score_infos(self, exams) -> list:
+        """批量计算 score_info，与 exams 一一对应，无法计算的考试为 None"""
+        scores, q_types, valid = self.pack(exams)
+        averages, counts, totals = self.compute(scores, q_types)
+        averages, counts, totals = averages.tolist(), counts.tolist(), totals.tolist()
+
+        results = []
+        for i in range(len(totals)):
+            if not valid[i]:
+                results.append(None)
+                continue
+            # 没有题目的维度平均分为 0（整数），与 compute_exam_score 相同
+            info = {key: averages[i][DIMENSIONS.index(dim)] if counts[i][DIMENSIONS.index(dim)] else 0
+                    for dim, key in SCORE_INFO_KEYS.items()}
+            info['total'] = round(totals[i], 6)
+            results.append(info)
+        return results
+
+
+score_engine = ScoreEngine()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 维护 exam_summary 集合（考试记录摘要），使获取历史成绩列表只需一次索引查询
+
+import logging
+
+from pymongo import UpdateOne
+
+from model.exam import CurrentTestModel, HistoryTestModel, ExamSummaryModel
+
+
+# 新建考试时添加摘要
+def add_exam(test: CurrentTestModel):
+    ExamSummaryModel.objects(exam_id=str(test.id)).update_one(
+        set__user_id=test.user_id, set__paper_tpl_id=test.paper_tpl_id,
+        set__test_start_time=test.test_start_time, set__score_info=test.score_info or {},
+        upsert=True
+    )
+
+
+# 首次计算出成绩时更新摘要
+def update_score(exam_id: str, score_info: dict):
+    ExamSummaryModel.objects(exam_id=exam_id).update_one(set__score_info=score_info)
+
+
+# 批量更新成绩，scores: {exam_id: score_info}
+def update_scores(scores: dict):
+    if not scores:
+        return
+    requests = [UpdateOne({'_id': exam_id}, {'$set': {'score_info': score_info}}) for exam_id, score_info in scores.items()]
+    ExamSummaryModel._get_collection().bulk_write(requests, ordered=False)
+
+
+# 考试从 current 移入 history 时更新摘要
+def mark_archived(exam_id: str):
+    ExamSummaryModel.objects(exam_id=exam_id).update_one(set__archived=True)
+
+
+def list_exams(user_id: str, template_id: str = None):
+    """按开始时间升序返回用户的考试摘要"""
+    if template_id:
+        summaries = ExamSummaryModel.objects(user_id=user_id, paper_tpl_id=template_id)
+    else:
+        summaries = ExamSummaryModel.objects(user_id=user_id)
+    return summaries.order_by('test_start_time')
+
+
+def _summary_update(exam_id, test: dict, archived: bool) -> UpdateOne:
+    return UpdateOne({'_id': exam_id}, {'$set': {
+        'user_id': test.get('user_id'),
+        'paper_tpl_id': test.get('paper_tpl_id'),
+        'test_start_time': test.get('test_start_time'),
+        'score_info': test.get('score_info') or {},
+        'archived': archived,
+    }}, upsert=True)
+
+
+def rebuild(user_id: str = None, batch_size: int = 1000) -> int:
+    """
+    根据 history 和 current 重建摘要（可重复执行），返回处理的考试数
+
+    先处理 history 再处理 current，同一场考试以 current 中的数据为准
+    """
+    query = {'user_id': user_id} if user_id else {}
+    fields = ('user_id', 'paper_tpl_id', 'test_start_time', 'score_info')
+    collection = ExamSummaryModel._get_collection()
+    sources = [
+        (HistoryTestModel.objects(__raw__=query).only('current_id', *fields), 'current_id', True),
+        (CurrentTestModel.objects(__raw__=query).only(*fields), '_id', False),
+    ]
+
+    count = 0
+    for queryset, id_field, archived in sources:
+        requests = []
+        for test in queryset.as_pymongo().batch_size(batch_size):
+            if not test.get(id_field):
+                continue
+            requests.append(_summary_update(str(test[id_field]), test, archived))
+            if len(requests) >= batch_size:
+                collection.bulk_write(requests, ordered=False)
+                count += len(requests)
+                requests = []
+        if requests:
+            collection.bulk_write(requests, ordered=False)
+            count += len(requests)
+        logging.info("[rebuild] exam summary rebuilt from %s, total: %d" % (queryset._document._meta['collection'], count))
+    return count
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 试卷模板的进程内缓存：模板很少修改，但每次开始考试都要读取
+
+import logging
+import threading
+import time
+
+from config import ExamConfig
+from model.cache_version import CacheVersionModel
+from model.paper_template import PaperTemplate
+
+
+class MongoVersionSource(object):
+    """版本号保存在数据库 cache_version 集合中，用于跨进程通知缓存失效"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get(self) -> int:
+        doc = CacheVersionModel.objects(name=self.name).first()
+        return doc.version if doc else 0
+
+    def bump(self):
+        CacheVersionModel.objects(name=self.name).update_one(inc__version=1, upsert=True)
+
+
+class LocalVersionSource(object):
+    """进程内版本号，可在测试或单进程部署中代替 MongoVersionSource"""
+
+    def __init__(self):
+        self.version = 0
+
+    def get(self) -> int:
+        return self.version
+
+    def bump(self):
+        self.version += 1
+
+
+class TemplateCache(object):
+    """
+    read-through 缓存：按模板 id 缓存 PaperTemplate，并缓存全部模板列表
+
+    本进程修改模板时立即清空缓存并递增版本号；
+    其他进程最多每 check_interval 秒检查一次版本号，发现变化即清空本地缓存
+    每次清空缓存时递增 _generation，读取数据库期间缓存被清空时不保存读到的结果（可能是修改前的模板）
+    """
+
+    def __init__(self, version_source, check_interval=ExamConfig.template_cache_check_interval):
+        self.version_source = version_source
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._templates = {}  # {template_id: PaperTemplate}
+        self._all_templates = None
+        self._version = None
+        self._generation = 0
+        self._checked_at = 0
+
+    def _clear_locked(self):
+        self._templates = {}
+        self._all_templates = None
+        self._generation += 1
+
+    def _check_version(self):
+        now = time.time()
+        if now - self._checked_at < self.check_interval:
+            return
+        version = self.version_source.get()
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    logging.info("[TemplateCache] version changed %s -> %s, clear cache" % (self._version, version))
+                self._clear_locked()
+                self._version = version
+            self._checked_at = now
+
+    def get(self, template_id: str):
+        self._check_version()
+        generation = self._generation
+        tpl = self._templates.get(template_id)
+        if tpl is None:
+            tpl = PaperTemplate.objects(id=template_id).first()
+            if tpl is not None:
+                with self._lock:
+                    if generation == self._generation:
+                        self._templates[template_id] = tpl
+        return tpl
+
+    def list_all(self) -> list:
+        self._check_version()
+        generation = self._generation
+        all_templates = self._all_templates
+        if all_templates is None:
+            all_templates = list(PaperTemplate.objects())
+            with self._lock:
+                if generation == self._generation:
+                    self._all_templates = all_templates
+        return all_templates
+
+    def invalidate(self):
+        with self._lock:
+            self._clear_locked()
+        self.version_source.bump()
+
+
+template_cache = TemplateCache(MongoVersionSource(PaperTemplate._meta['collection']))
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 用户服务相关的数据获取，带短时缓存，避免同一用户连续创建考试时重复调用 getUserInfo
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from client import user_client, user_thrift
+from config import ExamConfig
+from errors import InternalError
+from metrics import dependency_timer
+
+_history_cache = OrderedDict()  # {user_id: (expire_time, question_history)}，按写入先后排列
+_cache_lock = threading.Lock()
+
+
+def get_question_history(user_id: str) -> frozenset:
+    """获取用户做过的题目 id 集合（缓存 ExamConfig.user_history_cache_ttl 秒）"""
+    now = time.time()
+    with _cache_lock:
+        cached = _history_cache.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    try:
+        with dependency_timer('user_service', 'getUserInfo'):
+            resp = user_client.getUserInfo(user_thrift.GetUserInfoRequest(
+                userId=user_id
+            ))
+    except Exception as e:  # 连接失败、超时、连接池耗尽等
+        logging.error("[get_question_history] user_client.getUserInfo error, user_id: %s, exception: %s" % (
+            user_id, repr(e)))
+        raise InternalError
+    if resp is None or resp.statusCode != 0:
+        logging.error("[get_question_history] user_client.getUserInfo failed, user_id: %s" % user_id)
+        raise InternalError
+
+    q_history = frozenset(resp.userInfo.questionHistory or [])
+    with _cache_lock:
+        _history_cache[user_id] = (now + ExamConfig.user_history_cache_ttl, q_history)
+        _history_cache.move_to_end(user_id)
+        # 超过上限时淘汰最早写入的项（也是最先过期的）
+        while len(_history_cache) > ExamConfig.user_history_cache_size:
+            _history_cache.popitem(last=False)
+    return q_history
+
+
+def invalidate_question_history(user_id: str = None, added=None):
+    """
+    使指定用户（不指定则全部用户）的题目历史缓存失效
+    added 为用户刚分配到的题目 id 时，已缓存的历史直接并入这些题目而不是丢弃（用户服务此时可能还未记录这些题目），
+    紧接着开始的考试据此避开上一场考试的题目
+    """
+    with _cache_lock:
+        if user_id is None:
+            _history_cache.clear()
+            return
+        cached = _history_cache.pop(user_id, None)
+        if added and cached and cached[0] > time.time():
+            _history_cache[user_id] = (cached[0], cached[1].union(added))
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 进程内的服务指标，以 Prometheus 文本格式在 HTTP 端口（ServerConfig.metrics_port，GET /metrics）输出：
+#   exam_rpc_duration_seconds          各 Thrift 方法的耗时直方图
+#   exam_rpc_responses_total           各方法按响应 statusCode 统计的次数（ErrorWithCode 由 handler 转换为 statusCode），
+#                                      未捕获的异常记为 status_code="exception"
+#   exam_rpc_in_flight                 各方法正在处理的请求数
+#   exam_dependency_duration_seconds   依赖调用的耗时直方图（mongo 各命令、用户服务各方法）
+#   exam_dependency_errors_total       依赖调用失败次数
+#
+# 每次记录只有一次加锁和一次二分查找；pre-fork 模式下每个 worker 各自统计，端口为 metrics_port + worker 序号
+
+import asyncio
+import bisect
+import functools
+import logging
+import threading
+import time
+from collections import Counter
+
+# 直方图的桶上限(秒)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram(object):
+    __slots__ = ('counts', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 各桶（最后一个为 +Inf）的计数，非累计
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+
+def _labels(**labels) -> str:
+    return ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                    for key, value in labels.items())
+
+
+class Metrics(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rpc_latency = {}  # {method: Histogram}
+        self.rpc_responses = Counter()  # {(method, status_code): 次数}
+        self.rpc_in_flight = Counter()  # {method: 正在处理的请求数}
+        self.dependency_latency = {}  # {(dependency, operation): Histogram}
+        self.dependency_errors = Counter()  # {(dependency, operation): 次数}
+
+    def rpc_started(self, method: str):
+        with self._lock:
+            self.rpc_in_flight[method] += 1
+
+    def rpc_finished(self, method: str, seconds: float, status_code):
+        with self._lock:
+            self.rpc_in_flight[method] -= 1
+            histogram = self.rpc_latency.get(method)
+            if histogram is None:
+                histogram = self.rpc_latency[method] = Histogram()
+            histogram.observe(seconds)
+            self.rpc_responses[(method, status_code)] += 1
+
+    def observe_dependency(self, dependency: str, operation: str, seconds: float, error: bool = False):
+        key = (dependency, operation)
+        with self._lock:
+            histogram = self.dependency_latency.get(key)
+            if histogram is None:
+                histogram = self.dependency_latency[key] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                self.dependency_errors[key] += 1
+
+    def instrument(self, handler, iface):
+        """包装 handler 上 iface（Thrift 生成的 Iface）声明的各个方法，同步和 async 方法均可"""
+        for method in [name for name in vars(iface) if not name.startswith('_')]:
+            fn = getattr(handler, method, None)
+            if fn is not None:
+                setattr(handler, method, self._wrap(method, fn))
+        return handler
+
+    def _wrap(self, method: str, fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                self.rpc_started(method)
+                start = time.perf_counter()
+                status_code = 'exception'
+                try:
+                    rsp = await fn(*args, **kwargs)
+                    status_code = getattr(rsp, 'statusCode', None)
+                    return rsp
+                finally:
+                    self.rpc_finished(method, time.perf_counter() - start, status_code)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            self.rpc_started(method)
+            start = time.perf_counter()
+            status_code = 'exception'
+            try:
+                rsp = fn(*args, **kwargs)
+                status_code = getattr(rsp, 'statusCode', None)
+                return rsp
+            finally:
+                self.rpc_finished(method, time.perf_counter() - start, status_code)
+        return wrapper
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        with self._lock:
+            rpc_latency = {method: (list(h.counts), h.sum) for method, h in self.rpc_latency.items()}
+            rpc_responses = dict(self.rpc_responses)
+            rpc_in_flight = dict(self.rpc_in_flight)
+            dependency_latency = {key: (list(h.counts), h.sum) for key, h in self.dependency_latency.items()}
+            dependency_errors = dict(self.dependency_errors)
+
+        lines = []
+        _render_histograms(lines, 'exam_rpc_duration_seconds', 'Latency of Thrift methods.',
+                           {_labels(method=method): value for method, value in sorted(rpc_latency.items())})
+        lines += ['# HELP exam_rpc_responses_total Responses of Thrift methods by statusCode.',
+                  '# TYPE exam_rpc_responses_total counter']
+        for (method, status_code), count in sorted(rpc_responses.items(), key=lambda item: str(item[0])):
+            lines.append('exam_rpc_responses_total{%s} %d' % (_labels(method=method, status_code=status_code), count))
+        lines += ['# HELP exam_rpc_in_flight Requests being handled.', '# TYPE exam_rpc_in_flight gauge']
+        for method, count in sorted(rpc_in_flight.items()):
+            lines.append('exam_rpc_in_flight{%s} %d' % (_labels(method=method), count))
+        _render_histograms(lines, 'exam_dependency_duration_seconds', 'Latency of calls to MongoDB and other services.',
+                           {_labels(dependency=dependency, operation=operation): value
+                            for (dependency, operation), value in sorted(dependency_latency.items())})
+        lines += ['# HELP exam_dependency_errors_total Failed calls to MongoDB and other services.',
+                  '# TYPE exam_dependency_errors_total counter']
+        for (dependency, operation), count in sorted(dependency_errors.items()):
+            lines.append('exam_dependency_errors_total{%s} %d' % (
+                _labels(dependency=dependency, operation=operation), count))
+        return '\n'.join(lines) + '\n'
+
+
+def _render_histograms(lines: list, name: str, description: str, histograms: dict):
+    lines += ['# HELP %s %s' % (name, description), '# TYPE %s histogram' % name]
+    for labels, (counts, total) in histograms.items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), counts):
+            cumulative += count
+            lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, bound, cumulative))
+        lines.append('%s_sum{%s} %.6f' % (name, labels, total))
+        lines.append('%s_count{%s} %d' % (name, labels, cumulative))
+
+
+metrics = Metrics()
+
+
+class DependencyTimer(object):
+    """依赖调用的计时，见 dependency_timer"""
+
+    __slots__ = ('dependency', 'operation', 'start')
+
+    def __init__(self, dependency: str, operation: str):
+        self.dependency = dependency
+        self.operation = operation
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        metrics.observe_dependency(self.dependency, self.operation, time.perf_counter() - self.start,
+                                   exc_type is not None)
+        return False
+
+
+def dependency_timer(dependency: str, operation: str) -> DependencyTimer:
+    """with dependency_timer('user_service', 'getUserInfo'): ...，抛出异常时同时计入失败次数"""
+    return DependencyTimer(dependency, operation)
+
+
+def register_mongo_listener():
+    """通过 pymongo 的命令监听记录每个 mongo 命令的耗时（驱动自身计时），需要在创建连接之前调用"""
+    from pymongo import monitoring
+
+    class _MongoCommandListener(monitoring.CommandListener):
+        def started(self, event):
+            pass
+
+        def succeeded(self, event):
+            metrics.observe_dependency('mongo', event.command_name, event.duration_micros / 1e6)
+
+        def failed(self, event):
+            metrics.observe_dependency('mongo', event.command_name, event.duration_micros / 1e6, True)
+
+    monitoring.register(_MongoCommandListener())
+
+
+def start_http_server(port: int, host: str = '0.0.0.0'):
+    """在后台线程中提供 GET /metrics，返回 HTTPServer；端口被占用等无法监听时只记录警告并返回 None，不影响服务"""
+    import http.server  # 按需加载，http.server 会带入 email 等模块，拖慢冷启动
+    import socketserver
+
+    class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # 不输出每次抓取的访问日志
+            pass
+
+    class MetricsHTTPServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+        allow_reuse_address = True
+
+    try:
+        server = MetricsHTTPServer((host, port), MetricsRequestHandler)
+    except OSError as e:
+        logging.warning("[start_http_server] metrics disabled, cannot listen on %s:%d. exception: %s" % (
+            host, port, repr(e)))
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    logging.info("[start_http_server] metrics on http://%s:%d/metrics" % (host, server.server_address[1]))
+    return server
@@ -0,0 +1,18 @@
+def connect_db():
+    """连接 MongoDB，多进程部署时需要在 fork 之后调用"""
+    import mongoengine
+    from config import MongoConfig
+
+    mongoengine.connect(
+        db=MongoConfig.db,
+        host=MongoConfig.host,
+        port=MongoConfig.port,
+        username=MongoConfig.user,
+        password=MongoConfig.password
+    )
+
+
+def disconnect_db():
+    import mongoengine
+
+    mongoengine.disconnect()
@@ -0,0 +1,30 @@
+# 异步 MongoDB 连接，供 asyncio 模式的服务使用，与 mongoengine 的同步连接相互独立
+#
+# 优先使用 motor（镜像中安装的是支持 python3.6 的 motor 2.5.1），未安装时使用 pymongo(>=4.9, python>=3.8) 自带的 AsyncMongoClient
+
+from config import MongoConfig
+
+_client = None
+
+
+def get_async_db():
+    """返回异步驱动的 database 对象，需要在事件循环中调用（首次调用时创建连接）"""
+    global _client
+    if _client is None:
+        try:
+            from motor.motor_asyncio import AsyncIOMotorClient as client_class
+        except ImportError:
+            from pymongo import AsyncMongoClient as client_class
+
+        _client = client_class(
+            host=MongoConfig.host,
+            port=MongoConfig.port,
+            username=MongoConfig.user,
+            password=MongoConfig.password
+        )
+    return _client[MongoConfig.db]
+
+
+def get_async_collection(document_cls):
+    """mongoengine Document 对应集合的异步 collection 对象"""
+    return get_async_db()[document_cls._get_collection_name()]
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+from mongoengine import *
+
+
+class CacheVersionModel(Document):
+    """
+    进程内缓存的版本号，数据变更时递增，各服务进程据此使本地缓存失效
+    """
+    name = StringField(max_length=64, primary_key=True)
+    version = IntField(default=0)
+
+    meta = {'collection': 'cache_version'}
@@ -72,7 +72,14 @@ class CurrentTestModel(DynamicDocument):
     all_analysed = BooleanField()  # 这个考试中的所有回答是否都被分析过
     # make questions a dict rather than a list so as to be able update one question w/o affecting other questions
 
-    meta = {'collection': 'current'}
+    meta = {
+        'collection': 'current',
+        'indexes': [
+            ('user_id', 'paper_tpl_id', 'test_start_time'),  # 考试记录（指定模板）
+            ('user_id', 'test_start_time'),  # 考试记录（全部）
+        ],
+        'auto_create_index': False,  # 索引由 model.indexes.ensure_indexes() 统一创建
+    }
 
 
 class HistoryTestModel(DynamicDocument):
@@ -92,4 +99,48 @@ class HistoryTestModel(DynamicDocument):
     questions = DictField(default={})
     all_analysed = BooleanField(default=False)  # 这个考试中的所有回答是否都被分析过
 
-    meta = {'collection': 'history'}
+    meta = {
+        'collection': 'history',
+        'indexes': [
+            'current_id',  # 按 current 中的 id 查找已归档的考试
+            ('user_id', 'paper_tpl_id', 'test_start_time'),
+            ('user_id', 'test_start_time'),
+        ],
+        'auto_create_index': False,
+    }
+
+
+class ExamSummaryModel(Document):
+    """
+    exam_summary: 考试记录摘要，每场考试一条，用于快速获取用户的历史成绩列表
+    由 current/history 派生，可通过 `python manage.py rebuild-summary` 重建
+    """
+    exam_id = StringField(max_length=32, primary_key=True)  # current 中的 id，即 history 中的 current_id
+    user_id = StringField(max_length=32, default=None)
+    paper_tpl_id = StringField(max_length=24, default=None)
+    test_start_time = DateTimeField()
+    score_info = DictField(default={})  # 与 current/history 中的 score_info 相同，为空表示尚未计算
+    archived = BooleanField(default=False)  # 是否已移入 history
+
+    meta = {
+        'collection': 'exam_summary',
+        'indexes': [
+            ('user_id', 'paper_tpl_id', 'test_start_time'),
+            ('user_id', 'test_start_time'),
+        ],
+        'auto_create_index': False,
+    }
+
+
+class ExamReportCacheModel(Document):
+    """
+    exam_report_cache: 已出成绩的考试报告缓存，每场考试一条
+    report/score 为 TCompactProtocol 序列化的 ExamReport/ExamScore，score_version 与考试当前成绩不一致时视为失效
+    """
+    exam_id = StringField(max_length=32, primary_key=True)  # current 中的 id，即 history 中的 current_id
+    score_version = StringField(max_length=32)
+    report = BinaryField()
+    score = BinaryField()
+    create_time = DateTimeField(default=lambda: datetime.datetime.utcnow())
+
+    meta = {'collection': 'exam_report_cache'}
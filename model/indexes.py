@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 索引的创建与校验：各集合的索引在 model 的 meta['indexes'] 中声明
+
+import logging
+
+from bson import ObjectId
+
+from model.cache_version import CacheVersionModel
+from model.exam import CurrentTestModel, HistoryTestModel, WavPretestModel, ExamSummaryModel
+from model.paper_template import PaperTemplate
+from model.question import QuestionModel
+
+INDEXED_MODELS = [CurrentTestModel, HistoryTestModel, ExamSummaryModel, QuestionModel, PaperTemplate,
+                  WavPretestModel, CacheVersionModel]
+
+_EXAM_RECORD_SORT = [('test_start_time', 1), ('_id', 1)]
+_HISTORY_RECORD_SORT = [('test_start_time', 1), ('current_id', 1)]
+
+# 服务会发出的查询形态 (名称, model, filter, sort)
+QUERY_SHAPES = [
+    ('current by id', CurrentTestModel, {'_id': ObjectId()}, None),
+    ('current by user', CurrentTestModel, {'user_id': ''}, _EXAM_RECORD_SORT),
+    ('current by user and template', CurrentTestModel, {'user_id': '', 'paper_tpl_id': ''}, _EXAM_RECORD_SORT),
+    ('history by current_id', HistoryTestModel, {'current_id': ''}, None),
+    ('history by user', HistoryTestModel, {'user_id': ''}, _HISTORY_RECORD_SORT),
+    ('history by user and template', HistoryTestModel, {'user_id': '', 'paper_tpl_id': ''}, _HISTORY_RECORD_SORT),
+    ('summary by user', ExamSummaryModel, {'user_id': ''}, [('test_start_time', 1)]),
+    ('summary by user and template', ExamSummaryModel, {'user_id': '', 'paper_tpl_id': ''}, [('test_start_time', 1)]),
+    ('question pool', QuestionModel, {'index': {'$lte': 10000}}, None),
+    ('question by id', QuestionModel, {'_id': {'$in': [ObjectId()]}}, None),
+    ('question claim', QuestionModel, {'index': {'$lte': 10000}, 'q_type': 1, '_id': {'$nin': [ObjectId()]}},
+     [('used_times', 1), ('_id', 1)]),
+    ('paper template by id', PaperTemplate, {'_id': ObjectId()}, None),
+    ('wav test by id', WavPretestModel, {'_id': ObjectId()}, None),
+    ('cache version by name', CacheVersionModel, {'_id': ''}, None),
+]
+
+
+def ensure_indexes():
+    """创建 meta 中声明的索引，已存在的索引不会重复创建"""
+    for model in INDEXED_MODELS:
+        model.ensure_indexes()
+        logging.info("[ensure_indexes] %s: %s" % (model._meta['collection'], model._meta.get('index_specs', [])))
+
+
+def _plan_stages(plan: dict) -> list:
+    stages = [plan['stage']] if 'stage' in plan else []
+    for key in ('inputStage', 'queryPlan', 'winningPlan'):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for sub_plan in plan.get('inputStages', []):
+        stages += _plan_stages(sub_plan)
+    return stages
+
+
+def verify_indexes() -> list:
+    """
+    对每种查询形态执行 explain()，返回 [(名称, 执行计划中的 stage 列表)]
+
+    winning plan 中出现 COLLSCAN 说明缺少对应的索引
+    """
+    result = []
+    for name, model, query, sort in QUERY_SHAPES:
+        cursor = model._get_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        stages = _plan_stages(cursor.explain()['queryPlanner']['winningPlan'])
+        result.append((name, stages))
+    return result
@@ -28,7 +28,14 @@ class QuestionModel(DynamicDocument):
     feedback_downs = IntField(default=0)
     feedback_likes = IntField(default=0)
 
-    meta = {'collection': 'questions'}
+    meta = {
+        'collection': 'questions',
+        'indexes': [
+            ('index', 'q_type', 'used_times'),  # 选题：题号<=10000，按题型和使用次数
+            ('q_type', 'used_times', '_id'),  # 原子占用题目：按题型取使用次数最少的题目
+        ],
+        'auto_create_index': False,
+    }
 
     def __str__(self):
         return "{id:%s,text:%s,level:%s,q_type:%s,used_times:%s,wordbase:%s}" % (
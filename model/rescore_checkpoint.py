@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import datetime
+
+from mongoengine import *
+
+
+class RescoreCheckpointModel(Document):
+    """
+    批量重算成绩任务（manager.rescore_manager）的断点，每个任务的每个集合一条
+    last_id 之前（含）的考试已处理完成，续跑时从 last_id 之后开始
+    """
+    key = StringField(max_length=128, primary_key=True)  # <job_id>:<collection>
+    job_id = StringField(max_length=64)
+    collection_name = StringField(max_length=32)
+    last_id = ObjectIdField(default=None)
+    scanned = IntField(default=0)
+    changed = IntField(default=0)
+    skipped = IntField(default=0)  # 还在作答或评分中，不计算成绩
+    failed = IntField(default=0)  # 数据异常无法计算成绩
+    finished = BooleanField(default=False)
+    update_time = DateTimeField(default=lambda: datetime.datetime.utcnow())
+
+    meta = {'collection': 'rescore_checkpoint'}
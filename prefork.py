@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 多进程（pre-fork）启动器：父进程只负责管理，N 个 worker 进程各自处理请求，以利用多核
+#
+# 信号:
+#   SIGTERM/SIGINT  通知所有 worker 退出（worker 停止接受新连接，等待进行中的请求，最多 graceful_timeout 秒）
+#   SIGHUP          逐个重启 worker（先启动新 worker，再停止旧 worker）
+#                   worker 由 master fork 而来，更新代码仍需重启 master
+
+import atexit
+import itertools
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+
+class PreforkLauncher(object):
+    """
+    serve_fn(listen_socket) 在 worker 进程中执行，不应返回，listen_socket 为已经在监听的 socket：
+        share_mode='reuseport': 每个 worker 各自以 SO_REUSEPORT 监听端口，由内核在 worker 间分配连接
+        share_mode='shared': 所有 worker 共用 master 在 fork 前创建的监听 socket
+    数据库连接等不能跨 fork 使用的资源应在 serve_fn 中初始化
+    is_idle() 返回 worker 是否没有正在处理的请求，worker 退出时据此等待进行中的请求
+    worker 进程中 worker_index 为该 worker 的序号（未被其他存活 worker 使用的最小序号，通常为 0 ~ workers - 1，
+    滚动重启时新 worker 先于旧 worker 启动，序号会更大），可用于区分各 worker 的端口等资源
+    """
+
+    def __init__(self, serve_fn, workers: int, host: str, port: int, share_mode: str = 'reuseport',
+                 graceful_timeout: int = 30, is_idle=lambda: True):
+        if share_mode not in ('reuseport', 'shared'):
+            raise ValueError("share_mode must be 'reuseport' or 'shared'")
+        self.serve_fn = serve_fn
+        self.workers = workers
+        self.host = host
+        self.port = port
+        self.share_mode = share_mode
+        self.graceful_timeout = graceful_timeout
+        self.is_idle = is_idle
+        self.listen_socket = None
+        self._children = {}  # {pid: start_time}
+        self._indexes = {}  # {pid: worker_index}
+        self.worker_index = None
+        self._stopping = False
+        self._reload = False
+
+    def _spawn(self):
+        used = set(self._indexes.values())
+        index = next(i for i in itertools.count() if i not in used)
+        pid = os.fork()
+        if pid:
+            self._children[pid] = time.time()
+            self._indexes[pid] = index
+            return pid
+
+        # worker 进程
+        self.worker_index = index
+        for sig in (signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, self._worker_stop)
+        listen_socket = self.listen_socket or self._listen(reuse_port=True)
+        code = 0
+        try:
+            self.serve_fn(listen_socket)
+        except SystemExit as e:  # SIGTERM
+            code = e.code or 0
+            listen_socket.close()
+            deadline = time.time() + self.graceful_timeout
+            while not self.is_idle() and time.time() < deadline:
+                time.sleep(0.1)
+        except Exception:
+            logging.exception("[prefork] worker %d crashed" % os.getpid())
+            code = 1
+        finally:
+            self._exit(code)
+
+    def _listen(self, reuse_port: bool) -> socket.socket:
+        family, socktype, proto, _, addr = socket.getaddrinfo(
+            self.host, self.port, socket.AF_UNSPEC, socket.SOCK_STREAM, 0, socket.AI_PASSIVE)[0]
+        sock = socket.socket(family, socktype, proto)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(addr)
+        sock.listen(128)
+        return sock
+
+    @staticmethod
+    def _worker_stop(signum, frame):
+        """worker 收到 SIGTERM：退出 accept 循环，不再接受新连接"""
+        logging.info("[prefork] worker %d stopping" % os.getpid())
+        raise SystemExit(0)
+
+    @staticmethod
+    def _exit(code):
+        try:
+            atexit._run_exitfuncs()  # 例如写入内存中累计的题目使用次数
+        finally:
+            logging.shutdown()
+            os._exit(code)
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload(self, signum, frame):
+        self._reload = True
+
+    def _rolling_restart(self):
+        logging.info("[prefork] rolling restart of %d workers" % len(self._children))
+        for old_pid in list(self._children):
+            self._spawn()
+            time.sleep(1)  # 等待新 worker 开始监听
+            self._kill(old_pid, signal.SIGTERM)
+
+    @staticmethod
+    def _kill(pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> list:
+        exited = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if not pid:
+                break
+            self._indexes.pop(pid, None)
+            if self._children.pop(pid, None) is not None:
+                exited.append((pid, status))
+        return exited
+
+    def run(self):
+        if self.share_mode == 'shared':
+            self.listen_socket = self._listen(reuse_port=False)
+
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        for _ in range(self.workers):
+            self._spawn()
+        logging.info("[prefork] master %d started %d workers on port %d (%s)" % (
+            os.getpid(), self.workers, self.port, self.share_mode))
+
+        while not self._stopping:
+            if self._reload:
+                self._reload = False
+                self._rolling_restart()
+            for pid, status in self._reap():
+                log = logging.info if status == 0 else logging.warning
+                log("[prefork] worker %d exited with status %d" % (pid, status))
+            # worker 异常退出时补齐，过于频繁时降低重启速度
+            while not self._stopping and len(self._children) < self.workers:
+                recent = [t for t in self._children.values() if time.time() - t < 1]
+                if len(recent) >= self.workers:
+                    break
+                self._spawn()
+            time.sleep(0.5)
+
+        logging.info("[prefork] stopping %d workers" % len(self._children))
+        for pid in list(self._children):
+            self._kill(pid, signal.SIGTERM)
+        deadline = time.time() + self.graceful_timeout + 5
+        while self._children and time.time() < deadline:
+            self._reap()
+            time.sleep(0.2)
+        for pid in list(self._children):
+            self._kill(pid, signal.SIGKILL)
+        sys.exit(0)
@@ -5,17 +5,26 @@ project_folder = os.path.abspath(__file__).split('/server.py')[0]
 sys.path.append(os.path.join(project_folder, 'expression'))
 sys.path.append(os.path.join(project_folder, 'gen-py'))
 
+import argparse
 import logging
+import signal
+import time
 
-import mongoengine
-from config import MongoConfig
 from exam import ExamService
 from exam.ttypes import *
 from thrift.transport import TSocket
-from thrift.transport import TTransport
-from thrift.protocol import TBinaryProtocol
 from thrift.server import TServer
+import aio_handler
 import handler
+from client import user_client_pool
+from metrics import metrics, register_mongo_listener, start_http_server
+from prefork import PreforkLauncher
+from servers import TAsyncioServer, TBoundedThreadPoolServer, TInheritedServerSocket, inflight_tracker, \
+    describe_codec, make_protocol_factory, make_transport_factory
+from config import MongoConfig, ServerConfig
+from model import connect_db, disconnect_db
+from model.indexes import ensure_indexes
+from util import init_logging
 
 
 class ExamServiceHandler:
@@ -56,30 +65,124 @@ class ExamServiceHandler:
     def savePaperTemplate(self, request: SavePaperTemplateRequest) -> SavePaperTemplateResponse:
         return handler.save_paper_template(request)
 
+    def getExamResults(self, request: GetExamResultsRequest) -> GetExamResultsResponse:
+        return handler.get_exam_results(request)
+
+    def computeExamScores(self, request: ComputeExamScoresRequest) -> ComputeExamScoresResponse:
+        return handler.compute_exam_scores(request)
+
+
+class AsyncExamServiceHandler(ExamServiceHandler):
+    """asyncio 模式的 handler：以下接口使用异步 Mongo 驱动，其余接口沿用同步实现，由 TAsyncioServer 放到线程池中执行"""
+
+    async def getExamReport(self, request: GetExamReportRequest) -> GetExamReportResponse:
+        return await aio_handler.get_exam_report(request)
+
+    async def getQuestionInfo(self, request: GetQuestionInfoRequest) -> GetQuestionInfoResponse:
+        return await aio_handler.get_question_info(request)
+
+    async def getFileUploadPath(self, request: GetFileUploadPathRequest) -> GetFileUploadPathResponse:
+        return await aio_handler.get_file_upload_path(request)
+
+
+def _stop(signum, frame):
+    """单进程模式收到 SIGTERM（如 docker stop）：退出 accept 循环，之后正常退出以执行 atexit"""
+    logging.info("[server] stopping, %d requests in flight" % inflight_tracker.count)
+    raise SystemExit(0)
+
+
+def resolve_transport_type(mode, transport_type=ServerConfig.transport):
+    if transport_type is None:
+        return 'framed' if mode == 'asyncio' else 'buffered'
+    if mode == 'asyncio' and transport_type != 'framed':
+        raise ValueError("asyncio mode only supports framed transport")
+    return transport_type
+
+
+def build_server(mode=ServerConfig.mode, transport=None, transport_type=ServerConfig.transport,
+                 protocol=ServerConfig.protocol):
+    if transport is None:
+        transport = TSocket.TServerSocket(host=ServerConfig.host, port=ServerConfig.port)
+    transport_type = resolve_transport_type(mode, transport_type)
+    pfactory = make_protocol_factory(protocol)
+    if mode == 'asyncio':
+        exam_handler = metrics.instrument(AsyncExamServiceHandler(), ExamService.Iface)
+        return TAsyncioServer(ExamService, exam_handler, transport, pfactory,
+                              max_workers=ServerConfig.pool_size, graceful_timeout=ServerConfig.graceful_timeout,
+                              tracker=inflight_tracker)
+
+    exam_handler = metrics.instrument(ExamServiceHandler(), ExamService.Iface)
+    processor = inflight_tracker.track(ExamService.Processor(exam_handler))
+    tfactory = make_transport_factory(transport_type)
+
+    if mode == 'threaded':
+        return TServer.TThreadedServer(processor, transport, tfactory, pfactory, daemon=True)
+    elif mode == 'pool':
+        return TBoundedThreadPoolServer(
+            processor, transport, tfactory, pfactory, daemon=True,
+            pool_size=ServerConfig.pool_size, queue_size=ServerConfig.queue_size,
+            reject_policy=ServerConfig.reject_policy, client_timeout=ServerConfig.client_timeout
+        )
+    else:
+        raise ValueError("unknown server mode: %s" % mode)
+
 
 if __name__ == '__main__':
-    # init mongo
-    mongoengine.connect(
-        db=MongoConfig.db,
-        host=MongoConfig.host,
-        port=MongoConfig.port,
-        username=MongoConfig.user,
-        password=MongoConfig.password
-    )
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--mode', choices=['threaded', 'pool', 'asyncio'], default=ServerConfig.mode)
+    parser.add_argument('--port', type=int, default=ServerConfig.port)
+    parser.add_argument('--transport', choices=['buffered', 'framed'], default=ServerConfig.transport,
+                        help='default: framed in asyncio mode, otherwise buffered')
+    parser.add_argument('--protocol', choices=['binary', 'compact'], default=ServerConfig.protocol)
+    parser.add_argument('--workers', type=int, default=ServerConfig.workers, help='number of worker processes')
+    parser.add_argument('--share-mode', choices=['reuseport', 'shared'], default=ServerConfig.share_mode,
+                        help='how worker processes share the listening port')
+    args = parser.parse_args()
+    args.transport = resolve_transport_type(args.mode, args.transport)
 
     # init logging
-    LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
-    DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
-    logging.basicConfig(level=logging.DEBUG, format=LOG_FORMAT, datefmt=DATE_FORMAT)
+    init_logging()
+
+    # init mongo
+    register_mongo_listener()
+    connect_db()
+    if MongoConfig.ensure_indexes:
+        ensure_indexes()
 
     # init thrift server
-    exam_handler = ExamServiceHandler()
-    processor = ExamService.Processor(exam_handler)
-    transport = TSocket.TServerSocket(host='0.0.0.0', port=9091)
-    tfactory = TTransport.TBufferedTransportFactory()
-    pfactory = TBinaryProtocol.TBinaryProtocolFactory()
-
-    # server = TServer.TSimpleServer(processor, transport, tfactory, pfactory)
-    # You could do one of these for a multithreaded server
-    server = TServer.TThreadedServer(processor, transport, tfactory, pfactory)
-    server.serve()
+    if args.workers <= 1:
+        server = build_server(args.mode, TSocket.TServerSocket(host=ServerConfig.host, port=args.port),
+                              args.transport, args.protocol)
+        if ServerConfig.metrics_port is not None:
+            start_http_server(ServerConfig.metrics_port)
+        logging.info("[server] serving on port %d, mode: %s, codec: %s" % (
+            args.port, args.mode, describe_codec(args.transport, args.protocol)))
+        if args.mode != 'asyncio':  # asyncio 模式由 TAsyncioServer 处理 SIGTERM
+            signal.signal(signal.SIGTERM, _stop)
+        try:
+            server.serve()
+        except SystemExit:
+            # 等待正在处理的请求完成，退出时 atexit 写入内存中累计的题目使用次数（默认的 SIGTERM 处理会直接丢弃）
+            server.serverTransport.close()
+            deadline = time.time() + ServerConfig.graceful_timeout
+            while inflight_tracker.count and time.time() < deadline:
+                time.sleep(0.1)
+            raise
+    else:
+        # mongo 连接和用户服务的连接不能跨 fork 使用，每个 worker 重新连接
+        disconnect_db()
+        user_client_pool.close()
+
+        def serve(listen_socket):
+            init_logging()  # 日志输出线程不会被 fork 继承
+            connect_db()
+            server = build_server(args.mode, TInheritedServerSocket(listen_socket), args.transport, args.protocol)
+            if ServerConfig.metrics_port is not None:
+                start_http_server(ServerConfig.metrics_port + launcher.worker_index)
+            logging.info("[server] worker %d serving on port %d, mode: %s, codec: %s" % (
+                os.getpid(), args.port, args.mode, describe_codec(args.transport, args.protocol)))
+            server.serve()
+
+        launcher = PreforkLauncher(serve, args.workers, ServerConfig.host, args.port, args.share_mode,
+                                   ServerConfig.graceful_timeout, is_idle=lambda: inflight_tracker.count == 0)
+        launcher.run()
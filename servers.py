@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# Thrift server 的扩展实现
+
+import asyncio
+import functools
+import logging
+import queue
+import signal
+import socket
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from thrift.Thrift import TApplicationException, TMessageType, TType
+from thrift.protocol import TBinaryProtocol, TCompactProtocol
+from thrift.server import TServer
+from thrift.transport import TSocket, TTransport
+
+try:
+    from thrift.protocol import fastbinary  # thrift 的 C 扩展，编解码整个 struct
+except ImportError:
+    fastbinary = None
+
+try:
+    _current_task = asyncio.current_task
+except AttributeError:  # python3.6
+    _current_task = asyncio.Task.current_task
+
+TRANSPORT_FACTORIES = {
+    'buffered': TTransport.TBufferedTransportFactory,
+    'framed': TTransport.TFramedTransportFactory,
+}
+
+# {protocol: (纯 Python 实现, C 扩展加速实现)}，加速实现要求 transport 为 buffered/framed/memory buffer
+PROTOCOL_FACTORIES = {
+    'binary': (TBinaryProtocol.TBinaryProtocolFactory, TBinaryProtocol.TBinaryProtocolAcceleratedFactory),
+    'compact': (TCompactProtocol.TCompactProtocolFactory, TCompactProtocol.TCompactProtocolAcceleratedFactory),
+}
+
+
+def make_transport_factory(transport: str):
+    return TRANSPORT_FACTORIES[transport]()
+
+
+class _FastbinaryProbe(object):
+    thrift_spec = (None, (1, TType.STRING, 'value', 'UTF8', None, ), )
+
+    def __init__(self, value=None):
+        self.value = value
+
+
+_fastbinary_usable = None
+
+
+def fastbinary_usable() -> bool:
+    """
+    fastbinary 能否正常编解码（结果缓存）
+
+    旧版 thrift 的 C 扩展在 Python 3.10 及以上版本可以导入，但解码时会抛出 SystemError，因此实际编解码一次来判断
+    """
+    global _fastbinary_usable
+    if _fastbinary_usable is None:
+        _fastbinary_usable = fastbinary is not None
+        for _, fast in PROTOCOL_FACTORIES.values():
+            if not _fastbinary_usable:
+                break
+            try:
+                buf = TTransport.TMemoryBuffer()
+                probe = _FastbinaryProbe('探测')
+                buf.write(fast(fallback=False).getProtocol(buf)._fast_encode(probe, [_FastbinaryProbe, probe.thrift_spec]))
+                # 通过 TBufferedTransport 读取，覆盖 C 扩展向 transport 请求补充数据(cstringio_refill)的路径
+                iprot = fast(fallback=False).getProtocol(
+                    TTransport.TBufferedTransport(TTransport.TMemoryBuffer(buf.getvalue())))
+                decoded = _FastbinaryProbe()
+                iprot._fast_decode(decoded, iprot, [_FastbinaryProbe, decoded.thrift_spec])
+                _fastbinary_usable = decoded.value == probe.value
+            except Exception as e:
+                logging.warning("[fastbinary_usable] thrift C extension is not usable: %r" % e)
+                _fastbinary_usable = False
+    return _fastbinary_usable
+
+
+def make_protocol_factory(protocol: str, accelerated: bool = None):
+    """accelerated 为 None 时，fastbinary 可用则使用加速实现"""
+    if accelerated is None:
+        accelerated = fastbinary_usable()
+    if accelerated and fastbinary is None:
+        raise ValueError("thrift C extension (fastbinary) is not available")
+    plain, fast = PROTOCOL_FACTORIES[protocol]
+    return fast(fallback=False) if accelerated else plain()
+
+
+def describe_codec(transport: str, protocol: str, accelerated: bool = None) -> str:
+    if accelerated is None:
+        accelerated = fastbinary_usable()
+    return "%s/%s (%s)" % (transport, protocol, 'fastbinary' if accelerated else 'pure python')
+
+
+class TBoundedThreadPoolServer(TServer.TThreadPoolServer):
+    """
+    固定数量工作线程 + 有界等待队列的线程池 server
+
+    TThreadedServer 每个连接启动一个线程且没有上限，TThreadPoolServer 的等待队列也没有上限；
+    这里等待队列满时按 reject_policy 处理新连接：
+        'block': accept 线程阻塞直到队列有空位（新连接积压在内核 backlog 中）
+        'close': 直接关闭新连接
+    client_timeout 不为 None 时为每个连接设置读写超时(秒)，避免空闲连接长期占用工作线程
+    """
+
+    def __init__(self, *args, pool_size=32, queue_size=64, reject_policy='block', client_timeout=None, **kwargs):
+        TServer.TThreadPoolServer.__init__(self, *args, **kwargs)
+        if reject_policy not in ('block', 'close'):
+            raise ValueError("reject_policy must be 'block' or 'close'")
+        self.setNumThreads(pool_size)
+        self.clients = queue.Queue(maxsize=queue_size)
+        self.reject_policy = reject_policy
+        self.client_timeout = client_timeout
+        self.rejected = 0
+        self._busy = 0
+        self._busy_lock = threading.Lock()
+
+    def stats(self) -> dict:
+        return {'threads': self.threads, 'busy': self._busy, 'queued': self.clients.qsize(),
+                'queue_size': self.clients.maxsize, 'rejected': self.rejected}
+
+    def serveClient(self, client):
+        with self._busy_lock:
+            self._busy += 1
+        try:
+            TServer.TThreadPoolServer.serveClient(self, client)
+        finally:
+            with self._busy_lock:
+                self._busy -= 1
+
+    def serve(self):
+        for i in range(self.threads):
+            t = threading.Thread(target=self.serveThread, name='thrift-worker-%d' % i)
+            t.daemon = self.daemon
+            t.start()
+
+        self.serverTransport.listen()
+        while True:
+            try:
+                client = self.serverTransport.accept()
+                if not client:
+                    continue
+                if self.client_timeout is not None:
+                    client.setTimeout(self.client_timeout * 1000)
+                if self.reject_policy == 'block':
+                    self.clients.put(client)
+                    continue
+                try:
+                    self.clients.put_nowait(client)
+                except queue.Full:
+                    self.rejected += 1
+                    logging.warning("[TBoundedThreadPoolServer] queue full, connection rejected. stats: %s"
+                                    % self.stats())
+                    client.close()
+            except KeyboardInterrupt:
+                raise
+            except Exception as x:
+                logging.exception(x)
+
+
+class TAsyncioServer(object):
+    """
+    基于 asyncio 的 Thrift server，只支持 TFramedTransport（每个消息前有 4 字节长度），一个进程可以保持大量连接
+
+    service 为生成代码中的服务模块（如 exam.ExamService），用其中的 xxx_args / xxx_result 编解码
+    handler 中的协程方法直接在事件循环中执行；普通方法放到线程池中执行（max_workers 个线程）
+    同一连接上的请求按顺序处理，不同连接之间并发
+    收到 SIGTERM 后停止接受新连接，等待进行中的请求（最多 graceful_timeout 秒）后返回
+    tracker 为统计进行中请求数的 InflightTracker，默认每个 server 单独统计
+    """
+
+    def __init__(self, service, handler, transport, protocol_factory=None, max_workers=32,
+                 max_frame_size=16 * 1024 * 1024, graceful_timeout=30, tracker=None):
+        self.service = service
+        self.handler = handler
+        self.transport = transport
+        self.protocol_factory = protocol_factory or make_protocol_factory('binary')
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_frame_size = max_frame_size
+        self.graceful_timeout = graceful_timeout
+        self.tracker = tracker or InflightTracker()
+        self._connections = {}  # {task: writer}
+
+    @property
+    def inflight(self) -> int:
+        return self.tracker.count
+
+    def serve(self):
+        self.transport.listen()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self._serve())
+        finally:
+            self.executor.shutdown(wait=False)
+            loop.close()
+
+    async def _serve(self):
+        server = await asyncio.start_server(self._handle_connection, sock=self.transport.handle)
+        stopping = asyncio.Event()
+        asyncio.get_event_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+        await stopping.wait()
+
+        logging.info("[TAsyncioServer] stopping, %d requests in flight" % self.inflight)
+        server.close()
+        deadline = time.time() + self.graceful_timeout
+        while self.inflight and time.time() < deadline:
+            await asyncio.sleep(0.1)
+        # 关闭剩余连接，连接上的读取随之结束（包括停止前已 accept 但尚未开始处理的连接）
+        await asyncio.sleep(0)
+        while self._connections:
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+
+    async def _handle_connection(self, reader, writer):
+        task = _current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                size, = struct.unpack('!i', await reader.readexactly(4))
+                if size < 0 or size > self.max_frame_size:
+                    logging.error("[TAsyncioServer] invalid frame size %d, closing connection" % size)
+                    break
+                reply = await self._process(await reader.readexactly(size))
+                writer.write(struct.pack('!i', len(reply)) + reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):  # 客户端关闭连接
+            pass
+        except Exception:
+            logging.exception("[TAsyncioServer] connection error")
+        finally:
+            writer.close()
+            self._connections.pop(task, None)
+
+    async def _process(self, frame: bytes) -> bytes:
+        iprot = self.protocol_factory.getProtocol(TTransport.TMemoryBuffer(frame))
+        name, _, seqid = iprot.readMessageBegin()
+        args_cls = getattr(self.service, name + '_args', None)
+        method = getattr(self.handler, name, None)
+        if args_cls is None or method is None:
+            iprot.skip(TType.STRUCT)
+            iprot.readMessageEnd()
+            result = TApplicationException(TApplicationException.UNKNOWN_METHOD, 'Unknown function %s' % name)
+            return self._encode(name, TMessageType.EXCEPTION, seqid, result)
+
+        args = args_cls()
+        args.read(iprot)
+        iprot.readMessageEnd()
+        call_args = [getattr(args, spec[2]) for spec in args_cls.thrift_spec if spec]
+
+        result = getattr(self.service, name + '_result')()
+        self.tracker.started()
+        try:
+            if asyncio.iscoroutinefunction(method):
+                result.success = await method(*call_args)
+            else:
+                result.success = await asyncio.get_event_loop().run_in_executor(
+                    self.executor, functools.partial(method, *call_args))
+            msg_type = TMessageType.REPLY
+        except TApplicationException as ex:
+            logging.exception('TApplication exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = ex
+        except Exception:
+            logging.exception('Unexpected exception in handler')
+            msg_type = TMessageType.EXCEPTION
+            result = TApplicationException(TApplicationException.INTERNAL_ERROR, 'Internal error')
+        finally:
+            self.tracker.finished()
+        return self._encode(name, msg_type, seqid, result)
+
+    def _encode(self, name, msg_type, seqid, result) -> bytes:
+        buf = TTransport.TMemoryBuffer()
+        oprot = self.protocol_factory.getProtocol(buf)
+        oprot.writeMessageBegin(name, msg_type, seqid)
+        result.write(oprot)
+        oprot.writeMessageEnd()
+        return buf.getvalue()
+
+
+class TInheritedServerSocket(TSocket.TServerSocket):
+    """
+    使用已经在监听的 socket（如 pre-fork 模式下由启动器创建），listen() 不再重新 bind
+    """
+
+    def __init__(self, listen_socket: socket.socket):
+        host, port = listen_socket.getsockname()[:2]
+        TSocket.TServerSocket.__init__(self, host=host, port=port)
+        self._listen_socket = listen_socket
+
+    def listen(self):
+        self.handle = self._listen_socket
+
+
+class InflightTracker(object):
+    """统计正在处理的请求数（已读到请求、尚未写完响应），用于 worker 平滑退出"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def track(self, processor):
+        """包装 Thrift Processor 中的各个 process_xxx 方法"""
+        for name, process_fn in list(processor._processMap.items()):
+            processor._processMap[name] = self._wrap(process_fn)
+        return processor
+
+    def started(self):
+        with self._lock:
+            self.count += 1
+
+    def finished(self):
+        with self._lock:
+            self.count -= 1
+
+    def _wrap(self, process_fn):
+        def wrapper(*args, **kwargs):
+            self.started()
+            try:
+                return process_fn(*args, **kwargs)
+            finally:
+                self.finished()
+        return wrapper
+
+
+inflight_tracker = InflightTracker()
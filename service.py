@@ -1,30 +1,41 @@
 import datetime
 import json
 import logging
-import random
-import time
 
-import Levenshtein
+from bson import ObjectId
 from mongoengine import ValidationError
 
 import util
 from config import ExamConfig
 from errors import *
-from manager import exam_manager, report_manager
+from manager import exam_manager, report_manager, summary_manager
 from exam.ttypes import *
 from manager.exam_manager import ExamType
+from manager.report_cache import report_cache, score_version
+from manager.template_cache import template_cache
 from model.exam import HistoryTestModel, CurrentTestModel, WavPretestModel
 from model.paper_template import PaperTemplate
 
+EPOCH = datetime.datetime(1970, 1, 1)
+
 
 def get_exam_report(exam_id) -> (ExamReport, ExamScore):
     try:
-        test = exam_manager.get_exam_by_id(exam_id)
+        cached = get_cached_report(exam_id)
+        if cached:
+            return cached
+        test = exam_manager.get_exam_by_id(exam_id, 'report')
         if test is None:
             raise ExamNotExist
     except ValidationError:
         raise InvalidParam
 
+    cacheable = report_cacheable(test)
+    if cacheable:  # 进程内缓存未命中，再查 exam_report_cache
+        cached = report_cache.get(exam_id, score_version(test['score_info']))
+        if cached:
+            return cached
+
     questions = test['questions']
     handling, score, feature = exam_manager.get_score_and_feature(questions)
     if handling:
@@ -39,12 +50,38 @@ def get_exam_report(exam_id) -> (ExamReport, ExamScore):
             structure=test['score_info']['结构'],
             logic=test['score_info']['逻辑']
         )
+        if cacheable:
+            cache_report(exam_id, test['score_info'], report, score)
         return report, score
 
 
+def get_cached_report(exam_id: str):
+    """
+    进程内缓存中有报告的考试直接返回 (ExamReport, ExamScore)，只需读取考试的 score_info 校验成绩版本
+    没有缓存或成绩已变化（如重新评分）时返回 None；exam_report_cache 在读出考试、确认可以缓存之后才查询（见 report_cacheable）
+    """
+    entry = report_cache.lookup(exam_id, persist=False)
+    if entry is None:
+        return None
+    version, report, score = entry
+    test = exam_manager.get_exam_by_id(exam_id, 'score_info')
+    if test is None or not test.score_info or score_version(test.score_info) != version:
+        return None
+    return report, score
+
+
+def report_cacheable(test) -> bool:
+    """考试已结束且已出成绩时报告不再变化，才可以缓存（进行中的考试可能已提前计算了 score_info）"""
+    return bool(test['score_info']) and exam_manager.exam_finished(test)
+
+
+def cache_report(exam_id: str, score_info: dict, report: ExamReport, score: ExamScore):
+    report_cache.put(exam_id, score_version(score_info), report, score)
+
+
 def compute_exam_score(exam_id) -> ExamScore:
     try:
-        test = exam_manager.get_exam_by_id(exam_id)
+        test = exam_manager.get_exam_by_id(exam_id, 'score')
         if test is None:
             raise ExamNotExist
     except ValidationError:
@@ -54,7 +91,62 @@ def compute_exam_score(exam_id) -> ExamScore:
     return score
 
 
+def _split_exam_ids(exam_ids: list, errors: dict) -> list:
+    """去重并返回合法的考试 id，不合法的 id 记入 errors"""
+    if len(exam_ids) > ExamConfig.batch_max_exams:
+        raise InvalidParam
+    valid_ids = []
+    for exam_id in dict.fromkeys(exam_ids):
+        if exam_id and ObjectId.is_valid(exam_id):
+            valid_ids.append(exam_id)
+        else:
+            errors[exam_id] = InvalidParam()
+    return valid_ids
+
+
+def _exam_result_items(exam_ids: list, results: dict, errors: dict) -> list:
+    """按请求顺序生成 ExamResultItem，results: {exam_id: (ExamScore, ExamReport)}"""
+    items = []
+    for exam_id in exam_ids:
+        item = ExamResultItem(examId=exam_id)
+        if exam_id in results:
+            item.score, item.report = results[exam_id]
+            fill_status_of_resp(item)
+        else:
+            fill_status_of_resp(item, errors.get(exam_id) or ExamNotExist())
+        items.append(item)
+    return items
+
+
+def compute_exam_scores(exam_ids: list) -> list:
+    """
+    批量获取成绩，语义同 compute_exam_score
+    current 和 history 各一次 $in 查询，新计算的成绩一次 bulk_write 写回，返回与 exam_ids 一一对应的 ExamResultItem
+    """
+    errors = {}
+    tests = exam_manager.get_exams_by_ids(_split_exam_ids(exam_ids, errors), 'score')
+
+    results, computed = {}, []
+    for exam_id, test in tests.items():
+        try:
+            if exam_manager.fill_exam_score(test):
+                computed.append(test)
+            results[exam_id] = exam_manager.stored_exam_score(test), None
+        except ErrorWithCode as e:
+            errors[exam_id] = e
+        except Exception:
+            logging.exception("[compute_exam_scores] compute score failed. exam_id: %s" % exam_id)
+            errors[exam_id] = InternalError()
+
+    exam_manager.save_exam_scores(computed)
+    logging.info("[compute_exam_scores] exams: %d, found: %d, computed: %d" % (len(exam_ids), len(tests), len(computed)))
+    return _exam_result_items(exam_ids, results, errors)
+
+
 def get_exam_record(user_id: str, template_id: str) -> list:
+    if ExamConfig.exam_record_from_summary:
+        return get_exam_record_from_summary(user_id, template_id)
+
     if not template_id:  # 全部历史成绩
         history_scores_origin = HistoryTestModel.objects(user_id=user_id).order_by("test_start_time")
         current_scores_origin = CurrentTestModel.objects(user_id=user_id).order_by("test_start_time")
@@ -90,6 +182,81 @@ def get_exam_record(user_id: str, template_id: str) -> list:
     return exam_list
 
 
+def get_exam_record_from_summary(user_id: str, template_id: str) -> list:
+    """从 exam_summary 获取考试记录，只有尚未计算成绩的考试需要再读取考试本身"""
+    exam_list = []
+    for summary in summary_manager.list_exams(user_id, template_id):
+        if summary.score_info:
+            score = exam_manager.score_info_to_exam_score(summary.score_info)
+        elif summary.archived:
+            score = ExamScore(total=0, quality=0, key=0, detail=0, structure=0, logic=0)
+        else:
+            test = exam_manager.get_exam_by_id(summary.exam_id, 'score')
+            if test is None:
+                continue
+            if isinstance(test, HistoryTestModel) and not test.score_info:
+                summary_manager.mark_archived(summary.exam_id)
+            try:
+                score = exam_manager.get_exam_score(test)
+            except InProcessing:
+                continue
+
+        exam_list.append(ExamRecord(
+            examStartTime=util.datetime_to_str(summary.test_start_time),
+            templateId=summary.paper_tpl_id,
+            examId=summary.exam_id,
+            scoreInfo=score
+        ))
+
+    return exam_list
+
+
+def get_exam_record_page(user_id: str, template_id: str, cursor: str, limit: int,
+                         start_time: str = None, end_time: str = None) -> (list, str):
+    """
+    分页获取考试记录，按开始时间升序，只读取列表所需字段，不会在读取过程中写数据库
+
+    cursor 为上一页返回的 next_cursor（形如 '<开始时间毫秒时间戳>_<exam_id>'），第一页传空
+    end_time 只有日期（如 '2020-01-01'）时包含当天全天
+    返回 (本页 ExamRecord 列表, 下一页 cursor)，没有下一页时 cursor 为空字符串
+    """
+    try:
+        start_dt = util.str_to_datetime(start_time) if start_time else None
+        end_dt = util.str_to_datetime(end_time) if end_time else None
+        end_exclusive = bool(end_dt) and ':' not in end_time
+        if end_exclusive:  # 只有日期，截止到次日零点（不含）
+            end_dt += datetime.timedelta(days=1)
+        after = None
+        if cursor:
+            after_ms, after_id = cursor.split('_', 1)
+            after = (EPOCH + datetime.timedelta(milliseconds=int(after_ms)), after_id)
+            start_dt = max(start_dt, after[0]) if start_dt else after[0]
+    except ValueError:
+        raise InvalidParam
+
+    exam_list = []
+    last_key = None
+    for test_start_time, exam_id, test, is_history in \
+            exam_manager.iter_exam_records(user_id, template_id, start_dt, end_dt, end_exclusive):
+        if after and (test_start_time, exam_id) <= after:
+            continue
+        score = exam_manager.peek_exam_score(test, is_history)
+        if score is None:  # 正在处理
+            continue
+        if len(exam_list) == limit:
+            ms = (last_key[0] - EPOCH) // datetime.timedelta(milliseconds=1)
+            return exam_list, '%d_%s' % (ms, last_key[1])
+        exam_list.append(ExamRecord(
+            examStartTime=util.datetime_to_str(test_start_time),
+            templateId=test.get('paper_tpl_id'),
+            examId=exam_id,
+            scoreInfo=score
+        ))
+        last_key = (test_start_time, exam_id)
+
+    return exam_list, ''
+
+
 def init_new_audio_test(user_id: str) -> QuestionInfo:
     return QuestionInfo(
         content=ExamConfig.audio_test["content"],
@@ -104,13 +271,13 @@ def init_new_audio_test(user_id: str) -> QuestionInfo:
 
 
 def get_question_info(exam_id: str, question_num: int) -> QuestionInfo:
-    # get test
-    test = CurrentTestModel.objects(id=exam_id).first()
+    # get test (只取出需要的题目)
+    test = exam_manager.get_current_question(exam_id, question_num)
     if test is None:
         raise ExamNotExist
 
     # 如果超出最大题号
-    if question_num > len(test.questions):
+    if str(question_num) not in test.questions:
         raise ExamFinished
 
     question = test.questions[str(question_num)]
@@ -123,7 +290,7 @@ def get_question_info(exam_id: str, question_num: int) -> QuestionInfo:
         answerLimitTime=ExamConfig.question_limit_time[question.q_type],
         questionTip=ExamConfig.question_type_tip[question.q_type],
         questionNum=question_num,
-        isLastQuestion=(question_num == len(test.questions)),
+        isLastQuestion=(str(question_num + 1) not in test.questions),
         examTime=(test.test_expire_time - test.test_start_time).seconds,
         examLeftTime=(test.test_expire_time - datetime.datetime.utcnow()).total_seconds()
     )
@@ -138,7 +305,7 @@ def get_question_info(exam_id: str, question_num: int) -> QuestionInfo:
 
 def get_file_upload_path(exam_id: str = "audio_test", user_id: str = None, question_num: int = None) -> str:
     if question_num:  # real_exam
-        exam = CurrentTestModel.objects(id=exam_id).first()
+        exam = exam_manager.get_current_question(exam_id, question_num)
         if not exam:
             logging.error("[get_file_upload_path] no such test! test id: %s" % exam_id)
             raise ExamNotExist
@@ -175,7 +342,7 @@ def init_new_exam(user_id: str, template_id: str) -> str:
 
 def get_paper_template(template_id: str) -> list:
     if template_id is None:
-        all_templates = PaperTemplate.objects()
+        all_templates = template_cache.list_all()
         tpl_lst = []
         for tpl in all_templates:
             d = ExamTemplate(
@@ -189,7 +356,7 @@ def get_paper_template(template_id: str) -> list:
             tpl_lst.append(d)
         return tpl_lst
     else:
-        template_item = PaperTemplate.objects(id=template_id).first()
+        template_item = template_cache.get(template_id)
         tmp = ExamTemplate(
             id=str(template_item.id), name=template_item.name,
             description=template_item.desc, questionCount=len(template_item.questions)
@@ -205,6 +372,7 @@ def get_audio_test_result(exam_id: str) -> (bool, float):
     if status == 'handling':
         raise InProcessing
     elif status == 'finished':
+        import Levenshtein  # 只有已弃用的音频测试接口使用，按需加载
         rcg_text = audio_test['result']['feature']['rcg_text']
         lev_ratio = Levenshtein.ratio(rcg_text, audio_test['text'])
         return True, lev_ratio
@@ -214,7 +382,12 @@ def get_audio_test_result(exam_id: str) -> (bool, float):
 
 def get_exam_result(exam_id: str) -> (ExamScore, ExamReport):
     try:
-        test = exam_manager.get_exam_by_id(exam_id)
+        cached = get_cached_report(exam_id)
+        if cached:
+            logging.info("[get_exam_result] use cached report. exam_id: %s" % exam_id)
+            report, score = cached
+            return score, report
+        test = exam_manager.get_exam_by_id(exam_id, 'report')
         if test is None:
             raise ExamNotExist
     except ValidationError:
@@ -233,6 +406,7 @@ def get_exam_result(exam_id: str) -> (ExamScore, ExamReport):
             logging.info("[get_exam_result] first compute score. exam_id: %s" % exam_id)
             test['score_info'] = exam_manager.compute_exam_score(score, test.paper_type)
             test.save()
+            summary_manager.update_score(exam_manager.get_exam_id(test), test['score_info'])
         else:
             logging.info("[get_exam_result] use computed score. exam_id: %s" % exam_id)
 
@@ -241,12 +415,66 @@ def get_exam_result(exam_id: str) -> (ExamScore, ExamReport):
             detail=test['score_info']['细节'], structure=test['score_info']['结构'], logic=test['score_info']['逻辑']
         )
         exam_report = report_manager.generate_report(feature, score, test.paper_type)
+        if report_cacheable(test):
+            cache_report(exam_id, test['score_info'], exam_report, exam_score)
 
         return exam_score, exam_report
     else:
         return InProcessing
 
 
+def get_exam_results(exam_ids: list) -> list:
+    """
+    批量获取成绩和报告，语义同 get_exam_result，但只有已结束的考试（见 exam_manager.exam_finished）才计算成绩，
+    进行中的考试（包括题目都未作答的）返回 InProcessing，不保存成绩
+    current 和 history 各一次 $in 查询，新计算的成绩一次 bulk_write 写回，未缓存的报告批量生成
+    返回与 exam_ids 一一对应的 ExamResultItem
+    """
+    errors = {}
+    tests = exam_manager.get_exams_by_ids(_split_exam_ids(exam_ids, errors), 'report')
+
+    # 已结束、已出成绩且报告已缓存的考试
+    cached = report_cache.get_many(
+        {exam_id: score_version(test['score_info']) for exam_id, test in tests.items() if report_cacheable(test)})
+    results = {exam_id: (score, report) for exam_id, (report, score) in cached.items()}
+
+    now = datetime.datetime.utcnow()
+    computed, pending = [], []  # pending: [(exam_id, test, feature, score)]
+    for exam_id, test in tests.items():
+        if exam_id in results:
+            continue
+        try:
+            # 如果回答完问题或超时但已处理完，则计算得分，否则返回正在处理
+            if exam_manager.exam_finished(test, now=now):
+                _, score, feature = exam_manager.get_score_and_feature(test['questions'])
+                if not test['score_info']:
+                    test['score_info'] = exam_manager.compute_exam_score(score, test.paper_type)
+                    computed.append(test)
+                pending.append((exam_id, test, feature, score))
+            else:
+                errors[exam_id] = InProcessing()
+        except Exception:
+            logging.exception("[get_exam_results] compute score failed. exam_id: %s" % exam_id)
+            errors[exam_id] = InternalError()
+
+    exam_manager.save_exam_scores(computed)
+
+    reports = report_manager.generate_reports_batch([feature for _, _, feature, _ in pending],
+                                                    [score for _, _, _, score in pending],
+                                                    [test.paper_type for _, test, _, _ in pending])
+    cache_entries = []
+    for (exam_id, test, _, _), report in zip(pending, reports):
+        exam_score = exam_manager.score_info_to_exam_score(test['score_info'])
+        results[exam_id] = exam_score, report
+        if test['score_info']:
+            cache_entries.append((exam_id, score_version(test['score_info']), report, exam_score))
+    report_cache.put_many(cache_entries)
+
+    logging.info("[get_exam_results] exams: %d, found: %d, cached: %d, computed: %d, generated: %d" % (
+        len(exam_ids), len(tests), len(cached), len(computed), len(pending)))
+    return _exam_result_items(exam_ids, results, errors)
+
+
 def save_paper_template(new_template: ExamTemplate):
     # modify
     if new_template.id:
@@ -286,3 +514,5 @@ def save_paper_template(new_template: ExamTemplate):
             questions=question_list
         )
         new_template.save()
+
+    template_cache.invalidate()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# coding: utf-8
+#
+# 依赖的其他服务的 thrift IDL，随代码（镜像）一起发布，启动时从本地文件解析
+#
+# user.thrift 应随代码提交，更新用户服务接口后执行 python manage.py fetch-idl 重新下载并提交；
+# 尚未提交时首次启动会下载一次（镜像在构建时下载）
+# 每个进程只解析一次（pre-fork 模式下在 fork 前解析，worker 直接继承）
+
+import logging
+import os
+import tempfile
+import threading
+import urllib.request
+
+import thriftpy2
+
+IDL_DIR = os.path.dirname(os.path.abspath(__file__))
+USER_THRIFT_PATH = os.path.join(IDL_DIR, 'user.thrift')
+USER_THRIFT_URL = "https://raw.githubusercontent.com/llf-970310/expression-api/master/thrift_idl/user.thrift"
+
+_lock = threading.Lock()
+_user_thrift = None
+
+
+def fetch(url: str = USER_THRIFT_URL, path: str = USER_THRIFT_PATH, timeout: float = 10):
+    """下载 IDL 到 path，先写临时文件再替换，不会留下不完整的文件"""
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        data = resp.read()
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logging.info("[fetch] %s -> %s, %d bytes" % (url, path, len(data)))
+
+
+def load_user_thrift():
+    """
+    解析本地的 user.thrift，结果在进程内缓存
+    文件尚未提交到仓库（未执行 fetch-idl）时下载一次并保存，之后的启动不再访问网络；下载失败时报错并指明缺少的文件
+    """
+    global _user_thrift
+    if _user_thrift is None:
+        with _lock:
+            if _user_thrift is None:
+                if not os.path.exists(USER_THRIFT_PATH):
+                    logging.warning("[load_user_thrift] %s not found, fetching from %s" % (
+                        USER_THRIFT_PATH, USER_THRIFT_URL))
+                    try:
+                        fetch()
+                    except OSError as e:
+                        raise FileNotFoundError("user service IDL %s not found and fetching %s failed (%r), "
+                                                "run `python manage.py fetch-idl` and commit it"
+                                                % (USER_THRIFT_PATH, USER_THRIFT_URL, e)) from e
+                _user_thrift = thriftpy2.load(USER_THRIFT_PATH, module_name='user_thrift')
+    return _user_thrift
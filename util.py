@@ -1,29 +1,181 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+import asyncio
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import time
 from functools import wraps
 
+from config import LogConfig
+
+access_logger = logging.getLogger('access')
+
+
+class _AccessEntry(object):
+    """一次调用的访问日志，只在真正输出时（QueueListener 线程中）才生成 repr 和 JSON"""
+
+    __slots__ = ('method', 'duration_ms', 'status_code', 'error', 'args', 'response')
+
+    def __init__(self, method, duration_ms, status_code, error, args, response):
+        self.method = method
+        self.duration_ms = duration_ms
+        self.status_code = status_code
+        self.error = error
+        self.args = args
+        self.response = response
+
+    def __str__(self):
+        entry = {'method': self.method, 'duration_ms': round(self.duration_ms, 2)}
+        if self.status_code is not None:
+            entry['status_code'] = self.status_code
+        if self.error is not None:
+            entry['error'] = repr(self.error)
+        limit = LogConfig.access_payload_limit
+        if limit:
+            entry['args'] = _truncate(repr(self.args), limit)
+            if self.response is not None:
+                entry['response'] = _truncate(repr(self.response), limit)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return '%s...(%d chars)' % (text[:limit], len(text))
+
+
+def _log_access(method: str, start: float, args, rsp, error=None):
+    """
+    记录一次调用：异常为 ERROR，慢调用为 WARNING，其余为 INFO；
+    成功的调用按采样率记录，级别未开启或未被采样时不生成任何字符串
+    """
+    if not LogConfig.access_log:
+        return
+    duration_ms = (time.perf_counter() - start) * 1000
+    status_code = getattr(rsp, 'statusCode', None)
+    if error is not None:
+        level = logging.ERROR
+    elif duration_ms >= LogConfig.access_slow_ms:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    if not access_logger.isEnabledFor(level):
+        return
+    if level == logging.INFO and not status_code:
+        rate = LogConfig.access_sample_rates.get(method, LogConfig.access_sample_rate)
+        if rate < 1 and random.random() >= rate:
+            return
+    access_logger.log(level, '%s', _AccessEntry(method, duration_ms, status_code, error, args, rsp))
+
 
 def func_log(func):
+    """handler 的访问日志，每次调用一条结构化记录，见 LogConfig 的 access_* 配置"""
+    if asyncio.iscoroutinefunction(func):
+        return _async_func_log(func)
+    method = func.__name__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start = 1000 * time.time()
-        logging.info(f"=============  Begin: {func.__name__}  =============")
-        logging.info(f"Args: {args}")
+        start = time.perf_counter()
         try:
             rsp = func(*args, **kwargs)
-            logging.info(f"Response: {rsp}")
-            end = 1000 * time.time()
-            logging.info(f"Time consuming: {end - start}ms")
-            logging.info(f"=============   End: {func.__name__}   =============\n")
-            return rsp
         except Exception as e:
-            logging.error(repr(e))
+            _log_access(method, start, args, None, e)
             raise e
+        _log_access(method, start, args, rsp)
+        return rsp
 
     return wrapper
 
 
+def _async_func_log(func):
+    method = func.__name__
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            rsp = await func(*args, **kwargs)
+        except Exception as e:
+            _log_access(method, start, args, None, e)
+            raise e
+        _log_access(method, start, args, rsp)
+        return rsp
+
+    return wrapper
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    把日志记录原样放入队列，消息的格式化（包括 %s 参数的 repr）留给 QueueListener 线程；
+    队列满时丢弃并计数，不阻塞调用线程
+    """
+
+    def prepare(self, record):
+        if record.exc_info:  # traceback 引用调用线程的栈帧，在这里先格式化
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        global dropped_log_records
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            dropped_log_records += 1
+
+
+dropped_log_records = 0
+_listener = None  # (pid, QueueListener, 实际输出的 handler)
+
+
+def init_logging(fmt="%(asctime)s - %(levelname)s - %(message)s", datefmt="%Y/%m/%d %H:%M:%S"):
+    """
+    配置根 logger，可重复调用；LogConfig.async_handler 开启时日志由 QueueListener 线程输出
+    fork 之后监听线程不会被继承，pre-fork 的 worker 需要在 fork 后重新调用
+    """
+    global _listener
+    root = logging.getLogger()
+    _stop_listener()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt, datefmt))
+    if LogConfig.async_handler:
+        log_queue = queue.Queue(LogConfig.queue_size)
+        listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        _listener = (os.getpid(), listener, handler)
+        root.addHandler(_LazyQueueHandler(log_queue))
+    else:
+        root.addHandler(handler)
+    root.setLevel(LogConfig.level)
+
+
+def _stop_listener():
+    """输出队列中剩余的日志并停止监听线程，之后的日志直接由 handler 输出；fork 继承来的监听线程已不存在，直接丢弃"""
+    global _listener
+    if _listener is None:
+        return
+    pid, listener, handler = _listener
+    _listener = None
+    if pid != os.getpid():
+        return
+    listener.stop()
+    root = logging.getLogger()
+    for queue_handler in [h for h in root.handlers if isinstance(h, _LazyQueueHandler)]:
+        root.removeHandler(queue_handler)
+        root.addHandler(handler)
+
+
+atexit.register(_stop_listener)
+
+
 def datetime_to_str(dt, date_separator='-', only_date=False) -> str:
     """将datetime对象转换为形如 '2020-01-01 12:00:00'的字符串,可指定only_date只包含日期
 
@@ -48,6 +200,27 @@ def datetime_to_str(dt, date_separator='-', only_date=False) -> str:
         return dt.strftime("%%Y%s%%m%s%%d %%H:%%M:%%S" % (date_separator, date_separator))
 
 
+def str_to_datetime(dt_str: str, date_separator='-') -> datetime:
+    """将形如 '2020-01-01 12:00:00' 或 '2020-01-01' 的东八区时间字符串转换为 UTC datetime 对象
+
+    Args:
+        dt_str: 时间字符串，格式与 datetime_to_str 的输出一致
+        date_separator: 日期间隔符
+
+    Returns:
+        UTC datetime 对象
+
+    Raises:
+        ValueError: 字符串格式不正确
+    """
+    date_format = "%%Y%s%%m%s%%d" % (date_separator, date_separator)
+    try:
+        dt = datetime.strptime(dt_str, date_format + " %H:%M:%S")
+    except ValueError:
+        dt = datetime.strptime(dt_str, date_format)
+    return dt - timedelta(hours=8)
+
+
 def get_server_date_str(separator='') -> str:
     """
     Desc:   获得当前日期格式化字符串，可指定分隔符，如: 20181009(默认), 2018-10-31(输入为-), 2018===10===31(输入为===)